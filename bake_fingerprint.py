@@ -0,0 +1,135 @@
+"""
+Source curve fingerprints for incremental re-baking
+A bake towards IK reads the FK controls (and towards FK the IK and pole
+controls) plus every ancestor of the limb. After a bake, each of those
+animation curves is fingerprinted as one short hash per block of frames
+and the result is stored in a string attribute on the limb's switch
+control, so it is saved with the scene and undone with the bake. A later
+bake of the same limb, direction and range compares fingerprints and
+re-matches only the frames a changed block can reach.
+"""
+
+import hashlib
+import json
+
+import numpy as np
+import maya.cmds as cmds
+
+
+FINGERPRINT_ATTR = 'gtBakeFingerprint'
+
+# Frames per hashed block: smaller blocks narrow a re-bake but grow the stored fingerprint
+BLOCK_FRAMES = 8
+
+# Keys either side of a changed key whose curve segments its tangents can reach
+TANGENT_REACH = 2
+
+
+def source_nodes(job, to_mode):
+    """Return the long names of the nodes a bake towards `to_mode` reads animation from"""
+    controls = job['fk'] + job['ik']
+    targets = set(cmds.ls(job['fk'] if to_mode == 'fk' else job['ik'], long=True) or [])
+    nodes = []
+    for path in cmds.ls(controls, long=True) or []:
+        parts = path.split('|')
+        nodes += ['|'.join(parts[:i + 1]) for i in range(1, len(parts))]
+    return [node for node in dict.fromkeys(nodes) if node not in targets]
+
+
+def hash_blocks(times, values, in_angles, out_angles):
+    """Return {block: hash} over a curve's keys, grouped by BLOCK_FRAMES"""
+    keys = np.array([times, values, in_angles, out_angles], dtype=np.float64)
+    if not keys.shape[1]:
+        return {}
+    
+    # Key times are sorted, so every block is one contiguous run of columns
+    blocks = np.floor(keys[0] / BLOCK_FRAMES).astype(int)
+    starts = np.flatnonzero(np.diff(blocks)) + 1
+    hashes = {}
+    for block, columns in zip(blocks[np.r_[0, starts]], np.split(keys, starts, axis=1)):
+        data = np.ascontiguousarray(columns).tobytes()
+        hashes[str(block)] = hashlib.blake2b(data, digest_size=6).hexdigest()
+    return hashes
+
+
+def fingerprint(job, to_mode, start, end, curve_hashes=None):
+    """
+    Fingerprint the animation a bake of `job` towards `to_mode` over
+    start..end reads. Returns (fingerprint, key_times): the stored part and
+    every curve's key times, which changed_frames needs but are not stored.
+    Curves already in `curve_hashes` ({curve: (hashes, times)}, filled as
+    curves are read) are not read again.
+    """
+    if curve_hashes is None:
+        curve_hashes = {}
+    nodes = source_nodes(job, to_mode)
+    exclude = set()
+    if job['switch_attr']:
+        exclude.update(cmds.keyframe(f"{job['switch_ctrl']}.{job['switch_attr']}", query=True, name=True) or [])
+    
+    curves = {}
+    key_times = {}
+    names = cmds.keyframe(nodes, query=True, name=True) if nodes else None
+    for curve in dict.fromkeys(names or []):
+        if curve in exclude:
+            continue
+        if curve not in curve_hashes:
+            times = cmds.keyframe(curve, query=True, timeChange=True) or []
+            values = cmds.keyframe(curve, query=True, valueChange=True) or []
+            in_angles = cmds.keyTangent(curve, query=True, inAngle=True) or [0.0] * len(times)
+            out_angles = cmds.keyTangent(curve, query=True, outAngle=True) or [0.0] * len(times)
+            curve_hashes[curve] = (hash_blocks(times, values, in_angles, out_angles), times)
+        curves[curve], key_times[curve] = curve_hashes[curve]
+    return {'range': [start, end], 'curves': curves}, key_times
+
+
+def changed_frames(stored, current, key_times):
+    """
+    Return the frames of the current range whose source animation may differ
+    from when `stored` was taken: every frame a changed block's keys can
+    reach through their neighbours' tangents. All frames when the range or
+    the set of curves changed.
+    """
+    start, end = current['range']
+    frames = np.arange(start, end + 1)
+    if not stored or stored['range'] != current['range'] or set(stored['curves']) != set(current['curves']):
+        return frames.tolist()
+    
+    dirty = np.zeros(len(frames), dtype=bool)
+    for curve, new_blocks in current['curves'].items():
+        old_blocks = stored['curves'][curve]
+        changed = [int(block) for block in set(old_blocks) | set(new_blocks)
+                   if old_blocks.get(block) != new_blocks.get(block)]
+        if not changed:
+            continue
+        
+        times = np.array(key_times[curve], dtype=np.float64)
+        for block in changed:
+            first = np.searchsorted(times, block * BLOCK_FRAMES)
+            after = np.searchsorted(times, (block + 1) * BLOCK_FRAMES)
+            low = times[first - TANGENT_REACH] if first - TANGENT_REACH >= 0 else -np.inf
+            high = times[after - 1 + TANGENT_REACH] if after - 1 + TANGENT_REACH < len(times) else np.inf
+            dirty |= (frames >= low) & (frames <= high)
+    return frames[dirty].tolist()
+
+
+def load(switch_ctrl):
+    """Return the fingerprints stored on a switch control, {limb: {to_mode: fingerprint}}"""
+    if not cmds.attributeQuery(FINGERPRINT_ATTR, node=switch_ctrl, exists=True):
+        return {}
+    try:
+        return json.loads(cmds.getAttr(f"{switch_ctrl}.{FINGERPRINT_ATTR}") or '{}')
+    except ValueError:
+        return {}
+
+
+def save(switch_ctrl, fingerprints):
+    """Store fingerprints on a switch control; returns False where the node cannot take them"""
+    try:
+        if not cmds.attributeQuery(FINGERPRINT_ATTR, node=switch_ctrl, exists=True):
+            cmds.addAttr(switch_ctrl, longName=FINGERPRINT_ATTR, dataType='string')
+        cmds.setAttr(f"{switch_ctrl}.{FINGERPRINT_ATTR}", json.dumps(fingerprints), type='string')
+    except RuntimeError:
+        # Locked or read-only nodes; their limbs are simply always fully baked
+        return False
+    return True
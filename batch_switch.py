@@ -0,0 +1,367 @@
+"""
+Batch IK/FK switching for the GT Custom Rig Interface
+Switches (and optionally bakes) limbs across many scene files from the
+command line, spreading the files over a pool of persistent standalone
+interpreter workers and writing a per-file JSON summary.
+
+    mayapy batch_switch.py shots/*.ma --preset Custom --mode fk --start 1 --end 240
+    python batch_switch.py scenes/*.json --standin --mode ik --workers 4
+"""
+
+import argparse
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+from curve_reduction import DEFAULT_TOLERANCES
+
+
+# Workers print other output too (Maya startup, warnings); results are tagged
+RESULT_MARKER = "@@GT_SWITCH_RESULT@@ "
+SCENE_TYPES = {'.ma': 'mayaAscii', '.mb': 'mayaBinary'}
+
+# The scene a sampling worker has open, and the SwitchCore sampling it
+_sampling = {}
+
+
+def default_mayapy():
+    """Return the standalone interpreter: $MAYAPY, else mayapy next to the running executable"""
+    if os.environ.get('MAYAPY'):
+        return os.environ['MAYAPY']
+    folder = os.path.dirname(sys.executable)
+    for name in ('mayapy', 'mayapy.exe'):
+        if os.path.isfile(os.path.join(folder, name)):
+            return os.path.join(folder, name)
+    return 'mayapy'
+
+
+def build_parser():
+    """Return the command line parser"""
+    parser = argparse.ArgumentParser(description="Batch IK/FK switch and bake scene files")
+    parser.add_argument('scenes', nargs='*', help="Scene files to process")
+    parser.add_argument('--preset', help="Rig preset name (detected per scene when omitted)")
+    parser.add_argument('--namespace', nargs='+', help="Rig namespaces (first detected when omitted)")
+    parser.add_argument('--all-namespaces', action='store_true', help="Switch every detected character")
+    parser.add_argument('--limbs', nargs='+', help="Limbs to switch (default: every limb of the preset)")
+    parser.add_argument('--mode', choices=['ik', 'fk', 'toggle'], default='toggle', help="Target mode")
+    parser.add_argument('--start', type=int, help="First frame (default: playback start)")
+    parser.add_argument('--end', type=int, help="Last frame (default: playback end)")
+    parser.add_argument('--sparse', action='store_true', help="Only key frames that already have keys")
+    parser.add_argument('--reduce', action='store_true', help="Remove redundant baked keys")
+    parser.add_argument('--rotate-tolerance', type=float, default=DEFAULT_TOLERANCES['rotate'],
+                        help="Reduction tolerance for rotation, in degrees")
+    parser.add_argument('--translate-tolerance', type=float, default=DEFAULT_TOLERANCES['translate'],
+                        help="Reduction tolerance for translation, in scene units")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only re-bake frames whose source animation changed since the last bake")
+    parser.add_argument('--memory-limit', type=int,
+                        help="Bake memory ceiling in MB (default 512); longer ranges are baked in windows")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument('--mayapy', default=default_mayapy(), help="Standalone interpreter")
+    parser.add_argument('--suffix', default='_switched', help="Output file suffix")
+    parser.add_argument('--in-place', action='store_true', help="Overwrite the input scenes")
+    parser.add_argument('--summary', default='switch_summary.json', help="Summary JSON path")
+    parser.add_argument('--standin', action='store_true', help="Use the stand-in maya.cmds (JSON scenes)")
+    parser.add_argument('--verify-parallel', action='store_true',
+                        help="Check that a parallel bake matches a serial bake on a stand-in rig")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    return parser
+
+
+def output_path(scene, suffix, in_place):
+    """Return where a processed scene is saved"""
+    if in_place:
+        return scene
+    root, ext = os.path.splitext(scene)
+    return f"{root}{suffix}{ext}"
+
+
+def make_task(scene, args):
+    """Return the JSON task sent to a worker for one scene"""
+    return {
+        'scene': os.path.abspath(scene),
+        'output': os.path.abspath(output_path(scene, args.suffix, args.in_place)),
+        'preset': args.preset,
+        'namespaces': args.namespace,
+        'all_namespaces': args.all_namespaces,
+        'limbs': args.limbs,
+        'mode': args.mode,
+        'start': args.start,
+        'end': args.end,
+        'sparse': args.sparse,
+        'reduce': args.reduce,
+        'tolerances': {'rotate': args.rotate_tolerance, 'translate': args.translate_tolerance},
+        'incremental': args.incremental,
+        'memory_limit': args.memory_limit,
+    }
+
+
+# Worker side ------------------------------------------------------------------
+
+def initialize_worker(standin):
+    """Start Maya (or install the stand-in) before switch_core is imported"""
+    if standin:
+        import standin_cmds
+        standin_cmds.install()
+    else:
+        import maya.standalone
+        maya.standalone.initialize(name='python')
+
+
+def process_scene(task):
+    """Open, switch, bake and save one scene; returns its summary"""
+    import maya.cmds as cmds
+    from chain_geometry import ChainGeometryCache
+    from control_cache import ResolvedControlCache
+    from scene_index import get_scene_index
+    from switch_core import RIG_PRESETS, SwitchCore
+    
+    timer = time.perf_counter()
+    result = {'scene': task['scene'], 'output': task['output'], 'status': 'ok'}
+    
+    _sampling.clear()
+    cmds.file(task['scene'], open=True, force=True)
+    get_scene_index().reset()
+    
+    # Nothing else edits the scene, so the cache does not need scene callbacks
+    core = SwitchCore(control_cache=ResolvedControlCache(watch_scene=False),
+                      chain_cache=ChainGeometryCache(watch_scene=False))
+    core.remember_detection = False
+    rig_type, namespaces = task['preset'], None
+    if rig_type:
+        namespaces = get_scene_index().find_rig_namespaces(RIG_PRESETS[rig_type])
+    else:
+        rig_type, namespaces = core.detect_rig()
+    if task['namespaces']:
+        namespaces = task['namespaces']
+    elif not task['all_namespaces']:
+        namespaces = namespaces[:1]
+    
+    if not rig_type or not namespaces:
+        result.update(status='skipped', error="No rig found")
+        return result
+    
+    core.set_rig(rig_type, namespaces[0])
+    core.autokey = True
+    core.reduce_keys = task['reduce']
+    core.reduce_tolerances = task['tolerances']
+    core.incremental = task.get('incremental', False)
+    if task.get('memory_limit'):
+        core.memory_limit_mb = task['memory_limit']
+    start = task['start'] if task['start'] is not None else int(cmds.playbackOptions(query=True, minTime=True))
+    end = task['end'] if task['end'] is not None else int(cmds.playbackOptions(query=True, maxTime=True))
+    target_mode = None if task['mode'] == 'toggle' else task['mode']
+    
+    limbs = task['limbs'] or list(core.limb_controls)
+    character_limbs = [(namespace, limb) for namespace in namespaces for limb in limbs]
+    
+    # Every character is sampled and keyed in the same sweep over the frame range
+    switches, missing = core.plan_character_switches(character_limbs, target_mode)
+    stats = core.perform_character_switches(switches, start, end, mode='sparse' if task['sparse'] else 'bake')
+    
+    if switches:
+        cmds.file(rename=task['output'])
+        scene_type = SCENE_TYPES.get(os.path.splitext(task['output'])[1].lower())
+        cmds.file(save=True, force=True, **({'type': scene_type} if scene_type else {}))
+    
+    result.update({
+        'rig_type': rig_type,
+        'namespaces': namespaces,
+        'frames': [start, end],
+        'switches': [list(switch) for switch in switches],
+        'missing': [list(limb) for limb in missing],
+        'stats': stats,
+        'saved': bool(switches),
+        'seconds': time.perf_counter() - timer,
+    })
+    return result
+
+
+def sample_scene(task):
+    """Sample matrix plugs over one shard of frames for a parallel bake"""
+    import numpy as np
+    import maya.cmds as cmds
+    from control_cache import ResolvedControlCache
+    from switch_core import SwitchCore
+    
+    # The windows of one bake all sample the same exported scene; it is opened once
+    if _sampling.get('scene') != task['scene']:
+        cmds.file(task['scene'], open=True, force=True)
+        _sampling['scene'] = task['scene']
+        _sampling['core'] = SwitchCore(control_cache=ResolvedControlCache(watch_scene=False))
+    core = _sampling['core']
+    samples = core.sample_plugs(task['plugs'], task['frames'], task['use_playhead'])
+    np.save(task['output'], np.stack([samples[plug] for plug in task['plugs']], axis=1))
+    return {'scene': task['scene'], 'output': task['output'], 'status': 'ok', 'frames': len(task['frames'])}
+
+
+def worker_main(standin):
+    """Process JSON task lines from stdin until it closes"""
+    initialize_worker(standin)
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        
+        task = json.loads(line)
+        try:
+            if task.get('kind') == 'sample':
+                result = sample_scene(task)
+            else:
+                result = process_scene(task)
+        except Exception as e:
+            result = {'scene': task['scene'], 'output': task['output'], 'status': 'error',
+                      'error': f"{type(e).__name__}: {e}"}
+        sys.stdout.write(RESULT_MARKER + json.dumps(result) + "\n")
+        sys.stdout.flush()
+
+
+# Pool side --------------------------------------------------------------------
+
+def worker_command(interpreter, standin=False):
+    """Return the command line that starts one worker process"""
+    command = [interpreter, os.path.abspath(__file__), '--worker']
+    if standin:
+        command.append('--standin')
+    return command
+
+
+def read_result(process):
+    """Read worker output up to the next result line"""
+    for line in process.stdout:
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    raise RuntimeError(f"Worker exited with code {process.wait()}")
+
+
+def run_worker(command, tasks, results):
+    """Feed tasks to one persistent worker process until the queue is empty"""
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               universal_newlines=True, bufsize=1)
+    try:
+        while True:
+            try:
+                task = tasks.get_nowait()
+            except queue.Empty:
+                break
+            
+            try:
+                process.stdin.write(json.dumps(task) + "\n")
+                process.stdin.flush()
+                results.append(read_result(process))
+            except (OSError, RuntimeError) as e:
+                results.append({'scene': task['scene'], 'output': task['output'], 'status': 'error',
+                                'error': f"Worker failed: {e}"})
+                # The worker is gone; let the remaining workers take the rest
+                break
+    finally:
+        process.stdin.close()
+        process.wait()
+
+
+def run_batch(args):
+    """Process every scene across the worker pool and return the summary"""
+    timer = time.perf_counter()
+    tasks = queue.Queue()
+    for scene in args.scenes:
+        tasks.put(make_task(scene, args))
+    
+    results = []
+    command = worker_command(sys.executable if args.standin else args.mayapy, args.standin)
+    threads = [threading.Thread(target=run_worker, args=(command, tasks, results))
+               for _ in range(max(1, min(args.workers, len(args.scenes))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    # Tasks left behind by workers that died
+    while not tasks.empty():
+        task = tasks.get_nowait()
+        results.append({'scene': task['scene'], 'output': task['output'], 'status': 'error',
+                        'error': "No worker left to process the scene"})
+    
+    order = {os.path.abspath(scene): i for i, scene in enumerate(args.scenes)}
+    results.sort(key=lambda result: order.get(result['scene'], len(order)))
+    return {
+        'workers': len(threads),
+        'scenes': len(results),
+        'ok': sum(result['status'] == 'ok' for result in results),
+        'skipped': sum(result['status'] == 'skipped' for result in results),
+        'errors': sum(result['status'] == 'error' for result in results),
+        'seconds': time.perf_counter() - timer,
+        'results': results,
+    }
+
+
+def verify_parallel_bake(frames=240, workers=4, standin=None):
+    """
+    Bake the same synthetic rig serially and in parallel with the stand-in
+    maya.cmds and check that every key matches exactly; returns True if so.
+    Pass the stand-in already installed as maya.cmds to reuse it.
+    """
+    import standin_cmds
+    standin = standin or standin_cmds.install()
+    import switch_core
+    
+    def bake(parallel_workers):
+        standin.new_scene()
+        standin_cmds.add_rig(standin, 'Custom', 'char')
+        for n, ctrl in enumerate(['char:shoulder_r_FK_ctrl', 'char:elbow_r_FK_ctrl', 'char:wrist_r_FK_ctrl']):
+            for frame, value in ((1, 0.0), (frames // 2, 40.0 + 10 * n), (frames, -200.0 - 30 * n)):
+                standin.setKeyframe(ctrl, attribute='rotateY' if n != 1 else 'rotateZ', time=[frame], value=value)
+        
+        core = switch_core.SwitchCore('Custom', 'char')
+        core.autokey = True
+        core.parallel_workers = parallel_workers
+        core.PARALLEL_MIN_FRAMES = 1
+        # Three windows, so the workers sample more than one window each
+        core.MIN_WINDOW_FRAMES = -(-frames // 3)
+        core.memory_limit_mb = 0
+        switches, _ = core.plan_switches(['right_arm'], 'ik')
+        stats = core.perform_switches(switches, 1, frames)
+        keys = {plug: dict(curve['keys']) for plug, curve in standin.curves.items()}
+        return keys, stats
+    
+    serial, serial_stats = bake(0)
+    parallel, parallel_stats = bake(workers)
+    mismatches = [plug for plug in serial if serial[plug] != parallel.get(plug)]
+    mismatches += [plug for plug in parallel if plug not in serial]
+    
+    print(f"serial: {serial_stats['method']} {serial_stats['seconds']:.2f}s, "
+          f"parallel: {parallel_stats['method']} {parallel_stats['seconds']:.2f}s with {workers} workers")
+    if parallel_stats['method'] != 'parallel':
+        print("Parallel bake did not run")
+        return False
+    if mismatches:
+        print(f"{len(mismatches)} curves differ: {', '.join(sorted(mismatches)[:5])}")
+        return False
+    print(f"{len(serial)} curves identical")
+    return True
+
+
+def main(argv=None):
+    """Command line entry point"""
+    args = build_parser().parse_args(argv)
+    if args.worker:
+        worker_main(args.standin)
+        return 0
+    if args.verify_parallel:
+        return 0 if verify_parallel_bake() else 1
+    if not args.scenes:
+        build_parser().error("no scene files given")
+    
+    summary = run_batch(args)
+    with open(args.summary, 'w') as f:
+        json.dump(summary, f, indent=2)
+    
+    print(f"{summary['ok']} switched, {summary['skipped']} skipped, {summary['errors']} failed "
+          f"in {summary['seconds']:.1f}s with {summary['workers']} workers - summary: {args.summary}")
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
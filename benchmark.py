@@ -0,0 +1,484 @@
+"""
+Benchmark harness for the GT Custom Rig Interface
+Runs the switcher's scene-facing code paths (rig detection, button state
+refresh, hotkey switching, baking) against the stand-in maya.cmds for
+several scene sizes, recording wall time and the number of commands
+issued. A code path that issues more commands than its budget fails the
+run, which catches regressions such as per-frame attribute probing
+without Maya.
+
+    python benchmark.py
+    python benchmark.py --scenarios medium --latency 0.00005 --json bench.json
+
+Further checks time the reduction of a long baked curve, match a
+straight-then-bent arm against a cold chain cache, compare a serial and
+a parallel bake key for key, and bake a STREAM_FRAMES take under a small
+memory ceiling, failing if the bake's peak allocation goes over it
+(--skip-stream skips that one).
+
+The startup and reopen paths build the real dialog against the stand-in
+Qt modules in standin_ui.py and count the scene commands it issues before
+show(). In a Maya session, benchmark.main(['--time-to-window']) also times
+it from show() to its first paint against TIME_TO_WINDOW_TARGET.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+
+# Scene sizes: characters (namespaces) of the rig, unrelated transforms,
+# the bake range, a key every key_step frames on every control, and how
+# many characters are baked (sampling cost grows with characters x frames)
+SCENARIOS = {
+    'small': {'characters': 1, 'filler_nodes': 200, 'frames': 100, 'key_step': 10, 'bake_characters': 1},
+    'medium': {'characters': 10, 'filler_nodes': 5000, 'frames': 500, 'key_step': 5, 'bake_characters': 2},
+    'large': {'characters': 40, 'filler_nodes': 20000, 'frames': 1000, 'key_step': 2, 'bake_characters': 2},
+}
+RIG_TYPE = 'Custom'
+
+# Matrix plugs sampled per limb and frame (worldMatrix + parentMatrix of three FK
+# controls, and one matrix of each IK control)
+PLUGS_PER_LIMB = 8
+
+# Pose channels per limb (three FK and two IK controls x six channels, plus the switch)
+POSE_CHANNELS_PER_LIMB = 31
+
+# Frames edited before the incremental re-bake, and the most frames it may re-match for them
+EDITED_FRAMES = 5
+REBAKE_FRAMES = 40
+
+# Extra studio rig variants registered for the detect_many_presets path
+EXTRA_PRESETS = 50
+
+# Baked curve reduction: keys in the benchmark curve and the longest acceptable time for it
+REDUCTION_KEYS = 5000
+REDUCTION_TARGET = 0.05
+
+# Streaming bake: frames in a synthetic long take and the memory ceiling its bake must stay under
+STREAM_FRAMES = 100000
+STREAM_MEMORY_MB = 64
+
+# Longest acceptable time from show() to a painted window, in seconds
+TIME_TO_WINDOW_TARGET = 0.3
+
+# Longest acceptable warm hotkey switch of one character's selected limbs, in seconds
+HOTKEY_TARGET = 0.02
+
+# Command budgets per code path; sampling is the only per-frame cost allowed.
+# Startup is what the dialog asks of the scene before its window appears, and
+# reopen the same on a shot whose detection is remembered on disk (which
+# resolves the limbs for their buttons, but never searches the scene). A warm
+# hotkey switch samples, reads and sets each limb and resolves nothing.
+BUDGETS = {
+    'startup': lambda scenario, limbs: 2,
+    'reopen': lambda scenario, limbs: 20 * limbs + 5,
+    'detect': lambda scenario, limbs: 5,
+    'detect_many_presets': lambda scenario, limbs: 5,
+    'button_states_cold': lambda scenario, limbs: 20 * limbs,
+    'button_states_warm': lambda scenario, limbs: limbs,
+    'hotkey_cold': lambda scenario, limbs: limbs * (PLUGS_PER_LIMB + 60) + 10,
+    'hotkey_warm': lambda scenario, limbs: limbs * (PLUGS_PER_LIMB + 12) + 10,
+    'pose_apply': lambda scenario, limbs: scenario['characters'] * limbs * (POSE_CHANNELS_PER_LIMB + 20) + 10,
+    'rebake': lambda scenario, limbs: limbs * (PLUGS_PER_LIMB * REBAKE_FRAMES + 400) + 10,
+    'bake': lambda scenario, limbs: (scenario['bake_characters'] * limbs
+                                     * (PLUGS_PER_LIMB * scenario['frames'] + 80) + 10),
+}
+
+
+class CommandCounter(object):
+    """Wraps a stand-in maya.cmds, counting every command and adding a fixed latency to each"""
+    
+    def __init__(self, target, latency=0.0):
+        self.target = target
+        self.latency = latency
+        self.counts = {}
+    
+    def __getattr__(self, name):
+        attr = getattr(self.target, name)
+        if not callable(attr):
+            return attr
+        
+        def command(*args, **kwargs):
+            self.counts[name] = self.counts.get(name, 0) + 1
+            if self.latency:
+                time.sleep(self.latency)
+            return attr(*args, **kwargs)
+        return command
+    
+    def reset(self):
+        """Forget the counts"""
+        self.counts = {}
+    
+    def total(self):
+        """Return the number of commands issued since the last reset"""
+        return sum(self.counts.values())
+
+
+def build_scene(standin, scenario):
+    """Fill the stand-in scene for a scenario"""
+    import standin_cmds
+    
+    standin.new_scene()
+    standin.min_time, standin.max_time = 1.0, float(scenario['frames'])
+    for i in range(scenario['filler_nodes']):
+        standin.add_transform(f"prop{i // 100}:set_dressing_{i}")
+    
+    namespaces = [f"char{i:02d}" for i in range(scenario['characters'])]
+    controls = []
+    for namespace in namespaces:
+        standin_cmds.add_rig(standin, RIG_TYPE, namespace)
+        controls += [name for name in standin.nodes
+                     if name.startswith(namespace + ':') and name.endswith('_ctrl')]
+    
+    # Animate every control channel the switch reads or writes
+    for ctrl in controls:
+        for attr in ('rotateX', 'rotateY', 'rotateZ', 'translateX', 'translateY', 'translateZ'):
+            curve = standin.get_curve(ctrl, attr, create=True)
+            base = standin.nodes[ctrl]['attrs'][attr]
+            for frame in range(1, scenario['frames'] + 1, scenario['key_step']):
+                curve['keys'][float(frame)] = base + (frame % 7) * 0.5
+    standin.invalidate()
+    return namespaces
+
+
+def write_preset_variants(folder, count):
+    """Write `count` renamed copies of the benchmark rig's preset, as a studio would add rig variants"""
+    from switch_core import RIG_PRESETS
+    
+    variants = {}
+    for i in range(count):
+        variants[f"Variant {i:02d}"] = {
+            limb: {
+                'fk': [f"v{i:02d}_{ctrl}" for ctrl in limb_data['fk']],
+                'ik': [f"v{i:02d}_{ctrl}" for ctrl in limb_data['ik']],
+                'switch': f"v{i:02d}_{limb_data['switch']}",
+                'switch_attr': limb_data.get('switch_attr'),
+            } for limb, limb_data in RIG_PRESETS[RIG_TYPE].items()}
+    with open(os.path.join(folder, 'variants.json'), 'w') as f:
+        json.dump(variants, f)
+
+
+def measure(counter, name, scenario, limbs, function, target=None):
+    """Run one code path and return its timing, command counts and budget (and time target) check"""
+    counter.reset()
+    timer = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - timer
+    budget = BUDGETS[name](scenario, limbs)
+    return {
+        'path': name,
+        'seconds': seconds,
+        'commands': counter.total(),
+        'budget': budget,
+        'target': target,
+        'ok': counter.total() <= budget and (target is None or seconds <= target),
+        'by_command': dict(sorted(counter.counts.items(), key=lambda item: -item[1])),
+    }
+
+
+def run_scenario(counter, standin, name, scenario):
+    """Benchmark every code path on one scenario"""
+    import hotkey_switch
+    import pose_library
+    import standin_ui
+    from control_cache import ResolvedControlCache
+    from preset_registry import get_registry
+    from scene_index import get_scene_index
+    from detection_cache import get_detection_cache
+    from switch_core import SwitchCore
+    
+    namespaces = build_scene(standin, scenario)
+    standin.scene_name = f"/shots/{name}.ma"
+    switcher = standin_ui.import_switcher()
+    core = SwitchCore(control_cache=ResolvedControlCache(watch_scene=False))
+    results = []
+    
+    def startup():
+        # The dialog built on a shot it has not seen: detection waits until the window is up
+        get_scene_index().reset()
+        switcher.GTCustomRigInterface()
+        if get_scene_index().built:
+            raise RuntimeError("The dialog searched the scene before its window appeared")
+    
+    def detect():
+        # Detection on a freshly opened scene: the index is built from scratch
+        get_scene_index().reset()
+        rig_type, found = core.detect_rig()
+        core.set_rig(rig_type, found[0])
+    
+    def reopen():
+        # The dialog opened in a new session on the same shot: the detection cache is read back from disk
+        get_detection_cache().entries = None
+        get_scene_index().reset()
+        dialog = switcher.GTCustomRigInterface()
+        if (dialog.core.rig_type, dialog.namespace) != (RIG_TYPE, namespaces[0]):
+            raise RuntimeError("The remembered detection was not used")
+        if get_scene_index().built:
+            raise RuntimeError("The dialog searched the scene on a shot whose detection is remembered")
+    
+    def button_states():
+        # What the dialog's update_all_button_states asks of the scene
+        for limb in core.limb_controls:
+            core.detect_current_mode(limb)
+    
+    def pose_apply():
+        # A captured pose applied to every limb of every character, as one undo step
+        library = pose_library.PoseLibrary(RIG_TYPE, core.limb_controls, folder)
+        row = pose_library.capture_pose(core, namespaces[0], library.layout)
+        counter.reset()
+        pose_library.apply_pose(core, row, library.layout, namespaces, list(core.limb_controls))
+    
+    def hotkey():
+        # One control of every limb of the last character selected, then the hotkey pressed
+        standin.select([f"{namespaces[-1]}:{limb_data['fk'][0]}" for limb_data in core.limb_controls.values()])
+        if len(hotkey_switch.switch_selected()) != len(core.limb_controls):
+            raise RuntimeError("The hotkey did not switch every selected limb")
+    
+    def prepare_rebake():
+        # Bake the first (already baked to IK) character back to FK, then edit its FK animation on a few frames
+        core.incremental = True
+        character_limbs = [(namespaces[0], limb) for limb in core.limb_controls]
+        switches, _ = core.plan_character_switches(character_limbs, 'fk')
+        core.perform_character_switches(switches, 1, scenario['frames'])
+        
+        middle = scenario['frames'] // 2
+        for limb, limb_data in core.limb_controls.items():
+            for ctrl in limb_data['fk']:
+                curve = standin.get_curve(f"{namespaces[0]}:{ctrl}", 'rotateX', create=True)
+                for frame in range(middle, middle + EDITED_FRAMES):
+                    curve['keys'][float(frame)] = curve['keys'].get(float(frame), 0.0) + 5.0
+        standin.invalidate()
+        return character_limbs
+    
+    def rebake():
+        switches, _ = core.plan_character_switches(rebake_limbs, 'ik')
+        stats = core.perform_character_switches(switches, 1, scenario['frames'])
+        core.incremental = False
+        return stats
+    
+    def bake():
+        core.autokey = True
+        character_limbs = [(namespace, limb) for namespace in namespaces[:scenario['bake_characters']]
+                           for limb in core.limb_controls]
+        switches, _ = core.plan_character_switches(character_limbs, 'ik')
+        core.perform_character_switches(switches, 1, scenario['frames'])
+    
+    results.append(measure(counter, 'startup', scenario, 0, startup))
+    results.append(measure(counter, 'detect', scenario, 0, detect))
+    limbs = len(core.limb_controls)
+    results.append(measure(counter, 'reopen', scenario, limbs, reopen))
+    
+    # The same detection with many more presets registered must cost the same
+    registry = get_registry()
+    with tempfile.TemporaryDirectory(prefix='gtPresets') as folder:
+        write_preset_variants(folder, EXTRA_PRESETS)
+        registry.folders = registry.get_folders() + [folder]
+        registry.refresh()
+        try:
+            results.append(measure(counter, 'detect_many_presets', scenario, 0, detect))
+        finally:
+            registry.folders = None
+            registry.refresh()
+    results.append(measure(counter, 'button_states_cold', scenario, limbs, button_states))
+    results.append(measure(counter, 'button_states_warm', scenario, limbs, button_states))
+    
+    # A new scene for the hotkey's warm caches; the first presses each way resolve, later ones are the hot path
+    hotkey_switch.forget_scene()
+    results.append(measure(counter, 'hotkey_cold', scenario, limbs, hotkey))
+    hotkey()
+    results.append(measure(counter, 'hotkey_warm', scenario, limbs, hotkey, HOTKEY_TARGET))
+    # Back to FK; on the small scene the last character is also the first one baked
+    hotkey()
+    with tempfile.TemporaryDirectory(prefix='gtPoses') as folder:
+        results.append(measure(counter, 'pose_apply', scenario, limbs, pose_apply))
+    results.append(measure(counter, 'bake', scenario, limbs, bake))
+    rebake_limbs = prepare_rebake()
+    results.append(measure(counter, 'rebake', scenario, limbs, rebake))
+    
+    for result in results:
+        result['scenario'] = name
+    return results
+
+
+def measure_time_to_window():
+    """Time the real dialog from show() to its first paint; needs Maya's UI"""
+    from PySide2 import QtWidgets
+    import switcher
+    
+    timer = time.perf_counter()
+    switcher.show()
+    QtWidgets.QApplication.processEvents()
+    seconds = time.perf_counter() - timer
+    switcher.gt_rig_interface.close()
+    
+    ok = seconds <= TIME_TO_WINDOW_TARGET
+    print(f"time to window: {seconds * 1000:.0f} ms (target {TIME_TO_WINDOW_TARGET * 1000:.0f} ms)"
+          + ("" if ok else "  OVER TARGET"))
+    return {'path': 'time_to_window', 'seconds': seconds, 'target': TIME_TO_WINDOW_TARGET, 'ok': ok}
+
+
+def measure_reduction():
+    """Time the reduction of one long, noisy baked curve against REDUCTION_TARGET"""
+    import numpy as np
+    from curve_reduction import DEFAULT_TOLERANCES, reduce_curve
+    
+    times = np.arange(1.0, REDUCTION_KEYS + 1)
+    values = 40.0 * np.sin(times / 150.0) + np.random.RandomState(0).normal(0.0, 0.002, len(times))
+    timer = time.perf_counter()
+    keep, deviation = reduce_curve(times, values, DEFAULT_TOLERANCES['rotate'])
+    seconds = time.perf_counter() - timer
+    
+    ok = seconds <= REDUCTION_TARGET
+    print(f"reduce {REDUCTION_KEYS} keys: {seconds * 1000:.1f} ms (target {REDUCTION_TARGET * 1000:.0f} ms), "
+          f"{len(times) - int(keep.sum())} removed, max deviation {deviation:.4f}" + ("" if ok else "  OVER TARGET"))
+    return {'path': 'reduce_curve', 'seconds': seconds, 'target': REDUCTION_TARGET, 'ok': ok}
+
+
+def measure_chain_cache(standin):
+    """
+    Match an arm from a straight FK pose, then from a bent one, with one
+    warm chain cache, and check the second match against a cold cache. A
+    straight chain has no bend plane, so its measurement must not be kept.
+    """
+    import numpy as np
+    import standin_cmds
+    from control_cache import ResolvedControlCache
+    from switch_core import SwitchCore
+    
+    def bent_match(warm):
+        standin.new_scene()
+        standin_cmds.add_rig(standin, RIG_TYPE, 'char', arm_bend=0.0)
+        first = SwitchCore(RIG_TYPE, 'char', control_cache=ResolvedControlCache(watch_scene=False))
+        limb = sorted(first.limb_controls)[0]
+        fk = [f"char:{ctrl}" for ctrl in first.limb_controls[limb]['fk']]
+        first.perform_character_switches([('char', limb, 'fk', 'ik')])
+        
+        # The animator bends the FK arm and moves the IK control, then matches back to FK
+        standin.setAttr(f"{fk[1]}.rotateZ", -60.0)
+        standin.setAttr(f"char:{first.limb_controls[limb]['ik'][0]}.translateX", 15.0)
+        core = first if warm else SwitchCore(RIG_TYPE, 'char',
+                                             control_cache=ResolvedControlCache(watch_scene=False))
+        core.perform_character_switches([('char', limb, 'ik', 'fk')])
+        return np.array([standin.getAttr(f"{ctrl}.rotate{axis}") for ctrl in fk for axis in 'XYZ'])
+    
+    timer = time.perf_counter()
+    error = float(np.abs(bent_match(True) - bent_match(False)).max())
+    seconds = time.perf_counter() - timer
+    
+    ok = error < 1e-6
+    print(f"straight then bent match: {error:.2g} degrees from a cold cache" + ("" if ok else "  MISMATCH"))
+    return {'path': 'chain_cache', 'seconds': seconds, 'max_error': error, 'ok': ok}
+
+
+def measure_parallel_bake(standin):
+    """Bake one rig serially and across worker processes and check every key matches"""
+    import batch_switch
+    
+    timer = time.perf_counter()
+    ok = batch_switch.verify_parallel_bake(standin=standin)
+    return {'path': 'parallel_bake', 'seconds': time.perf_counter() - timer, 'ok': ok}
+
+
+def measure_streaming(standin):
+    """
+    Bake one limb over STREAM_FRAMES frames under a STREAM_MEMORY_MB ceiling
+    and check the bake's peak allocation against it. The target channels are
+    keyed on every frame beforehand, so the scene itself does not grow while
+    it is measured.
+    """
+    import tracemalloc
+    from switch_core import SwitchCore
+    
+    scenario = {'characters': 1, 'filler_nodes': 0, 'frames': STREAM_FRAMES, 'key_step': 100}
+    namespace = build_scene(standin, scenario)[0]
+    core = SwitchCore(RIG_TYPE, namespace)
+    core.autokey = True
+    core.memory_limit_mb = STREAM_MEMORY_MB
+    limb = sorted(core.limb_controls)[0]
+    switches, _ = core.plan_character_switches([(namespace, limb)], 'ik')
+    
+    # Traced from before the target keys are made, so replacing their values is not counted as growth
+    tracemalloc.start()
+    job = core.make_switch_job(limb, 'fk', 'ik')
+    frames = [float(frame) for frame in range(1, STREAM_FRAMES + 1)]
+    for node, attr in sorted(job['channels']) + [(job['switch_ctrl'], job['switch_attr'])]:
+        curve = standin.get_curve(node, attr, create=True)
+        base = standin.nodes[node]['attrs'][attr]
+        curve['keys'] = {frame: base + (frame % 7) * 0.5 for frame in frames}
+    standin.invalidate()
+    
+    baseline = tracemalloc.get_traced_memory()[0]
+    timer = time.perf_counter()
+    stats = core.perform_character_switches(switches, 1, STREAM_FRAMES)
+    seconds = time.perf_counter() - timer
+    peak = (tracemalloc.get_traced_memory()[1] - baseline) / 2 ** 20
+    tracemalloc.stop()
+    
+    ok = peak <= STREAM_MEMORY_MB and stats['frames'] == STREAM_FRAMES
+    print(f"stream {STREAM_FRAMES} frames: {seconds:.1f}s, peak {peak:.1f} MB "
+          f"(ceiling {STREAM_MEMORY_MB} MB, {core.get_window_frames([job])} frame windows)"
+          + ("" if ok else "  OVER CEILING"))
+    return {'path': 'stream_bake', 'seconds': seconds, 'peak_mb': peak, 'target': STREAM_MEMORY_MB, 'ok': ok}
+
+
+def print_results(results, latency):
+    """Print a results table"""
+    print(f"{'scenario':<8} {'path':<20} {'seconds':>9} {'commands':>9} {'budget':>9}  top commands")
+    for result in results:
+        top = ", ".join(f"{name} {count}" for name, count in list(result['by_command'].items())[:3])
+        flag = "" if result['ok'] else "  OVER TARGET" if result['commands'] <= result['budget'] else "  OVER BUDGET"
+        print(f"{result['scenario']:<8} {result['path']:<20} {result['seconds']:>9.3f} "
+              f"{result['commands']:>9} {result['budget']:>9}  {top}{flag}")
+    if latency:
+        print(f"(with {latency * 1e6:.0f}us simulated latency per command)")
+
+
+def main(argv=None):
+    """Run the benchmarks; returns 1 if any code path is over its command budget"""
+    parser = argparse.ArgumentParser(description="Benchmark the switcher against the stand-in maya.cmds")
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--latency', type=float, default=0.0, help="Simulated seconds per command")
+    parser.add_argument('--json', help="Write the results to a JSON file")
+    parser.add_argument('--skip-stream', action='store_true',
+                        help=f"Skip the {STREAM_FRAMES}-frame streaming bake (the slowest check)")
+    parser.add_argument('--time-to-window', action='store_true',
+                        help="Time the real dialog's startup (run inside Maya; uses the open scene)")
+    args = parser.parse_args(argv)
+    
+    if args.time_to_window:
+        return 0 if measure_time_to_window()['ok'] else 1
+    
+    # Presets, poses and remembered detections are per-user files; keep the user's out of it
+    app_dir = tempfile.TemporaryDirectory(prefix='gtBenchmark')
+    os.environ['MAYA_APP_DIR'] = app_dir.name
+    
+    # The counter must be maya.cmds before any switcher module is imported
+    import standin_cmds
+    standin = standin_cmds.StandInCmds()
+    counter = CommandCounter(standin, args.latency)
+    standin_cmds.install(counter)
+    
+    results = []
+    for name in args.scenarios:
+        results += run_scenario(counter, standin, name, SCENARIOS[name])
+    
+    print_results(results, args.latency)
+    checks = [measure_reduction(), measure_chain_cache(standin), measure_parallel_bake(standin)]
+    if not args.skip_stream:
+        checks.append(measure_streaming(standin))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'latency': args.latency, 'results': results, 'checks': checks}, f, indent=2)
+    
+    over = [result for result in results + checks if not result['ok']]
+    if over:
+        print(f"{len(over)} code paths over their command budget")
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Chain geometry cache for the GT Custom Rig Interface
+Bone lengths, control-to-bone offsets and the offsets between FK controls
+are fixed by the rig, so they are measured once per character and limb
+and kept in one structured NumPy array. Every later match on that
+character reuses them instead of recovering them from each frame. A
+measurement from a (nearly) straight chain has no bend plane to give the
+controls' roll, so it is used once and not kept.
+Entries are keyed by namespace and dropped when the character's reference
+is loaded, unloaded or replaced, or when another scene is opened.
+"""
+
+import numpy as np
+
+import ikfk_solver
+
+try:
+    import maya.api.OpenMaya as om
+except ImportError:
+    # The stand-in maya.cmds (standin_cmds.py) has no API; nothing is watched
+    om = None
+
+
+# One row per (namespace, rig type, limb)
+GEOMETRY_DTYPE = np.dtype([
+    ('lengths', np.float64, (2,)),
+    ('chain_offsets', np.float64, (2, 4, 4)),
+    ('between', np.float64, (2, 4, 4)),
+    ('bend', np.float64),
+])
+
+# Scene events after which measured geometry may no longer match the rig
+REFERENCE_MESSAGES = ('kAfterLoadReference', 'kAfterUnloadReference', 'kAfterReplaceReference',
+                      'kAfterRemoveReference')
+SCENE_MESSAGES = ('kAfterOpen', 'kAfterNew')
+
+
+class ChainGeometryCache(object):
+    """Measured FK chain geometry per character, in one structured array"""
+    
+    def __init__(self, watch_scene=True):
+        self.records = np.zeros(0, dtype=GEOMETRY_DTYPE)
+        self.rows = {}
+        self.callback_ids = []
+        
+        # Batch jobs own the scene, so they can skip the reference callbacks
+        self.watch_scene = watch_scene and om is not None
+        if self.watch_scene:
+            self.watch()
+    
+    def get(self, namespace, rig_type, limb):
+        """Return the measured geometry of a limb as a record, or None"""
+        row = self.rows.get((namespace, rig_type, limb))
+        if row is None:
+            return None
+        return self.records[row]
+    
+    def measure(self, namespace, rig_type, limb, fk_world, fk_parent):
+        """Measure a limb's geometry from sampled FK matrices, keeping it if the chain bends"""
+        record = np.zeros(1, dtype=GEOMETRY_DTYPE)
+        record['lengths'][0], record['chain_offsets'][0], record['between'][0] = ikfk_solver.measure_chain(
+            fk_world, fk_parent)
+        record['bend'][0] = ikfk_solver.chain_bend(fk_world).max()
+        if record['bend'][0] < ikfk_solver.MIN_BEND:
+            # Measured against the fallback bend plane; a later, bent sample measures it properly
+            return record[0]
+        
+        key = (namespace, rig_type, limb)
+        row = self.rows.get(key)
+        if row is None:
+            self.rows[key] = len(self.records)
+            self.records = np.concatenate([self.records, record])
+        else:
+            self.records[row] = record[0]
+        return self.records[self.rows[key]]
+    
+    def get_or_measure(self, namespace, rig_type, limb, fk_world, fk_parent):
+        """Return the cached geometry of a limb, measuring it until a bent pose is sampled"""
+        record = self.get(namespace, rig_type, limb)
+        if record is None:
+            record = self.measure(namespace, rig_type, limb, fk_world, fk_parent)
+        return record
+    
+    def invalidate(self, namespace=None):
+        """Forget one character's geometry (every character's when namespace is None)"""
+        keep = [key for key in self.rows if namespace is not None and key[0] != namespace]
+        self.records = self.records[[self.rows[key] for key in keep]]
+        self.rows = {key: row for row, key in enumerate(keep)}
+    
+    def watch(self):
+        """Drop measurements when a reference or the whole scene changes"""
+        for message in REFERENCE_MESSAGES:
+            self.callback_ids.append(om.MSceneMessage.addReferenceCallback(
+                getattr(om.MSceneMessage, message), self.on_reference_changed))
+        for message in SCENE_MESSAGES:
+            self.callback_ids.append(om.MSceneMessage.addCallback(
+                getattr(om.MSceneMessage, message), lambda *args: self.invalidate()))
+    
+    def on_reference_changed(self, reference_node, reference_file, client_data=None):
+        """Forget the geometry of the characters in a changed reference"""
+        try:
+            namespace = om.MFnReference(reference_node).associatedNamespace(True)
+        except RuntimeError:
+            namespace = None
+        self.invalidate(namespace.lstrip(':') if namespace else None)
+    
+    def clear(self):
+        """Forget everything and remove the scene callbacks"""
+        self.invalidate()
+        if self.callback_ids:
+            om.MMessage.removeCallbacks(self.callback_ids)
+        self.callback_ids = []
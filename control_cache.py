@@ -0,0 +1,167 @@
+"""
+Resolved control cache for the GT Custom Rig Interface
+Resolves a limb's namespaced controls and switch attribute once per
+(rig type, namespace, limb) and drops the entry when one of its nodes is
+renamed or deleted, or one of their channels is locked, unlocked or
+connected, so hot loops never repeat name or channel lookups.
+"""
+
+import maya.cmds as cmds
+
+try:
+    import maya.api.OpenMaya as om
+except ImportError:
+    # The stand-in maya.cmds (standin_cmds.py) has no API; nothing is watched
+    om = None
+
+
+# Fallback switch attributes, tried in order when the preset's attribute is missing
+SWITCH_ATTRS = ['blend', 'ikFkBlend', 'ikBlend', 'ikFk', 'fkIk', 'IK_FK']
+
+# Attribute changes that can make a cached channel writable or not
+CHANNEL_STATE_MESSAGES = ('kAttributeLocked', 'kAttributeUnlocked')
+CHANNEL_CONNECTION_MESSAGES = ('kConnectionMade', 'kConnectionBroken')
+
+
+def namespaced(control, namespace):
+    """Return a control name with the namespace prepended"""
+    if namespace:
+        return f"{namespace}:{control}"
+    return control
+
+
+def find_switch_attr(node, preferred=None, candidates=None):
+    """Return the first existing switch attribute on a node, or None"""
+    if candidates is None:
+        candidates = ([preferred] if preferred else []) + [attr for attr in SWITCH_ATTRS if attr != preferred]
+    for attr in candidates:
+        if cmds.attributeQuery(attr, node=node, exists=True):
+            return attr
+    return None
+
+
+class ResolvedControlCache(object):
+    """Cache of resolved switch node, attribute and control handles per limb"""
+    
+    def __init__(self, watch_scene=True):
+        self.entries = {}
+        self.callbacks = {}
+        self.stale_callback_ids = []
+        
+        # Switch attributes found in an earlier session, tried first (see detection_cache.py)
+        self.known_switch_attrs = {}
+        
+        # Batch jobs own the scene, so they can skip the rename/delete callbacks
+        self.watch_scene = watch_scene and om is not None
+    
+    def get(self, rig_type, namespace, limb, limb_data):
+        """Return the resolved entry for a limb, resolving it on first use"""
+        key = (rig_type, namespace, limb)
+        entry = self.entries.get(key)
+        if entry is not None:
+            return entry
+        
+        self.remove_stale_callbacks()
+        if not limb_data:
+            return None
+        
+        entry = self.resolve(namespace, limb_data, self.known_switch_attrs.get(key))
+        if entry is None:
+            # Missing rigs are not cached; the controls may be imported later
+            return None
+        
+        self.entries[key] = entry
+        self.callbacks[key] = self.watch(key, entry['handles'])
+        return entry
+    
+    def resolve(self, namespace, limb_data, known_attr=None):
+        """Look up a limb's nodes and static data in the scene"""
+        switch_ctrl = namespaced(limb_data['switch'], namespace)
+        if not cmds.objExists(switch_ctrl):
+            return None
+        
+        candidates = limb_data.get('switch_attrs')
+        if known_attr and candidates:
+            candidates = [known_attr] + [attr for attr in candidates if attr != known_attr]
+        
+        fk = [namespaced(ctrl, namespace) for ctrl in limb_data['fk']]
+        ik = [namespaced(ctrl, namespace) for ctrl in limb_data['ik']]
+        controls = fk + ik
+        existing = [ctrl for ctrl in dict.fromkeys([switch_ctrl] + controls) if cmds.objExists(ctrl)]
+        
+        entry = {
+            'switch_ctrl': switch_ctrl,
+            'switch_attr': find_switch_attr(switch_ctrl, known_attr or limb_data.get('switch_attr'), candidates),
+            'fk': fk,
+            'ik': ik,
+            'match': len(fk) == 3 and len(ik) == 2 and all(ctrl in existing for ctrl in controls),
+            'rotate_orders': {},
+            'joint_orients': {},
+            'writable': {},
+            'handles': {},
+        }
+        
+        for ctrl in existing if self.watch_scene else []:
+            selection = om.MSelectionList()
+            selection.add(ctrl)
+            entry['handles'][ctrl] = om.MObjectHandle(selection.getDependNode(0))
+        
+        if entry['match']:
+            entry['rotate_orders'] = {ctrl: cmds.getAttr(f"{ctrl}.rotateOrder") for ctrl in controls}
+            for ctrl in fk:
+                if cmds.objectType(ctrl) == 'joint':
+                    entry['joint_orients'][ctrl] = list(cmds.getAttr(f"{ctrl}.jointOrient")[0])
+        
+        return entry
+    
+    def remember_switch_attrs(self, rig_type, switch_attrs):
+        """Try these {namespace: {limb: attr}} switch attributes first when a preset's limbs resolve"""
+        for namespace, attrs in switch_attrs.items():
+            for limb, attr in attrs.items():
+                self.known_switch_attrs[(rig_type, namespace, limb)] = attr
+    
+    def switch_attrs(self, rig_type):
+        """Return {namespace: {limb: attr}} for the resolved limbs of a preset that have a switch"""
+        attrs = {}
+        for (entry_type, namespace, limb), entry in self.entries.items():
+            if entry_type == rig_type and entry['switch_attr']:
+                attrs.setdefault(namespace, {})[limb] = entry['switch_attr']
+        return attrs
+    
+    def watch(self, key, handles):
+        """Invalidate an entry when any of its nodes is renamed or deleted, or a channel's state changes"""
+        callback_ids = []
+        for handle in handles.values():
+            node = handle.object()
+            callback_ids.append(om.MNodeMessage.addNameChangedCallback(
+                node, lambda *args: self.invalidate(key)))
+            callback_ids.append(om.MNodeMessage.addNodePreRemovalCallback(
+                node, lambda *args: self.invalidate(key)))
+            callback_ids.append(om.MNodeMessage.addAttributeChangedCallback(
+                node, lambda message, *args: self.on_attribute_changed(key, message)))
+        return callback_ids
+    
+    def on_attribute_changed(self, key, message):
+        """Invalidate an entry when one of its channels is locked, unlocked, or its input is (dis)connected"""
+        state = any(message & getattr(om.MNodeMessage, name) for name in CHANNEL_STATE_MESSAGES)
+        incoming = (message & om.MNodeMessage.kIncomingDirection
+                    and any(message & getattr(om.MNodeMessage, name) for name in CHANNEL_CONNECTION_MESSAGES))
+        if state or incoming:
+            self.invalidate(key)
+    
+    def invalidate(self, key):
+        """Drop one entry; its callbacks are removed outside the callback that fired"""
+        self.entries.pop(key, None)
+        self.stale_callback_ids += self.callbacks.pop(key, [])
+    
+    def remove_stale_callbacks(self):
+        """Remove callbacks of invalidated entries"""
+        if self.stale_callback_ids and self.watch_scene:
+            om.MMessage.removeCallbacks(self.stale_callback_ids)
+        self.stale_callback_ids = []
+    
+    def clear(self):
+        """Drop every entry and remove all callbacks"""
+        for key in list(self.entries):
+            self.invalidate(key)
+        self.remove_stale_callbacks()
@@ -0,0 +1,56 @@
+"""
+Baked curve reduction for the GT Custom Rig Interface
+Removes keys that linear interpolation between their neighbours
+reproduces within a tolerance. The error check is vectorized over the
+whole curve: every pass measures all keys against the segments kept so
+far and splits every segment that is still off at its worst key, so a
+5,000 key curve takes a few passes of array math rather than a loop over
+keys. Pure NumPy, no Maya imports.
+"""
+
+import numpy as np
+
+
+# Default tolerances per channel kind: degrees for rotation, scene units for translation.
+# Other channels (the switch attribute) only lose keys that change nothing.
+DEFAULT_TOLERANCES = {'rotate': 0.01, 'translate': 0.001}
+
+
+def channel_kind(attr):
+    """Return 'rotate', 'translate' or None for an attribute name"""
+    for kind in ('rotate', 'translate'):
+        if attr.startswith(kind):
+            return kind
+    return None
+
+
+def reduce_curve(times, values, tolerance=0.0):
+    """
+    Return (keep, deviation): a boolean mask of the keys to keep so that
+    linear interpolation between kept keys stays within `tolerance` of
+    every original key, and the largest deviation that remains.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) <= 2:
+        return np.ones(len(values), dtype=bool), 0.0
+
+    keep = np.zeros(len(values), dtype=bool)
+    keep[[0, -1]] = True
+
+    while True:
+        # Which kept segment every key falls in, and the value the segment interpolates there
+        kept = np.flatnonzero(keep)
+        segment = np.minimum(np.searchsorted(kept, np.arange(len(values)), side='right') - 1, len(kept) - 2)
+        first, last = kept[segment], kept[segment + 1]
+        weight = (times - times[first]) / (times[last] - times[first])
+        error = np.abs(values - (values[first] + (values[last] - values[first]) * weight))
+        error[keep] = 0.0
+
+        over = error > tolerance
+        if not over.any():
+            return keep, float(error.max())
+
+        # Split every segment that is still off at its worst key
+        worst = np.maximum.reduceat(error, kept[:-1])
+        keep |= over & (error == worst[segment])
@@ -0,0 +1,128 @@
+"""
+Detection cache for the GT Custom Rig Interface
+Remembers, per scene file, the detected rig preset, its namespaces and the
+switch attribute each limb resolved to, in a small JSON file beside the
+user's presets. An entry is keyed by the scene path and the path and
+modification time of every file the scene references, so reopening the
+tool on a known shot skips detection, while a reference that was added,
+removed, repathed or saved again throws the entry out.
+"""
+
+import json
+import os
+
+import maya.cmds as cmds
+
+
+# Scenes remembered; the least recently detected are dropped beyond this
+MAX_SCENES = 200
+
+
+def cache_path():
+    """Return the per-user detection cache file"""
+    maya_dir = os.environ.get('MAYA_APP_DIR') or os.path.join(os.path.expanduser('~'), 'maya')
+    return os.path.join(maya_dir, 'gt_detection_cache.json')
+
+
+def reference_stamps():
+    """Return [[path, mtime]] for every file the open scene references (one command)"""
+    stamps = []
+    for path in cmds.file(query=True, reference=True) or []:
+        # Repeated references of a file are listed as path{1}, path{2}...
+        path = path.split('{')[0]
+        try:
+            stamps.append([path, os.path.getmtime(path)])
+        except OSError:
+            stamps.append([path, None])
+    return sorted(stamps)
+
+
+class DetectionCache(object):
+    """Detected preset, namespaces and switch attributes per scene file"""
+    
+    def __init__(self, path=None):
+        self.path = path or cache_path()
+        self.entries = None
+    
+    def load(self):
+        """Read the cache file once; a missing or unreadable file is an empty cache"""
+        if self.entries is not None:
+            return
+        self.entries = {}
+        try:
+            with open(self.path) as f:
+                self.entries = json.load(f)['scenes']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+    
+    def save(self):
+        """Write the cache file; untitled scenes are only remembered for this session"""
+        scenes = {scene: entry for scene, entry in self.entries.items() if scene}
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(temp_path, 'w') as f:
+                json.dump({'scenes': scenes}, f)
+            os.replace(temp_path, self.path)
+        except OSError:
+            # A read-only home folder only costs the next session a scan
+            pass
+    
+    def get(self, scene):
+        """Return the entry for a scene if its references are unchanged, else None"""
+        self.load()
+        entry = self.entries.get(scene)
+        if entry is None:
+            return None
+        if entry['references'] != reference_stamps():
+            self.discard(scene)
+            return None
+        return entry
+    
+    def store(self, scene, rig_type, namespaces):
+        """Remember a detection for a scene, keeping switch attributes it already had"""
+        self.load()
+        previous = self.entries.pop(scene, None) or {}
+        self.entries[scene] = {
+            'references': reference_stamps(),
+            'rig_type': rig_type,
+            'namespaces': list(namespaces),
+            'switch_attrs': previous.get('switch_attrs', {}) if previous.get('rig_type') == rig_type else {},
+        }
+        for old_scene in list(self.entries)[:-MAX_SCENES]:
+            del self.entries[old_scene]
+        self.save()
+    
+    def update_switch_attrs(self, scene, rig_type, switch_attrs):
+        """Add {namespace: {limb: attr}} to a scene's entry; written only when something is new"""
+        self.load()
+        entry = self.entries.get(scene)
+        if entry is None or entry['rig_type'] != rig_type:
+            return
+        
+        changed = False
+        for namespace, attrs in switch_attrs.items():
+            known = entry['switch_attrs'].setdefault(namespace, {})
+            for limb, attr in attrs.items():
+                if known.get(limb) != attr:
+                    known[limb] = attr
+                    changed = True
+        if changed:
+            self.save()
+    
+    def discard(self, scene):
+        """Forget a scene"""
+        self.load()
+        if self.entries.pop(scene, None) is not None:
+            self.save()
+
+
+_detection_cache = None
+
+
+def get_detection_cache():
+    """Return the shared detection cache"""
+    global _detection_cache
+    if _detection_cache is None:
+        _detection_cache = DetectionCache()
+    return _detection_cache
@@ -0,0 +1,99 @@
+"""
+Hotkey switching for the GT Custom Rig Interface
+Switches the limbs owning the selected controls without opening the
+dialog: the selection is mapped to (namespace, limb) through the preset
+registry's reverse index of control names, so nothing in the scene is
+scanned, and the limbs are matched on the current frame as one undo step
+(keyed when Maya's auto key is on). The SwitchCore and its resolved
+control and chain geometry caches stay warm between calls, so a repeat
+switch only samples and sets the limbs' channels.
+
+Hotkey or shelf button (Python):
+
+    import hotkey_switch
+    hotkey_switch.switch_selected()         # toggle each selected limb
+    hotkey_switch.switch_selected('ik')     # or send them all to IK / FK
+"""
+
+import maya.cmds as cmds
+
+try:
+    import maya.api.OpenMaya as om
+except ImportError:
+    # The stand-in maya.cmds (standin_cmds.py) has no API; nothing is watched
+    om = None
+
+import profiler
+from preset_registry import get_registry
+from switch_core import SwitchCore
+
+
+# Scene events before which the warm caches are dropped
+SCENE_MESSAGES = ('kBeforeOpen', 'kBeforeNew')
+
+_core = None
+_callback_ids = []
+
+
+def get_core():
+    """Return the SwitchCore kept warm between hotkey calls"""
+    global _core
+    if _core is None:
+        _core = SwitchCore()
+        if om is not None:
+            for message in SCENE_MESSAGES:
+                _callback_ids.append(om.MSceneMessage.addCallback(
+                    getattr(om.MSceneMessage, message), lambda *args: forget_scene()))
+    return _core
+
+
+def forget_scene():
+    """Keep the resolved switch attributes for the next session, then drop the warm caches"""
+    if _core is not None:
+        _core.remember_switch_attrs()
+        _core.control_cache.clear()
+        _core.chain_cache.invalidate()
+
+
+def selected_limbs(nodes, preferred=None):
+    """
+    Return (rig_type, [(namespace, limb)]) for the limbs owning any of the
+    nodes, or (None, []); issues no scene commands. Where presets share
+    control names, the preferred preset wins, then registry load order.
+    """
+    registry = get_registry()
+    registry.refresh()
+    owners = [owner for node in nodes for owner in registry.owners(node)]
+    rig_types = {preset for preset, _, _ in owners}
+    if not rig_types:
+        return None, []
+    
+    rig_type = preferred if preferred in rig_types else next(preset for preset in registry.presets
+                                                            if preset in rig_types)
+    limbs = [(namespace, limb) for preset, limb, namespace in owners if preset == rig_type]
+    return rig_type, list(dict.fromkeys(limbs))
+
+
+def switch_selected(target_mode=None):
+    """
+    Switch the limbs owning the selected controls on the current frame:
+    each toggles, or all go to target_mode ('ik' or 'fk'). Returns the
+    [(namespace, limb, from_mode, to_mode)] switches performed.
+    """
+    with profiler.operation('hotkey'):
+        core = get_core()
+        rig_type, character_limbs = selected_limbs(cmds.ls(selection=True) or [], core.rig_type)
+        if not rig_type:
+            cmds.warning("Select a control on at least one limb")
+            return []
+        
+        if rig_type != core.rig_type:
+            core.set_rig(rig_type)
+        switches, missing = core.plan_character_switches(character_limbs, target_mode)
+        if missing:
+            cmds.warning("No switch attribute found for: "
+                         + ", ".join(f"{namespace}:{limb}" if namespace else limb for namespace, limb in missing))
+        if switches:
+            core.autokey = cmds.autoKeyframe(query=True, state=True)
+            core.perform_character_switches(switches)
+        return switches
@@ -0,0 +1,334 @@
+"""
+IK/FK pose matching math for the GT Custom Rig Interface
+Pure Python + NumPy, no Maya imports, so it can be tested and benchmarked anywhere.
+
+Conventions follow Maya: matrices are row-major 4x4 with row vectors
+(point @ matrix), translation in the last row and world = local @ parent.
+Every function works on whole frame ranges at once; the leading axis is frames.
+"""
+
+import numpy as np
+
+
+# Maya rotateOrder enum -> axis indices, in the order the rotations are applied
+ROTATE_ORDERS = {
+    0: (0, 1, 2),  # xyz
+    1: (1, 2, 0),  # yzx
+    2: (2, 0, 1),  # zxy
+    3: (0, 2, 1),  # xzy
+    4: (1, 0, 2),  # yxz
+    5: (2, 1, 0),  # zyx
+}
+
+EPSILON = 1e-8
+
+# Smallest chain bend (sine of the mid angle) that defines a bend plane to measure control offsets in
+MIN_BEND = 1e-3
+
+
+def as_matrices(values):
+    """Convert flat 16-float getAttr results into an (..., 4, 4) array"""
+    array = np.asarray(values, dtype=np.float64)
+    return array.reshape(array.shape[:-1] + (4, 4))
+
+
+def positions(matrices):
+    """Return the translation rows of (..., 4, 4) matrices"""
+    return matrices[..., 3, :3]
+
+
+def normalize(vectors):
+    """Normalize (..., 3) vectors, leaving zero-length vectors at zero"""
+    length = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, length, out=np.zeros_like(vectors), where=length > EPSILON)
+
+
+def fill_degenerate(vectors, valid, fallback=(0.0, 0.0, 1.0)):
+    """Replace invalid rows with the closest earlier valid row (or later, at the start)"""
+    if valid.all():
+        return vectors
+    if not valid.any():
+        return np.broadcast_to(np.asarray(fallback, dtype=np.float64), vectors.shape).copy()
+
+    frames = np.arange(len(valid))
+    forward = np.maximum.accumulate(np.where(valid, frames, -1))
+    first_valid = np.argmax(valid)
+    forward[forward < 0] = first_valid
+    return vectors[forward]
+
+
+def compose(rotation, translation):
+    """Build (F, 4, 4) matrices from (F, 3, 3) rotations and (F, 3) translations"""
+    matrices = np.zeros(rotation.shape[:-2] + (4, 4))
+    matrices[..., :3, :3] = rotation
+    matrices[..., 3, :3] = translation
+    matrices[..., 3, 3] = 1.0
+    return matrices
+
+
+def translation_matrices(translation):
+    """Build (F, 4, 4) pure translation matrices"""
+    rotation = np.broadcast_to(np.eye(3), translation.shape[:-1] + (3, 3))
+    return compose(rotation, translation)
+
+
+def aim_frames(origin, aim, normal):
+    """Build bone frames with X aimed from origin to aim and Z along the chain plane normal"""
+    x_axis = normalize(aim - origin)
+    y_axis = normalize(np.cross(normal, x_axis))
+    z_axis = np.cross(x_axis, y_axis)
+    rotation = np.stack([x_axis, y_axis, z_axis], axis=-2)
+    return compose(rotation, origin)
+
+
+def chain_normals(root, mid, end):
+    """Return the unit normal of the plane through each frame's three chain points"""
+    normal = np.cross(mid - root, end - root)
+    valid = np.linalg.norm(normal, axis=-1) > EPSILON
+    return fill_degenerate(normalize(normal), valid)
+
+
+def chain_frames(root, mid, end, normal=None):
+    """Return (upper, lower) bone frames for a three-joint chain"""
+    if normal is None:
+        normal = chain_normals(root, mid, end)
+    return aim_frames(root, mid, normal), aim_frames(mid, end, normal)
+
+
+def bone_lengths(root, mid, end):
+    """Return (upper, lower) bone lengths per frame"""
+    return np.linalg.norm(mid - root, axis=-1), np.linalg.norm(end - mid, axis=-1)
+
+
+def solve_two_bone(root, target, pole, upper_length, lower_length):
+    """
+    Solve a two-bone chain for every frame.
+    Returns (mid, end, normal): the elbow/knee position, the reachable end
+    position and the chain plane normal.
+    """
+    upper_length = np.asarray(upper_length, dtype=np.float64)
+    lower_length = np.asarray(lower_length, dtype=np.float64)
+
+    to_target = target - root
+    distance = np.linalg.norm(to_target, axis=-1)
+    direction = fill_degenerate(normalize(to_target), distance > EPSILON, fallback=(1.0, 0.0, 0.0))
+
+    # Keep the triangle valid: never fully straight, never folded through itself
+    reach = upper_length + lower_length
+    distance = np.clip(distance, np.abs(upper_length - lower_length) + 1e-6, reach * (1.0 - 1e-6))
+
+    to_pole = pole - root
+    bend = to_pole - np.sum(to_pole * direction, axis=-1, keepdims=True) * direction
+    bend_valid = np.linalg.norm(bend, axis=-1) > EPSILON
+    bend = fill_degenerate(normalize(bend), bend_valid, fallback=(0.0, 1.0, 0.0))
+
+    cos_root = (upper_length ** 2 + distance ** 2 - lower_length ** 2) / (2.0 * upper_length * distance)
+    cos_root = np.clip(cos_root, -1.0, 1.0)
+    sin_root = np.sqrt(1.0 - cos_root ** 2)
+
+    mid = root + direction * (upper_length * cos_root)[..., None] + bend * (upper_length * sin_root)[..., None]
+    end = root + direction * distance[..., None]
+    normal = normalize(np.cross(bend, direction))
+    return mid, end, normal
+
+
+def pole_positions(root, mid, end, distance):
+    """Place a pole vector control in the chain plane, `distance` away from the mid joint"""
+    axis = normalize(end - root)
+    to_mid = mid - root
+    bend = to_mid - np.sum(to_mid * axis, axis=-1, keepdims=True) * axis
+    valid = np.linalg.norm(bend, axis=-1) > EPSILON
+    bend = fill_degenerate(normalize(bend), valid, fallback=(0.0, 0.0, 1.0))
+    return mid + bend * np.asarray(distance, dtype=np.float64)[..., None]
+
+
+def relative_offsets(world, frame):
+    """Return the offset of `world` expressed in `frame` (world = offset @ frame)"""
+    return world @ np.linalg.inv(frame)
+
+
+def world_to_local(world, parent):
+    """Convert world matrices into local matrices under `parent`"""
+    return world @ np.linalg.inv(parent)
+
+
+def rotation_part(matrices):
+    """Return the scale-free 3x3 rotation of (..., 4, 4) matrices"""
+    rotation = matrices[..., :3, :3]
+    return rotation / np.linalg.norm(rotation, axis=-1, keepdims=True)
+
+
+def axis_rotation(axis, radians):
+    """Return (F, 3, 3) row-vector rotations about a single axis"""
+    cos = np.cos(radians)
+    sin = np.sin(radians)
+    rotation = np.zeros(np.shape(radians) + (3, 3))
+    a, b = [(1, 2), (2, 0), (0, 1)][axis]
+    rotation[..., axis, axis] = 1.0
+    rotation[..., a, a] = cos
+    rotation[..., a, b] = sin
+    rotation[..., b, a] = -sin
+    rotation[..., b, b] = cos
+    return rotation
+
+
+def euler_to_rotation(degrees, rotate_order=0):
+    """Build (F, 3, 3) rotations from (F, 3) Euler angles in degrees"""
+    radians = np.radians(np.asarray(degrees, dtype=np.float64))
+    first, second, third = ROTATE_ORDERS[rotate_order]
+    return (axis_rotation(first, radians[..., first])
+            @ axis_rotation(second, radians[..., second])
+            @ axis_rotation(third, radians[..., third]))
+
+
+def rotation_to_euler(rotation, rotate_order=0):
+    """Decompose (F, 3, 3) row-vector rotations into (F, 3) Euler angles in degrees"""
+    i, j, k = ROTATE_ORDERS[rotate_order]
+    parity = 1.0 if (j - i) % 3 == 1 else -1.0
+
+    # Work on the column-vector form, where the rotation reads R_k @ R_j @ R_i
+    column = np.swapaxes(rotation, -1, -2)
+    angles = np.zeros(rotation.shape[:-2] + (3,))
+    angles[..., j] = np.arcsin(np.clip(-parity * column[..., k, i], -1.0, 1.0))
+    angles[..., i] = np.arctan2(parity * column[..., k, j], column[..., k, k])
+    angles[..., k] = np.arctan2(parity * column[..., j, i], column[..., i, i])
+
+    # Gimbal lock: fold the first and last rotations together
+    locked = np.abs(column[..., k, i]) > 1.0 - 1e-9
+    if locked.any():
+        angles[locked, k] = 0.0
+        angles[locked, i] = np.arctan2(-parity * column[locked][..., j, k], column[locked][..., j, j])
+    return np.degrees(angles)
+
+
+def unroll_euler(degrees):
+    """Remove 360 degree flips between consecutive frames (like Maya's Euler filter)"""
+    return np.degrees(np.unwrap(np.radians(degrees), axis=0))
+
+
+def decompose(local, rotate_order=0, joint_orient=None):
+    """Return (translate, rotate) channels for (F, 4, 4) local matrices"""
+    rotation = rotation_part(local)
+    if joint_orient is not None:
+        rotation = rotation @ np.swapaxes(euler_to_rotation(joint_orient, 0), -1, -2)
+    rotate = unroll_euler(rotation_to_euler(rotation, rotate_order))
+    return positions(local).copy(), rotate
+
+
+def chain_bend(fk_world):
+    """Return the (F,) sine of the bend angle at the mid control of a three-control FK chain"""
+    root, mid, end = (positions(fk_world[:, i]) for i in range(3))
+    upper, lower = mid - root, end - mid
+    lengths = np.linalg.norm(upper, axis=-1) * np.linalg.norm(lower, axis=-1)
+    return np.linalg.norm(np.cross(upper, lower), axis=-1) / np.maximum(lengths, EPSILON)
+
+
+def measure_chain(fk_world, fk_parent):
+    """
+    Measure the fixed geometry of a three-control FK chain from sampled poses.
+    Taken on the frame where the chain bends most, since a straight chain has
+    no bend plane to measure the control offsets in.
+
+    Returns (lengths, chain_offsets, between): the (2,) upper/lower bone
+    lengths, the (2, 4, 4) offsets of the upper/mid controls relative to
+    their bone frames and the (2, 4, 4) offsets of the mid/end controls'
+    parents relative to the previous control.
+    """
+    root, mid, end = (positions(fk_world[:, i]) for i in range(3))
+    bend = np.linalg.norm(np.cross(mid - root, end - root), axis=-1)
+    best = int(np.argmax(bend))
+
+    frame = fk_world[best:best + 1]
+    upper_frame, lower_frame = chain_frames(*(positions(frame[:, i]) for i in range(3)))
+    upper_length, lower_length = bone_lengths(root[best], mid[best], end[best])
+    lengths = np.array([upper_length, lower_length])
+    chain_offsets = np.stack([
+        relative_offsets(frame[0, 0], upper_frame[0]),
+        relative_offsets(frame[0, 1], lower_frame[0]),
+    ])
+    between = np.stack([relative_offsets(fk_parent[best, i], fk_world[best, i - 1]) for i in (1, 2)])
+    return lengths, chain_offsets, between
+
+
+def match_fk_to_ik(fk_world, fk_parent, ik_world, pole_world, end_offset=None, chain_offsets=None,
+                   lengths=None, between=None):
+    """
+    Compute FK world and local matrices that reproduce the IK pose.
+
+    fk_world:   (F, 3, 4, 4) world matrices of the three FK controls
+    fk_parent:  (F, 3, 4, 4) parentMatrix of the three FK controls
+    ik_world:   (F, 4, 4) world matrix of the IK end control
+    pole_world: (F, 4, 4) world matrix of the pole vector control
+    end_offset: optional (4, 4) offset of the FK end control relative to the IK control
+    chain_offsets: optional (2, 4, 4) offsets of the upper/mid FK controls relative to their bone frames
+    lengths:    optional (2,) upper/lower bone lengths; measured per frame when omitted
+    between:    optional (2, 4, 4) offsets of the mid/end parents relative to the previous control
+
+    The optional arguments are what measure_chain returns; passing a cached
+    measurement skips the per-frame work of recovering the rig's geometry.
+
+    Returns (world, local), each (F, 3, 4, 4).
+    """
+    root, mid, end = (positions(fk_world[:, i]) for i in range(3))
+    if lengths is None:
+        upper_length, lower_length = bone_lengths(root, mid, end)
+    else:
+        upper_length, lower_length = lengths
+
+    # Controls sit on their bones with a fixed offset; measure it where the chain bends most
+    if chain_offsets is None:
+        _, chain_offsets, _ = measure_chain(fk_world, fk_parent)
+
+    new_mid, new_end, normal = solve_two_bone(root, positions(ik_world), positions(pole_world),
+                                              upper_length, lower_length)
+    upper_frame, lower_frame = chain_frames(root, new_mid, new_end, normal)
+
+    end_frame = ik_world.copy()
+    end_frame[:, 3, :3] = new_end
+    if end_offset is not None:
+        end_frame = end_offset @ end_frame
+        end_frame[:, 3, :3] = new_end
+
+    world = np.stack([
+        chain_offsets[0] @ upper_frame,
+        chain_offsets[1] @ lower_frame,
+        end_frame,
+    ], axis=1)
+
+    # Children inherit the new pose through the (constant) offset groups between controls
+    local = np.empty_like(world)
+    local[:, 0] = world_to_local(world[:, 0], fk_parent[:, 0])
+    for i in (1, 2):
+        if between is None:
+            offset = relative_offsets(fk_parent[:, i], fk_world[:, i - 1])
+        else:
+            offset = between[i - 1]
+        local[:, i] = world_to_local(world[:, i], offset @ world[:, i - 1])
+    return world, local
+
+
+def match_ik_to_fk(fk_world, ik_parent, pole_parent, pole_distance=None, end_offset=None):
+    """
+    Compute IK end and pole vector matrices that reproduce the FK pose.
+
+    fk_world:    (F, 3, 4, 4) world matrices of the three FK controls
+    ik_parent:   (F, 4, 4) parentMatrix of the IK end control
+    pole_parent: (F, 4, 4) parentMatrix of the pole vector control
+    pole_distance: distance from the mid joint to the pole; defaults to the chain length
+    end_offset:  optional (4, 4) offset of the FK end control relative to the IK control
+
+    Returns (ik_world, ik_local, pole_world, pole_local).
+    """
+    root, mid, end = (positions(fk_world[:, i]) for i in range(3))
+    if pole_distance is None:
+        upper_length, lower_length = bone_lengths(root, mid, end)
+        pole_distance = upper_length + lower_length
+
+    ik_world = fk_world[:, 2].copy()
+    if end_offset is not None:
+        ik_world = np.linalg.inv(end_offset) @ ik_world
+        ik_world[:, 3, :3] = end
+
+    pole_world = translation_matrices(pole_positions(root, mid, end, pole_distance))
+    return (ik_world, world_to_local(ik_world, ik_parent),
+            pole_world, world_to_local(pole_world, pole_parent))
@@ -0,0 +1,130 @@
+"""
+Bulk keyframe writer for the GT Custom Rig Interface
+Collects every (time, value) pair for a curve during a bake and commits the
+curve with a handful of commands instead of one setKeyframe per key.
+Optionally reduces each curve first (see curve_reduction.py), keeping only
+the keys needed to stay within a tolerance, with linear tangents.
+"""
+
+import maya.cmds as cmds
+
+import curve_reduction
+
+
+class KeyWriter(object):
+    """Buffer keys per (node, attribute) and write each curve in one bulk pass"""
+    
+    def __init__(self, tolerances=None):
+        self.curves = {}
+        self.keys_written = 0
+        self.commands_issued = 0
+        
+        # {channel kind: tolerance} to reduce curves before writing, or None to write every key
+        self.tolerances = tolerances
+        self.reduced = {}
+    
+    def add(self, node, attr, frame, value):
+        """Queue a single key"""
+        self.curves.setdefault((node, attr), {})[float(frame)] = float(value)
+    
+    def add_keys(self, node, attr, frames, values):
+        """Queue a key for every (frame, value) pair"""
+        keys = self.curves.setdefault((node, attr), {})
+        for frame, value in zip(frames, values):
+            keys[float(frame)] = float(value)
+    
+    def flush(self):
+        """Write every queued curve and return the number of keys written"""
+        written = 0
+        for (node, attr), keys in self.curves.items():
+            times = sorted(keys)
+            values = [keys[t] for t in times]
+            if self.tolerances is not None:
+                times, values = self.reduce(node, attr, times, values)
+            try:
+                self.write_curve(node, attr, times, values)
+            except RuntimeError:
+                # Locked curves, referenced curves, anim layers... key them one by one
+                self.write_keys_individually(node, attr, times, values)
+            if self.tolerances is not None:
+                self.set_linear_tangents(node, attr, times)
+            written += len(times)
+        
+        self.curves = {}
+        self.keys_written += written
+        return written
+    
+    def reduce(self, node, attr, times, values):
+        """
+        Drop the keys a curve does not need and clear any existing keys at
+        their times; returns the (times, values) left to write
+        """
+        tolerance = self.tolerances.get(curve_reduction.channel_kind(attr), 0.0)
+        keep, deviation = curve_reduction.reduce_curve(times, values, tolerance)
+        removed = [(t, t) for t, kept in zip(times, keep) if not kept]
+        self.reduced[(node, attr)] = (len(removed), deviation)
+        if not removed:
+            return times, values
+        
+        cmds.cutKey(node, attribute=attr, time=removed, clear=True)
+        self.commands_issued += 1
+        return ([t for t, kept in zip(times, keep) if kept],
+                [v for v, kept in zip(values, keep) if kept])
+    
+    def set_linear_tangents(self, node, attr, times):
+        """Interpolate a reduced curve linearly, as the reduction assumed"""
+        cmds.keyTangent(node, attribute=attr, time=(times[0], times[-1]),
+                        inTangentType='linear', outTangentType='linear')
+        self.commands_issued += 1
+    
+    def write_curve(self, node, attr, times, values):
+        """Write all keys of one curve with a constant number of commands"""
+        plug = f"{node}.{attr}"
+        
+        # One command creates the curve if needed and adds every key with the
+        # user's default tangents; keys outside `times` are left untouched
+        cmds.setKeyframe(node, attribute=attr, time=times, value=values[0])
+        curve = (cmds.keyframe(plug, query=True, name=True) or [None])[0]
+        self.commands_issued += 2
+        if not curve:
+            raise RuntimeError(f"No animation curve found for {plug}")
+        
+        # Only keys within the written range are queried, so one window of a
+        # long bake costs the same however many keys the curve already has
+        span = (times[0], times[-1])
+        curve_indices = [int(i) for i in cmds.keyframe(curve, query=True, time=span, indexValue=True) or []]
+        self.commands_issued += 1
+        if len(curve_indices) == len(times):
+            # Every key in the range is one just set
+            curve_times = times
+        else:
+            curve_times = cmds.keyframe(curve, query=True, time=span, timeChange=True) or []
+            self.commands_issued += 1
+        
+        # Then set the real values through the curve's keyTimeValue array, one
+        # setAttr per run of consecutive key indices
+        index_of = dict(zip(curve_times, curve_indices))
+        if any(t not in index_of for t in times):
+            raise RuntimeError(f"Keys on {curve} do not line up with the baked frames")
+        
+        for first, last, run in self.index_runs([index_of[t] for t in times]):
+            flat = []
+            for t, v in zip(times[run], values[run]):
+                flat += [t, v]
+            cmds.setAttr(f"{curve}.keyTimeValue[{first}:{last}]", *flat)
+            self.commands_issued += 1
+    
+    def write_keys_individually(self, node, attr, times, values):
+        """Fallback: one setKeyframe per key"""
+        for t, v in zip(times, values):
+            cmds.setKeyframe(node, attribute=attr, time=(t, t), value=v)
+        self.commands_issued += len(times)
+    
+    @staticmethod
+    def index_runs(indices):
+        """Yield (first, last, slice) for runs of consecutive curve indices"""
+        start = 0
+        for i in range(1, len(indices) + 1):
+            if i == len(indices) or indices[i] != indices[i - 1] + 1:
+                yield indices[start], indices[i - 1], slice(start, i)
+                start = i
@@ -0,0 +1,154 @@
+"""
+Parallel bake sampling for the GT Custom Rig Interface
+Splits a bake's frame range into shards and samples the limbs' matrices
+for each shard in its own standalone interpreter, since evaluating the
+scene frame by frame is what ties a bake to one core. The shards are
+joined in frame order and solved and keyed by the calling process in one
+bulk write, so the keys are identical to a serial bake (the solve needs the
+whole range anyway, e.g. for the Euler filter). The scene is exported and
+the workers started once per bake; windowed bakes send every window's
+shards to the same workers.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import maya.cmds as cmds
+
+import batch_switch
+from switch_core import BakeCancelled
+
+
+# How often the caller's progress callback runs while shards are sampled
+POLL_SECONDS = 0.05
+
+
+def split_frames(frames, shards):
+    """Split frames into at most `shards` contiguous, non-empty runs"""
+    shards = max(1, min(shards, len(frames)))
+    return [list(shard) for shard in np.array_split(np.array(frames, dtype=object), shards)]
+
+
+def is_standin():
+    """Return True when running against the stand-in maya.cmds"""
+    return getattr(cmds, 'is_standin', False)
+
+
+def export_scene(folder):
+    """Write the scene as it is now, including unsaved edits, for the workers to open"""
+    if is_standin():
+        path = os.path.join(folder, 'scene.json')
+    else:
+        path = os.path.join(folder, 'scene.mb')
+    cmds.file(path, exportAll=True, force=True, preserveReferences=True, type='mayaBinary')
+    return path
+
+
+class SamplingPool(object):
+    """
+    Worker processes kept open over one bake: the scene is exported and the
+    workers started once, then each window's shards are sent to them as
+    task lines on their stdin. Call close() when the bake is done.
+    """
+    
+    def __init__(self, workers, interpreter=None):
+        if interpreter is None:
+            interpreter = sys.executable if is_standin() else batch_switch.default_mayapy()
+        self.folder = tempfile.mkdtemp(prefix='gtSwitchBake')
+        self.workers = []
+        try:
+            self.scene = export_scene(self.folder)
+            command = batch_switch.worker_command(interpreter, standin=is_standin())
+            for i in range(max(1, workers)):
+                # Worker output goes to a file so a chatty interpreter can never fill a pipe
+                log_path = os.path.join(self.folder, f"worker{i}.log")
+                with open(log_path, 'w') as log:
+                    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=log,
+                                               stderr=subprocess.STDOUT, universal_newlines=True)
+                self.workers.append({'process': process, 'log': log_path, 'read': 0, 'task': None})
+        except Exception:
+            self.close()
+            raise
+    
+    def read_result(self, worker):
+        """Return the worker's next complete result line since the last read, or None"""
+        with open(worker['log'], 'rb') as f:
+            f.seek(worker['read'])
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                worker['read'] += len(line)
+                line = line.decode(errors='replace')
+                if line.startswith(batch_switch.RESULT_MARKER):
+                    return json.loads(line[len(batch_switch.RESULT_MARKER):])
+        return None
+    
+    def sample_plugs(self, plugs, frames, use_playhead=False, progress=None):
+        """
+        Sample matrix plugs over frames across the workers, returning
+        {plug: (frames, 4, 4)} like SwitchCore.sample_plugs. Raises RuntimeError
+        when a worker fails and BakeCancelled when progress returns False.
+        """
+        shards = split_frames(frames, len(self.workers))
+        busy = []
+        for i, (worker, shard) in enumerate(zip(self.workers, shards)):
+            worker['task'] = {
+                'kind': 'sample',
+                'scene': self.scene,
+                'output': os.path.join(self.folder, f"shard{i}.npy"),
+                'plugs': plugs,
+                'frames': shard,
+                'use_playhead': use_playhead,
+            }
+            worker['result'] = None
+            worker['process'].stdin.write(json.dumps(worker['task']) + "\n")
+            worker['process'].stdin.flush()
+            busy.append(worker)
+        
+        # Wait for every shard, keeping the caller's UI (and its cancel button) alive
+        while True:
+            for worker in busy:
+                if worker['result'] is None:
+                    exited = worker['process'].poll() is not None
+                    worker['result'] = self.read_result(worker)
+                    if worker['result'] is None and exited:
+                        worker['result'] = {'status': 'error',
+                                            'error': f"exit code {worker['process'].returncode}"}
+            done = sum(len(worker['task']['frames']) for worker in busy if worker['result'] is not None)
+            if progress is not None and not progress(done, len(frames)):
+                raise BakeCancelled()
+            if done == len(frames):
+                break
+            time.sleep(POLL_SECONDS)
+        
+        matrices = []
+        for worker in busy:
+            task, result = worker['task'], worker['result']
+            if result['status'] != 'ok':
+                raise RuntimeError(f"Sampling frames {task['frames'][0]}-{task['frames'][-1]} failed: "
+                                   f"{result['error']}")
+            worker['task'] = None
+            matrices.append(np.load(task['output']))
+        
+        matrices = np.concatenate(matrices)
+        return {plug: matrices[:, i] for i, plug in enumerate(plugs)}
+    
+    def close(self):
+        """Let idle workers exit, stop any still sampling and remove the exported scene"""
+        for worker in self.workers:
+            process = worker['process']
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+            if worker['task'] is not None and process.poll() is None:
+                process.kill()
+            process.wait()
+        self.workers = []
+        shutil.rmtree(self.folder, ignore_errors=True)
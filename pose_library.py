@@ -0,0 +1,250 @@
+"""
+Pose library for the GT Custom Rig Interface
+Captures the FK, IK and switch values of a rig preset's limbs and keeps
+every pose of that preset in one memory-mapped array file (a row per
+pose, a column per channel) with a small JSON index of names beside it.
+Applying a pose writes its channels for any number of limbs and
+characters in one pass and one undo step, optionally mirrored between
+the left_* and right_* limbs.
+"""
+
+import json
+import os
+
+import numpy as np
+import maya.cmds as cmds
+
+import profiler
+from preset_registry import get_registry
+from switch_core import bake_context
+
+
+# Channels stored for every FK and IK control; the switch adds one more per limb
+POSE_ATTRS = ['translateX', 'translateY', 'translateZ', 'rotateX', 'rotateY', 'rotateZ']
+SWITCH_CHANNEL = 'switch'
+
+# Rows allocated when a library file is created; the file doubles when it fills up
+INITIAL_CAPACITY = 64
+
+# Value signs when a pose is mirrored onto the opposite limb. FK chains are
+# usually behaviour-mirrored (same values); world-space IK and pole vector
+# controls mirror across the YZ plane. A preset limb can override these
+# with a "mirror" entry such as {"fk": {"rotateX": -1}}.
+MIRROR_SIGNS = {
+    'fk': {},
+    'ik': {'translateX': -1.0, 'rotateY': -1.0, 'rotateZ': -1.0},
+    'switch': {},
+}
+MIRROR_PREFIXES = (('left_', 'right_'), ('right_', 'left_'))
+
+
+def library_folder():
+    """Return the per-user pose library folder"""
+    maya_dir = os.environ.get('MAYA_APP_DIR') or os.path.join(os.path.expanduser('~'), 'maya')
+    return os.path.join(maya_dir, 'gt_pose_library')
+
+
+def pose_layout(limbs):
+    """Return the (limb, role, index, attr) channel of every column of a preset's poses"""
+    layout = []
+    for limb, limb_data in limbs.items():
+        for role in ('fk', 'ik'):
+            for index in range(len(limb_data[role])):
+                layout += [(limb, role, index, attr) for attr in POSE_ATTRS]
+        layout.append((limb, 'switch', 0, SWITCH_CHANNEL))
+    return layout
+
+
+def mirror_limb(limb):
+    """Return the limb on the other side (left_arm <-> right_arm), or the limb itself"""
+    for prefix, other in MIRROR_PREFIXES:
+        if limb.startswith(prefix):
+            return other + limb[len(prefix):]
+    return limb
+
+
+class PoseLibrary(object):
+    """Every pose of one rig preset, in a memory-mapped (poses, channels) array"""
+    
+    def __init__(self, preset, limbs, folder=None):
+        self.preset = preset
+        self.layout = pose_layout(limbs)
+        self.names = []
+        self.values = None
+        
+        folder = folder or library_folder()
+        base = os.path.join(folder, "".join(c if c.isalnum() else '_' for c in preset))
+        self.array_path = base + '.npy'
+        self.index_path = base + '.json'
+        self.load()
+    
+    def load(self):
+        """Open the library files, moving the poses over if the preset's channels changed"""
+        if not os.path.isfile(self.index_path) or not os.path.isfile(self.array_path):
+            return
+        
+        with open(self.index_path) as f:
+            index = json.load(f)
+        self.names = index['names']
+        layout = [tuple(channel) for channel in index['layout']]
+        if layout == self.layout:
+            self.values = np.load(self.array_path, mmap_mode='r+')
+            return
+        
+        stored = np.load(self.array_path, mmap_mode='r')
+        columns = {channel: i for i, channel in enumerate(layout)}
+        values = np.full((max(len(self.names), INITIAL_CAPACITY), len(self.layout)), np.nan, dtype=np.float32)
+        for i, channel in enumerate(self.layout):
+            if channel in columns:
+                values[:len(self.names), i] = stored[:len(self.names), columns[channel]]
+        del stored
+        self.write(values)
+    
+    def write(self, values):
+        """Replace the library files with `values` and the current names"""
+        os.makedirs(os.path.dirname(self.array_path), exist_ok=True)
+        self.values = None
+        temp_path = self.array_path + '.tmp.npy'
+        array = np.lib.format.open_memmap(temp_path, mode='w+', dtype=np.float32, shape=values.shape)
+        array[:] = values
+        array.flush()
+        del array
+        os.replace(temp_path, self.array_path)
+        self.values = np.load(self.array_path, mmap_mode='r+')
+        self.save_index()
+    
+    def save_index(self):
+        """Write the pose names and channel layout"""
+        temp_path = self.index_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'preset': self.preset, 'layout': self.layout, 'names': self.names}, f)
+        os.replace(temp_path, self.index_path)
+    
+    def get(self, name):
+        """Return a copy of a pose's values"""
+        return np.array(self.values[self.names.index(name)])
+    
+    def store(self, name, row):
+        """Add or overwrite a pose"""
+        if name in self.names:
+            index = self.names.index(name)
+        else:
+            index = len(self.names)
+            if self.values is None or index >= len(self.values):
+                capacity = max(INITIAL_CAPACITY, 2 * index)
+                values = np.full((capacity, len(self.layout)), np.nan, dtype=np.float32)
+                if self.values is not None:
+                    values[:index] = self.values[:index]
+                self.write(values)
+            self.names.append(name)
+        
+        self.values[index] = row
+        self.values.flush()
+        self.save_index()
+    
+    def remove(self, name):
+        """Delete a pose, moving the last pose into its row"""
+        index = self.names.index(name)
+        last = len(self.names) - 1
+        self.values[index] = self.values[last]
+        self.values[last] = np.nan
+        self.names[index] = self.names[last]
+        self.names.pop()
+        self.values.flush()
+        self.save_index()
+
+
+def channel_plugs(core, namespace, layout):
+    """Return the plug of every layout channel on one character (None where it has no plug)"""
+    controls = get_registry().get_namespaced(core.rig_type, namespace)
+    switch_attrs = {}
+    with core.in_namespace(namespace):
+        for limb in controls:
+            resolved = core.resolve_limb(limb)
+            switch_attrs[limb] = resolved['switch_attr'] if resolved else None
+    
+    plugs = []
+    for limb, role, index, attr in layout:
+        if limb not in controls:
+            plugs.append(None)
+        elif role == 'switch':
+            plugs.append(f"{controls[limb]['switch']}.{switch_attrs[limb]}" if switch_attrs[limb] else None)
+        elif index < len(controls[limb][role]):
+            plugs.append(f"{controls[limb][role][index]}.{attr}")
+        else:
+            plugs.append(None)
+    return plugs
+
+
+def capture_pose(core, namespace, layout):
+    """Read a character's values for every channel; channels that cannot be set are NaN"""
+    with profiler.operation('pose capture'):
+        row = np.full(len(layout), np.nan, dtype=np.float32)
+        for i, plug in enumerate(channel_plugs(core, namespace, layout)):
+            if plug is None or not cmds.objExists(plug.rsplit('.', 1)[0]):
+                continue
+            if cmds.getAttr(plug, settable=True):
+                row[i] = cmds.getAttr(plug)
+        return row
+
+
+def pose_writes(core, row, layout, limbs, mirror=False):
+    """
+    Return (columns, values) for the channels of `limbs`: the layout column
+    each value goes to and the value, taken from the opposite limb and
+    sign-flipped when mirroring. Channels without a stored value are left out.
+    """
+    columns = {channel: i for i, channel in enumerate(layout)}
+    targets = []
+    sources = []
+    signs = []
+    for i, (limb, role, index, attr) in enumerate(layout):
+        if limb not in limbs:
+            continue
+        source = columns.get((mirror_limb(limb) if mirror else limb, role, index, attr))
+        if source is None:
+            continue
+        
+        sign = 1.0
+        if mirror:
+            overrides = core.limb_controls.get(limb, {}).get('mirror', {})
+            sign = overrides.get(role, {}).get(attr, MIRROR_SIGNS[role].get(attr, 1.0))
+        targets.append(i)
+        sources.append(source)
+        signs.append(sign)
+    
+    values = row[np.array(sources, dtype=int)].astype(np.float64) * np.array(signs)
+    stored = ~np.isnan(values)
+    return np.array(targets, dtype=int)[stored], values[stored]
+
+
+def apply_pose(core, row, layout, namespaces, limbs, mirror=False):
+    """
+    Write a pose to `limbs` on every character in `namespaces` as one undo
+    step, keying the written channels when core.autokey is set. Returns the
+    number of values written.
+    """
+    with profiler.operation('pose apply'):
+        columns, values = pose_writes(core, row, layout, limbs, mirror)
+        written = 0
+        with bake_context("gtApplyPose"):
+            for namespace in namespaces:
+                plugs = channel_plugs(core, namespace, layout)
+                keyed = {}
+                for column, value in zip(columns, values):
+                    plug = plugs[column]
+                    if plug is None:
+                        continue
+                    try:
+                        cmds.setAttr(plug, value)
+                    except RuntimeError:
+                        # Locked or connected on this character
+                        continue
+                    written += 1
+                    node, attr = plug.rsplit('.', 1)
+                    keyed.setdefault(node, []).append(attr)
+                
+                if core.autokey:
+                    for node, attrs in keyed.items():
+                        cmds.setKeyframe(node, attribute=attrs)
+        return written
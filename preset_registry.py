@@ -0,0 +1,235 @@
+"""
+Rig preset registry for the GT Custom Rig Interface
+Loads rig presets from JSON/YAML files in the shipped, studio and user
+preset folders (later folders override presets of the same name) and
+precomputes everything detection and switching look up: switch attribute
+candidates, namespaced control names and a reverse index from control
+name to (preset, limb). Files are re-read only when their mtime changes.
+
+A preset file maps preset names to limbs:
+
+    {"My Rig": {"right_arm": {"fk": ["upperarm_r_fk", "lowerarm_r_fk", "hand_r_fk"],
+                              "ik": ["hand_r_ik", "arm_r_pv"],
+                              "switch": "arm_r_settings",
+                              "switch_attr": "ikFk"}}}
+"""
+
+import json
+import os
+
+from control_cache import SWITCH_ATTRS, namespaced
+
+try:
+    import yaml
+except ImportError:
+    # YAML presets need PyYAML; JSON presets always work
+    yaml = None
+
+
+PRESET_EXTENSIONS = ('.json', '.yaml', '.yml')
+LIMB_KEYS = ('fk', 'ik', 'switch')
+
+# What reading a malformed preset file can raise; the file is skipped and its error shown
+READ_ERRORS = (OSError, ValueError, TypeError) + ((yaml.YAMLError,) if yaml is not None else ())
+
+# Shipped presets, then studio folders ($GT_RIG_PRESETS_PATH), then the user folder
+BUILTIN_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'presets')
+STUDIO_PATH_VAR = 'GT_RIG_PRESETS_PATH'
+
+
+def user_folder():
+    """Return the per-user preset folder"""
+    maya_dir = os.environ.get('MAYA_APP_DIR') or os.path.join(os.path.expanduser('~'), 'maya')
+    return os.path.join(maya_dir, 'gt_rig_presets')
+
+
+def default_folders():
+    """Return the preset folders in load order"""
+    studio = [folder for folder in os.environ.get(STUDIO_PATH_VAR, '').split(os.pathsep) if folder]
+    return [BUILTIN_FOLDER] + studio + [user_folder()]
+
+
+def read_preset_file(path):
+    """Return the {preset name: limbs} mapping stored in a JSON or YAML file"""
+    with open(path) as f:
+        if path.lower().endswith('.json'):
+            data = json.load(f)
+        elif yaml is not None:
+            data = yaml.safe_load(f)
+        else:
+            raise ValueError("PyYAML is not installed")
+    if not isinstance(data, dict):
+        raise ValueError("expected a mapping of preset names to limbs")
+    return data
+
+
+def validate_preset(limbs):
+    """Return an error message for a malformed preset, or None"""
+    if not isinstance(limbs, dict) or not limbs:
+        return "a preset must map limb names to limb data"
+    for limb, limb_data in limbs.items():
+        if not isinstance(limb_data, dict):
+            return f"limb '{limb}' must map fk, ik and switch to control names"
+        missing = [key for key in LIMB_KEYS if key not in limb_data]
+        if missing:
+            return f"limb '{limb}' is missing {', '.join(missing)}"
+        for key in ('fk', 'ik'):
+            controls = limb_data[key]
+            if not isinstance(controls, list) or not all(isinstance(ctrl, str) and ctrl for ctrl in controls):
+                return f"limb '{limb}' {key} must be a list of control names"
+        if not isinstance(limb_data['switch'], str) or not limb_data['switch']:
+            return f"limb '{limb}' switch must be a control name"
+        if not isinstance(limb_data.get('switch_attr', ''), str):
+            return f"limb '{limb}' switch_attr must be an attribute name"
+    return None
+
+
+class PresetRegistry(object):
+    """Rig presets from preset files, with lookup tables built once per change"""
+    
+    def __init__(self, folders=None):
+        self.folders = folders
+        self.presets = {}
+        self.files = {}
+        self.errors = {}
+        self.signature = None
+        
+        # Bumped on every rebuild, so holders of per-preset state can tell the presets changed
+        self.version = 0
+        
+        # Lookup tables, rebuilt whenever a file changes
+        self.control_index = {}
+        self.switch_index = {}
+        self.namespaced_controls = {}
+        
+        self.refresh()
+    
+    def get_folders(self):
+        """Return the folders presets are loaded from"""
+        return self.folders if self.folders is not None else default_folders()
+    
+    def scan(self):
+        """Return {path: mtime} for every preset file, in load order"""
+        found = {}
+        for folder in self.get_folders():
+            try:
+                entries = sorted(os.scandir(folder), key=lambda entry: entry.name)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.lower().endswith(PRESET_EXTENSIONS) and entry.is_file():
+                    found[entry.path] = entry.stat().st_mtime
+        return found
+    
+    def refresh(self, force=False):
+        """Reload changed preset files; returns True if the presets changed"""
+        found = self.scan()
+        signature = tuple(found.items())
+        if signature == self.signature and not force:
+            return False
+        
+        # Only files that are new or have a new mtime are parsed again
+        self.errors = {path: error for path, error in self.errors.items() if path in found}
+        files = {}
+        for path, mtime in found.items():
+            cached = self.files.get(path)
+            if cached and cached['mtime'] == mtime and not force:
+                files[path] = cached
+                continue
+            
+            entry = {'mtime': mtime, 'presets': {}}
+            try:
+                entry['presets'] = read_preset_file(path)
+                self.errors.pop(path, None)
+            except READ_ERRORS as e:
+                self.errors[path] = str(e)
+            files[path] = entry
+        
+        self.files = files
+        self.signature = signature
+        self.rebuild()
+        return True
+    
+    def rebuild(self):
+        """Merge the loaded files and rebuild the lookup tables"""
+        presets = {}
+        for path, entry in self.files.items():
+            for name, limbs in entry['presets'].items():
+                error = validate_preset(limbs)
+                if error:
+                    self.errors[path] = f"{name}: {error}"
+                    continue
+                presets[name] = {limb: self.prepare_limb(limb_data) for limb, limb_data in limbs.items()}
+        
+        # Updated in place so modules holding a reference see the new presets
+        self.presets.clear()
+        self.presets.update(presets)
+        self.version += 1
+        
+        self.control_index = {}
+        self.switch_index = {}
+        self.namespaced_controls = {}
+        for name, limbs in self.presets.items():
+            for limb, limb_data in limbs.items():
+                for control in dict.fromkeys(limb_data['fk'] + limb_data['ik'] + [limb_data['switch']]):
+                    self.control_index.setdefault(control, []).append((name, limb))
+                self.switch_index.setdefault(limb_data['switch'], []).append((name, limb))
+    
+    @staticmethod
+    def prepare_limb(limb_data):
+        """Return a copy of a limb with its switch attribute candidates precomputed"""
+        limb_data = dict(limb_data, fk=list(limb_data['fk']), ik=list(limb_data['ik']))
+        preferred = limb_data.get('switch_attr')
+        limb_data['switch_attrs'] = ([preferred] if preferred else []) + [
+            attr for attr in SWITCH_ATTRS if attr != preferred]
+        return limb_data
+    
+    def get_namespaced(self, preset, namespace):
+        """Return {limb: {'fk', 'ik', 'switch'}} with namespaced names, computed once per namespace"""
+        key = (preset, namespace)
+        controls = self.namespaced_controls.get(key)
+        if controls is None:
+            controls = {}
+            for limb, limb_data in self.presets[preset].items():
+                controls[limb] = {
+                    'fk': [namespaced(ctrl, namespace) for ctrl in limb_data['fk']],
+                    'ik': [namespaced(ctrl, namespace) for ctrl in limb_data['ik']],
+                    'switch': namespaced(limb_data['switch'], namespace),
+                }
+            self.namespaced_controls[key] = controls
+        return controls
+    
+    def owners(self, node):
+        """Return [(preset, limb, namespace)] for a (namespaced) control name"""
+        namespace, _, leaf = node.split('|')[-1].rpartition(':')
+        return [(preset, limb, namespace) for preset, limb in self.control_index.get(leaf, ())]
+    
+    def detect(self, scene_index):
+        """
+        Return (preset, namespaces) for the first preset, in load order, whose
+        switch controls are in the scene, or (None, []). One pass over the
+        switch controls, however many presets are registered.
+        """
+        scene_index.ensure_built()
+        found = {}
+        for switch, owners in self.switch_index.items():
+            namespaces = scene_index.namespaces_for(switch)
+            if namespaces:
+                for preset, limb in owners:
+                    found.setdefault(preset, set()).update(namespaces)
+        
+        for preset in self.presets:
+            if preset in found:
+                return preset, sorted(found[preset])
+        return None, []
+
+
+_registry = None
+
+
+def get_registry():
+    """Return the shared preset registry"""
+    global _registry
+    if _registry is None:
+        _registry = PresetRegistry()
+    return _registry
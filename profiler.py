@@ -0,0 +1,204 @@
+"""
+Scene command profiler for the GT Custom Rig Interface
+Opt-in timing of every maya.cmds call the tool makes, attributed to the
+operation that issued it (detect, resolve, match, bake, key write, ...).
+While enabled, the tool modules' `cmds` is swapped for a timing proxy;
+while disabled the real module is used and an operation marker is a
+shared no-op context, so profiling costs close to nothing.
+
+    profiler = get_profiler()
+    profiler.enable()
+    ...
+    profiler.export_chrome_trace('switch_trace.json')   # chrome://tracing or Perfetto
+"""
+
+import contextlib
+import json
+import sys
+import time
+
+
+# Modules whose `cmds` global is swapped while profiling
+PROFILED_MODULES = ['switch_core', 'control_cache', 'scene_index', 'detection_cache', 'key_writer',
+                    'bake_fingerprint', 'parallel_bake', 'pose_library', 'hotkey_switch', 'switcher']
+
+# Individual events kept for the trace; totals keep counting past the cap
+MAX_EVENTS = 200000
+
+NO_OPERATION = contextlib.nullcontext()
+
+
+class ProfiledCmds(object):
+    """Stands in for maya.cmds, timing each command against the current operation"""
+    
+    def __init__(self, cmds, profiler):
+        self._cmds = cmds
+        self._profiler = profiler
+        self._wrappers = {}
+    
+    def __getattr__(self, name):
+        wrapper = self._wrappers.get(name)
+        if wrapper is not None:
+            return wrapper
+        
+        attr = getattr(self._cmds, name)
+        if not callable(attr):
+            return attr
+        
+        profiler = self._profiler
+        
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                profiler.add_command(name, start, time.perf_counter() - start)
+        
+        self._wrappers[name] = wrapper
+        return wrapper
+
+
+class Profiler(object):
+    """Per-operation command counts and timings, with an optional event trace"""
+    
+    def __init__(self):
+        self.enabled = False
+        self.patched = {}
+        self.reset()
+    
+    def reset(self):
+        """Forget everything recorded so far"""
+        self.operations = {}
+        self.events = []
+        self.dropped_events = 0
+        self.stack = []
+        self.origin = time.perf_counter()
+    
+    def enable(self):
+        """Start timing the scene commands of every loaded tool module"""
+        if self.enabled:
+            return
+        
+        for name in PROFILED_MODULES:
+            module = sys.modules.get(name)
+            cmds = getattr(module, 'cmds', None)
+            if cmds is not None and not isinstance(cmds, ProfiledCmds):
+                self.patched[name] = cmds
+                module.cmds = ProfiledCmds(cmds, self)
+        self.enabled = True
+    
+    def disable(self):
+        """Put the real maya.cmds back"""
+        for name, cmds in self.patched.items():
+            sys.modules[name].cmds = cmds
+        self.patched = {}
+        self.stack = []
+        self.enabled = False
+    
+    def operation(self, name):
+        """Context manager attributing the commands issued inside it to an operation"""
+        if not self.enabled:
+            return NO_OPERATION
+        return self.timed_operation(name)
+    
+    @contextlib.contextmanager
+    def timed_operation(self, name):
+        """Time one operation (operations nest; commands count towards the innermost)"""
+        self.stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.stack.pop()
+            stats = self.get_operation(name)
+            stats['calls'] += 1
+            stats['seconds'] += duration
+            self.add_event(name, 'operation', start, duration, len(self.stack))
+    
+    def get_operation(self, name):
+        """Return (creating) the totals of one operation"""
+        stats = self.operations.get(name)
+        if stats is None:
+            stats = {'calls': 0, 'seconds': 0.0, 'commands': 0, 'command_seconds': 0.0, 'by_command': {}}
+            self.operations[name] = stats
+        return stats
+    
+    def add_command(self, command, start, duration):
+        """Record one scene command against the current operation"""
+        stats = self.get_operation(self.stack[-1] if self.stack else 'other')
+        stats['commands'] += 1
+        stats['command_seconds'] += duration
+        
+        totals = stats['by_command'].get(command)
+        if totals is None:
+            totals = stats['by_command'][command] = {'calls': 0, 'seconds': 0.0}
+        totals['calls'] += 1
+        totals['seconds'] += duration
+        self.add_event(command, 'command', start, duration, len(self.stack))
+    
+    def add_event(self, name, category, start, duration, depth):
+        """Keep a trace event, up to MAX_EVENTS"""
+        if len(self.events) >= MAX_EVENTS:
+            self.dropped_events += 1
+            return
+        self.events.append((name, category, start - self.origin, duration, depth))
+    
+    def summary(self):
+        """Return the per-operation totals, slowest operation first"""
+        operations = sorted(self.operations.items(), key=lambda item: -item[1]['seconds'])
+        return {
+            'operations': {name: dict(stats, by_command=dict(sorted(
+                stats['by_command'].items(), key=lambda item: -item[1]['seconds'])))
+                for name, stats in operations},
+            'events': len(self.events),
+            'dropped_events': self.dropped_events,
+        }
+    
+    def format_summary(self):
+        """Return the summary as text for the Diagnostics panel"""
+        lines = []
+        for name, stats in self.summary()['operations'].items():
+            timing = f"{stats['calls']} calls, {stats['seconds'] * 1000:.1f} ms, " if stats['calls'] else ""
+            lines.append(f"{name}: {timing}{stats['commands']} commands ({stats['command_seconds'] * 1000:.1f} ms)")
+            for command, totals in list(stats['by_command'].items())[:5]:
+                lines.append(f"    {command}: {totals['calls']} x, {totals['seconds'] * 1000:.1f} ms")
+        if self.dropped_events:
+            lines.append(f"({self.dropped_events} trace events over the {MAX_EVENTS} limit were dropped)")
+        return "\n".join(lines) or "Nothing recorded yet"
+    
+    def export_json(self, path):
+        """Write the per-operation summary as JSON"""
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+    
+    def export_chrome_trace(self, path):
+        """Write the recorded events in Chrome trace event format"""
+        events = [{
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': start * 1e6,
+            'dur': duration * 1e6,
+            'pid': 1,
+            'tid': 1,
+            'args': {'depth': depth},
+        } for name, category, start, duration, depth in self.events]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+_profiler = None
+
+
+def get_profiler():
+    """Return the shared profiler"""
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler()
+    return _profiler
+
+
+def operation(name):
+    """Shortcut for get_profiler().operation(name)"""
+    return get_profiler().operation(name)
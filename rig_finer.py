@@ -1,49 +1,176 @@
+"""
+Rig finder for the GT Custom Rig Interface
+Walks the scene's transforms once, classifies every node against all of
+the IK/FK naming patterns with a single compiled matcher and produces a
+JSON report. The report can be turned into a rig preset for the switcher.
+"""
+
+import fnmatch
+import json
+import re
+
 import maya.cmds as cmds
 
-# Search for common IK/FK control patterns
-print("\n" + "="*50)
-print("SEARCHING FOR RIG CONTROLS")
-print("="*50)
 
 # Common patterns to search for
-patterns = [
+PATTERNS = [
     "*_ik_*", "*_IK_*", "*_ik*", "*IK*",
-    "*_fk*", "*_FK*", 
+    "*_fk*", "*_FK*",
     "*_ctrl", "*_control", "*_CTRL",
     "*_settings", "*_switch*",
-    "*blend*", "*ikfk*"
+    "*blend*", "*ikfk*",
+    "*_upv*", "*_PV*", "*pole*"
 ]
 
-print("\n=== Searching for controls ===\n")
-
-for pattern in patterns:
-    found = cmds.ls(pattern, type='transform')
-    if found:
-        print(f"\n--- Pattern: {pattern} ---")
-        for obj in found[:10]:  # Show first 10 matches
-            print(f"  {obj}")
-            
-            # Check for IK/FK attributes
-            attrs = cmds.listAttr(obj, userDefined=True, keyable=True) or []
-            relevant_attrs = [a for a in attrs if any(x in a.lower() for x in ['ik', 'fk', 'blend'])]
-            if relevant_attrs:
-                print(f"    Attributes: {relevant_attrs}")
-
-
-def show():
-    """Show the GT Custom Rig Interface"""
-    global gt_rig_interface
+# Attribute name fragments that suggest an IK/FK switch
+SWITCH_ATTR_TOKENS = ['ik', 'fk', 'blend']
+
+# Name tokens used to sort controls into the switcher's limbs
+SIDE_TOKENS = {
+    'right': ['r', 'right', 'rt', 'r0'],
+    'left': ['l', 'left', 'lf', 'l0'],
+}
+LIMB_TOKENS = {
+    'arm': ['arm', 'shoulder', 'elbow', 'wrist', 'hand', 'upperarm', 'lowerarm', 'forearm'],
+    'leg': ['leg', 'hip', 'knee', 'ankle', 'foot', 'thigh', 'calf', 'shin'],
+}
+POLE_TOKENS = ['pv', 'pole', 'upv', 'polevector']
+
+
+def compile_matcher(patterns):
+    """Compile glob patterns into one regex that reports every pattern a name matches"""
+    groups = []
+    for i, pattern in enumerate(patterns):
+        groups.append(f"(?=(?P<p{i}>{fnmatch.translate(pattern)}))?")
+    return re.compile("^" + "".join(groups))
+
+
+def name_tokens(leaf):
+    """Split a control name into lowercase tokens on underscores and case changes"""
+    words = re.sub(r'([a-z])([A-Z])', r'\1_\2', leaf)
+    return [token.lower() for token in re.split(r'[_\W]+', words) if token]
+
+
+def scan_scene(patterns=PATTERNS):
+    """Scan every transform once and return a JSON-serialisable report"""
+    matcher = compile_matcher(patterns)
+    report = {
+        'scene': cmds.file(query=True, sceneName=True) or '',
+        'patterns': patterns,
+        'transforms_scanned': 0,
+        'matches': {pattern: [] for pattern in patterns},
+        'nodes': {},
+        'namespaces': [],
+    }
+    namespaces = set()
     
-    try:
-        gt_rig_interface.close()
-        gt_rig_interface.deleteLater()
-    except:
-        pass
+    for path in cmds.ls(type='transform', long=True) or []:
+        report['transforms_scanned'] += 1
+        name = path.split('|')[-1]
+        namespace, _, leaf = name.rpartition(':')
+        
+        match = matcher.match(leaf)
+        hits = [pattern for i, pattern in enumerate(patterns) if match.group(f"p{i}") is not None]
+        if not hits:
+            continue
+        
+        # One attribute query per matched node, however many patterns it hit
+        attrs = cmds.listAttr(path, userDefined=True, keyable=True) or []
+        switch_attrs = [a for a in attrs if any(token in a.lower() for token in SWITCH_ATTR_TOKENS)]
+        
+        for pattern in hits:
+            report['matches'][pattern].append(name)
+        report['nodes'][name] = {
+            'path': path,
+            'namespace': namespace,
+            'leaf': leaf,
+            'depth': path.count('|'),
+            'patterns': hits,
+            'switch_attrs': switch_attrs,
+        }
+        namespaces.add(namespace)
+    
+    report['namespaces'] = sorted(namespaces)
+    return report
+
+
+def classify_control(leaf):
+    """Return (limb name, role) for a control leaf name, or (None, None)"""
+    tokens = [token.rstrip('0123456789') or token for token in name_tokens(leaf)]
+    side = next((s for s, names in SIDE_TOKENS.items() if any(t in names for t in tokens)), None)
+    limb = next((l for l, names in LIMB_TOKENS.items() if any(t in names for t in tokens)), None)
+    if not side or not limb:
+        return None, None
+    
+    if any(t in POLE_TOKENS for t in tokens):
+        role = 'pole'
+    elif 'ik' in tokens:
+        role = 'ik'
+    elif 'fk' in tokens:
+        role = 'fk'
+    else:
+        role = None
+    return f"{side}_{limb}", role
+
+
+def build_preset(report, namespace=None):
+    """Guess a RIG_PRESETS-style entry from a scan report"""
+    if namespace is None:
+        namespace = report['namespaces'][0] if report['namespaces'] else ''
+    
+    candidates = {}
+    for node in report['nodes'].values():
+        if node['namespace'] != namespace:
+            continue
+        
+        limb, role = classify_control(node['leaf'])
+        if not limb:
+            continue
+        limb_data = candidates.setdefault(limb, {'fk': [], 'ik': [], 'pole': [], 'switch': []})
+        if role:
+            limb_data[role].append(node)
+        if node['switch_attrs']:
+            limb_data['switch'].append(node)
+    
+    preset = {}
+    for limb, limb_data in sorted(candidates.items()):
+        if not limb_data['switch']:
+            continue
+        
+        # FK chains are ordered root to tip by hierarchy depth
+        fk = sorted(limb_data['fk'], key=lambda node: node['depth'])[:3]
+        ik = [node for node in limb_data['ik'] if node not in limb_data['pole']][:1]
+        # Prefer dedicated settings/switch nodes over controls that merely carry an attribute
+        switch = sorted(limb_data['switch'],
+                        key=lambda node: not any('settings' in p or 'switch' in p for p in node['patterns']))[0]
+        preset[limb] = {
+            'fk': [node['leaf'] for node in fk],
+            'ik': [node['leaf'] for node in ik + limb_data['pole'][:1]],
+            'switch': switch['leaf'],
+            'switch_attr': switch['switch_attrs'][0],
+        }
+    return preset
+
+
+def write_report(report, path):
+    """Write a scan report (and its generated preset) as JSON"""
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def main(path=None):
+    """Scan the open scene and print (or write) the report"""
+    report = scan_scene()
+    report['preset'] = build_preset(report)
     
-    gt_rig_interface = GTCustomRigInterface()
-    gt_rig_interface.show()
+    if path:
+        write_report(report, path)
+        print(f"Rig report written to {path}")
+    else:
+        print(json.dumps(report, indent=2))
+    return report
 
 
 # Run the tool
 if __name__ == "__main__":
-    show()</parameter>
+    main()
@@ -0,0 +1,125 @@
+"""
+Scene index for the GT Custom Rig Interface
+Maps transform leaf names to the namespaces they appear in, built from a
+single scene traversal and kept current by node added/removed/renamed
+callbacks, so rig detection is dictionary lookups instead of wildcard scans.
+"""
+
+import maya.cmds as cmds
+
+try:
+    import maya.api.OpenMaya as om
+except ImportError:
+    # The stand-in maya.cmds (standin_cmds.py) has no API; the index is rebuilt on demand
+    om = None
+
+
+def split_name(name):
+    """Split a node name or DAG path into (namespace, leaf name)"""
+    namespace, _, leaf = name.split('|')[-1].rpartition(':')
+    return namespace, leaf
+
+
+class SceneIndex(object):
+    """Leaf name -> namespaces index of every transform in the scene"""
+    
+    def __init__(self):
+        self.namespaces_by_leaf = {}
+        self.built = False
+        self.callback_ids = []
+    
+    def build(self):
+        """Index every transform with a single scene traversal"""
+        self.namespaces_by_leaf = {}
+        for name in cmds.ls(type='transform') or []:
+            self.add_name(name)
+        self.built = True
+    
+    def ensure_built(self):
+        """Build the index on first use and start tracking scene changes"""
+        if not self.built:
+            self.build()
+        if not self.callback_ids and om is not None:
+            self.start_watching()
+    
+    def add_name(self, name):
+        """Count one transform under its namespace"""
+        namespace, leaf = split_name(name)
+        counts = self.namespaces_by_leaf.setdefault(leaf, {})
+        counts[namespace] = counts.get(namespace, 0) + 1
+    
+    def remove_name(self, name):
+        """Forget one transform"""
+        namespace, leaf = split_name(name)
+        counts = self.namespaces_by_leaf.get(leaf)
+        if not counts or namespace not in counts:
+            return
+        
+        counts[namespace] -= 1
+        if counts[namespace] <= 0:
+            del counts[namespace]
+        if not counts:
+            del self.namespaces_by_leaf[leaf]
+    
+    def namespaces_for(self, leaf):
+        """Return the namespaces that contain a transform named `leaf`"""
+        return set(self.namespaces_by_leaf.get(leaf, ()))
+    
+    def find_rig_namespaces(self, rig_data):
+        """Return the namespaces holding any of a preset's switch controls"""
+        self.ensure_built()
+        namespaces = set()
+        for limb_info in rig_data.values():
+            namespaces |= self.namespaces_for(limb_info['switch'])
+        return sorted(namespaces)
+    
+    def start_watching(self):
+        """Keep the index current as transforms are created, deleted or renamed"""
+        self.callback_ids = [
+            om.MDGMessage.addNodeAddedCallback(self.on_node_added, 'transform'),
+            om.MDGMessage.addNodeRemovedCallback(self.on_node_removed, 'transform'),
+            om.MNodeMessage.addNameChangedCallback(om.MObject(), self.on_name_changed),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kAfterOpen, self.on_scene_changed),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kAfterNew, self.on_scene_changed),
+        ]
+    
+    def stop_watching(self):
+        """Remove the scene callbacks"""
+        if self.callback_ids:
+            om.MMessage.removeCallbacks(self.callback_ids)
+        self.callback_ids = []
+    
+    def on_node_added(self, node, *args):
+        """Scene callback: a transform was created"""
+        self.add_name(om.MFnDependencyNode(node).name())
+    
+    def on_node_removed(self, node, *args):
+        """Scene callback: a transform was deleted"""
+        self.remove_name(om.MFnDependencyNode(node).name())
+    
+    def on_name_changed(self, node, previous_name, *args):
+        """Scene callback: any node was renamed"""
+        if not node.hasFn(om.MFn.kTransform) or not previous_name:
+            return
+        self.remove_name(previous_name)
+        self.add_name(om.MFnDependencyNode(node).name())
+    
+    def on_scene_changed(self, *args):
+        """Scene callback: a new scene was opened; rebuild lazily"""
+        self.reset()
+    
+    def reset(self):
+        """Forget the index; it is rebuilt on the next lookup"""
+        self.built = False
+        self.namespaces_by_leaf = {}
+
+
+_scene_index = None
+
+
+def get_scene_index():
+    """Return the shared scene index, which stays warm between dialog sessions"""
+    global _scene_index
+    if _scene_index is None:
+        _scene_index = SceneIndex()
+    return _scene_index
@@ -0,0 +1,477 @@
+"""
+Stand-in maya.cmds for the GT Custom Rig Interface
+A small in-memory scene (transforms, joints, user attributes and linear
+animation curves) with just enough of maya.cmds for switch_core, so the
+switching and baking logic can be run and checked without Maya.
+    
+    import standin_cmds
+    scene = standin_cmds.install()
+    standin_cmds.add_rig(scene, 'Custom', 'char1')
+    import switch_core
+"""
+
+import fnmatch
+import json
+import sys
+import types
+
+import numpy as np
+
+import ikfk_solver
+
+
+TRANSFORM_DEFAULTS = {
+    'translateX': 0.0, 'translateY': 0.0, 'translateZ': 0.0,
+    'rotateX': 0.0, 'rotateY': 0.0, 'rotateZ': 0.0,
+    'scaleX': 1.0, 'scaleY': 1.0, 'scaleZ': 1.0,
+    'rotateOrder': 0,
+}
+JOINT_DEFAULTS = {'jointOrientX': 0.0, 'jointOrientY': 0.0, 'jointOrientZ': 0.0}
+
+
+def split_plug(plug):
+    """Split 'node.attr[0]' into ('node', 'attr', '[0]')"""
+    node, _, attr = plug.partition('.')
+    attr, bracket, index = attr.partition('[')
+    return node, attr, bracket + index
+
+
+class StandInCmds(object):
+    """In-memory scene exposing the subset of maya.cmds used by the switcher"""
+    
+    is_standin = True
+    
+    def __init__(self):
+        self.new_scene()
+    
+    # Scene building --------------------------------------------------------
+    
+    def new_scene(self):
+        """Empty the scene"""
+        self.nodes = {}
+        self.curves = {}
+        self.selection = []
+        self.time = 1.0
+        self.min_time = 1.0
+        self.max_time = 120.0
+        self.scene_name = ''
+        self.references = []
+        self.undo_depth = 0
+        self.refresh_suspended = False
+        self.evaluation_mode = 'parallel'
+        self.autokey_state = False
+        self.invalidate()
+    
+    def invalidate(self):
+        """Forget memoized evaluation; called by every edit (and needed after editing curve keys directly)"""
+        self.world_matrices = {}
+        self.curve_arrays = {}
+    
+    def add_transform(self, name, parent=None, joint=False, user_attrs=None, **values):
+        """Create a transform (or joint) with optional user attributes and channel values"""
+        self.invalidate()
+        attrs = dict(TRANSFORM_DEFAULTS)
+        if joint:
+            attrs.update(JOINT_DEFAULTS)
+        attrs.update(values)
+        self.nodes[name] = {
+            'type': 'joint' if joint else 'transform',
+            'parent': parent,
+            'attrs': attrs,
+            'user_attrs': list(user_attrs or {}),
+            'locked': set(),
+        }
+        attrs.update(user_attrs or {})
+        return name
+    
+    def path(self, name):
+        """Return the long DAG path of a node"""
+        parts = []
+        while name:
+            parts.append(name)
+            name = self.nodes[name].get('parent')
+        return '|' + '|'.join(reversed(parts))
+    
+    # Evaluation -------------------------------------------------------------
+    
+    def evaluate(self, node, attr, time=None):
+        """Return a scalar attribute value at a time"""
+        curve = self.curves.get(f"{node}.{attr}")
+        if curve is not None and curve['keys']:
+            return self.evaluate_curve(curve, self.time if time is None else time)
+        return self.nodes[node]['attrs'][attr]
+    
+    def evaluate_curve(self, curve, time):
+        """Linearly interpolate a curve's keys, holding the ends"""
+        arrays = self.curve_arrays.get(curve['name'])
+        if arrays is None:
+            times = sorted(curve['keys'])
+            arrays = (np.array(times), np.array([curve['keys'][t] for t in times]))
+            self.curve_arrays[curve['name']] = arrays
+        return float(np.interp(time, *arrays))
+    
+    def local_matrix(self, node, time=None):
+        """Return a node's local matrix (scale, rotate, joint orient, translate)"""
+        get = lambda attr: self.evaluate(node, attr, time)
+        rotation = ikfk_solver.euler_to_rotation([[get('rotateX'), get('rotateY'), get('rotateZ')]],
+                                                 get('rotateOrder'))[0]
+        if self.nodes[node]['type'] == 'joint':
+            orient = [[get('jointOrientX'), get('jointOrientY'), get('jointOrientZ')]]
+            rotation = rotation @ ikfk_solver.euler_to_rotation(orient, 0)[0]
+        rotation = np.diag([get('scaleX'), get('scaleY'), get('scaleZ')]) @ rotation
+        translate = np.array([[get('translateX'), get('translateY'), get('translateZ')]])
+        return ikfk_solver.compose(rotation[None], translate)[0]
+    
+    def world_matrix(self, node, time=None):
+        """Return a node's world matrix, memoized until the scene is edited"""
+        key = (node, self.time if time is None else float(time))
+        matrix = self.world_matrices.get(key)
+        if matrix is None:
+            matrix = self.local_matrix(node, time) @ self.parent_matrix(node, time)
+            self.world_matrices[key] = matrix
+        return matrix
+    
+    def parent_matrix(self, node, time=None):
+        """Return the world matrix of a node's parent"""
+        parent = self.nodes[node].get('parent')
+        return self.world_matrix(parent, time) if parent else np.eye(4)
+    
+    # maya.cmds --------------------------------------------------------------
+    
+    def ls(self, *patterns, **kwargs):
+        """cmds.ls: name patterns, type, selection and long names"""
+        if kwargs.get('selection') or kwargs.get('sl'):
+            names = list(self.selection)
+        else:
+            names = list(self.nodes)
+        if patterns:
+            flat = []
+            for pattern in patterns:
+                flat += pattern if isinstance(pattern, (list, tuple)) else [pattern]
+            names = [n for n in names if any(fnmatch.fnmatchcase(n, p) for p in flat)]
+        
+        node_type = kwargs.get('type')
+        if node_type == 'transform':
+            names = [n for n in names if self.nodes.get(n, {}).get('type') in ('transform', 'joint')]
+        elif node_type:
+            names = [n for n in names if self.nodes.get(n, {}).get('type') == node_type]
+        
+        if kwargs.get('long'):
+            names = [self.path(n) for n in names]
+        return names
+    
+    def select(self, *names, **kwargs):
+        """cmds.select"""
+        if kwargs.get('clear'):
+            self.selection = []
+            return
+        flat = []
+        for name in names:
+            flat += name if isinstance(name, (list, tuple)) else [name]
+        self.selection = flat if not kwargs.get('add') else self.selection + flat
+    
+    def objExists(self, name):
+        """cmds.objExists"""
+        return name in self.nodes
+    
+    def objectType(self, name):
+        """cmds.objectType"""
+        return self.nodes[name]['type']
+    
+    nodeType = objectType
+    
+    def attributeQuery(self, attr, node=None, exists=False, **kwargs):
+        """cmds.attributeQuery(exists=True)"""
+        return node in self.nodes and attr in self.nodes[node]['attrs']
+    
+    def addAttr(self, node, longName=None, dataType=None, **kwargs):
+        """cmds.addAttr for a user attribute (string attributes start empty)"""
+        self.nodes[node]['attrs'][longName] = '' if dataType == 'string' else kwargs.get('defaultValue', 0.0)
+        self.nodes[node]['user_attrs'].append(longName)
+    
+    def listAttr(self, node, userDefined=False, **kwargs):
+        """cmds.listAttr(userDefined=True)"""
+        node = node.split('|')[-1]
+        if userDefined:
+            return list(self.nodes[node]['user_attrs']) or None
+        return list(self.nodes[node]['attrs'])
+    
+    def getAttr(self, plug, time=None, lock=False, settable=False, **kwargs):
+        """cmds.getAttr, including time= evaluation of matrices and animated channels"""
+        node, attr, index = split_plug(plug)
+        if self.nodes[node]['type'].startswith('animCurve'):
+            raise RuntimeError(f"getAttr on anim curve attribute {plug} is not supported")
+        if lock:
+            return attr in self.nodes[node]['locked']
+        if settable:
+            return attr not in self.nodes[node]['locked']
+        
+        if attr == 'worldMatrix':
+            return self.world_matrix(node, time).flatten().tolist()
+        if attr == 'parentMatrix':
+            return self.parent_matrix(node, time).flatten().tolist()
+        if attr == 'matrix':
+            return self.local_matrix(node, time).flatten().tolist()
+        if attr in ('translate', 'rotate', 'scale', 'jointOrient'):
+            return [tuple(self.evaluate(node, attr + axis, time) for axis in 'XYZ')]
+        return self.evaluate(node, attr, time)
+    
+    def setAttr(self, plug, *values, **kwargs):
+        """cmds.setAttr, including ranges of an anim curve's keyTimeValue array"""
+        node, attr, index = split_plug(plug)
+        self.invalidate()
+        if 'lock' in kwargs:
+            locked = self.nodes[node]['locked']
+            (locked.add if kwargs['lock'] else locked.discard)(attr)
+            if not values:
+                return
+        
+        if attr in ('keyTimeValue', 'ktv'):
+            first, _, last = index.strip('[]').partition(':')
+            self.set_key_time_values(node, int(first), int(last or first), values)
+            return
+        if attr in self.nodes[node]['locked']:
+            raise RuntimeError(f"The attribute '{plug}' is locked")
+        self.nodes[node]['attrs'][attr] = values[0]
+    
+    def set_key_time_values(self, curve_name, first, last, values):
+        """Replace keys first..last (by index) with (time, value) pairs"""
+        curve = self.curves[self.nodes[curve_name]['plug']]
+        times = sorted(curve['keys'])
+        for i, position in enumerate(range(first, last + 1)):
+            time = float(values[2 * i])
+            if time != times[position]:
+                del curve['keys'][times[position]]
+            curve['keys'][time] = float(values[2 * i + 1])
+    
+    def connectionInfo(self, plug, sourceFromDestination=False, **kwargs):
+        """cmds.connectionInfo(sourceFromDestination=True); only anim curves are connected"""
+        curve = self.curves.get(plug)
+        return f"{curve['name']}.output" if curve else ''
+    
+    def get_curve(self, node, attr, create=False):
+        """Return the anim curve driving node.attr, creating it if asked"""
+        plug = f"{node}.{attr}"
+        curve = self.curves.get(plug)
+        if curve is None and create:
+            kind = 'animCurveTA' if attr.startswith('rotate') else 'animCurveTL' if attr.startswith('translate') else 'animCurveTU'
+            curve = {'name': f"{node}_{attr}", 'keys': {}}
+            self.curves[plug] = curve
+            self.nodes[curve['name']] = {'type': kind, 'parent': None, 'attrs': {}, 'user_attrs': [],
+                                         'locked': set(), 'plug': plug}
+        return curve
+    
+    def setKeyframe(self, node=None, attribute=None, time=None, value=None, **kwargs):
+        """cmds.setKeyframe for one attribute at one or many times"""
+        attributes = attribute if isinstance(attribute, (list, tuple)) else [attribute]
+        if time is None:
+            times = [self.time]
+        elif isinstance(time, (list, tuple)) and time and isinstance(time[0], (list, tuple)):
+            times = [t[0] for t in time]
+        elif isinstance(time, (list, tuple)):
+            times = sorted(set(time))
+        else:
+            times = [time]
+        
+        self.invalidate()
+        for attr in attributes:
+            if attr in self.nodes[node]['locked']:
+                raise RuntimeError(f"The attribute '{node}.{attr}' is locked")
+            curve = self.get_curve(node, attr, create=True)
+            for t in times:
+                key_value = value if value is not None else self.nodes[node]['attrs'][attr]
+                curve['keys'][float(t)] = float(key_value)
+        return len(times) * len(attributes)
+    
+    def keyframe(self, targets=None, query=False, name=False, timeChange=False, valueChange=False,
+                 indexValue=False, time=None, **kwargs):
+        """cmds.keyframe(query=True) for curve names, key times, values and indices"""
+        targets = targets if isinstance(targets, (list, tuple)) else [targets]
+        curves = []
+        for target in targets:
+            target = target.split('|')[-1]
+            if target in self.nodes and self.nodes[target]['type'].startswith('animCurve'):
+                curves.append(self.curves[self.nodes[target]['plug']])
+            elif '.' in target:
+                curves += [self.curves[target]] if target in self.curves else []
+            else:
+                curves += [curve for plug, curve in self.curves.items() if plug.split('.')[0] == target]
+        
+        if name:
+            return [curve['name'] for curve in curves] or None
+        result = []
+        for curve in curves:
+            for index, t in enumerate(sorted(curve['keys'])):
+                if time is not None and not time[0] <= t <= time[1]:
+                    continue
+                if indexValue:
+                    result.append(index)
+                    continue
+                if timeChange:
+                    result.append(t)
+                if valueChange or not timeChange:
+                    result.append(curve['keys'][t])
+        return result or None
+    
+    def cutKey(self, node, attribute=None, time=None, **kwargs):
+        """cmds.cutKey for one or several time ranges of one attribute"""
+        curve = self.get_curve(node, attribute)
+        self.invalidate()
+        if curve is None:
+            return 0
+        ranges = time if time and isinstance(time[0], (list, tuple)) else [time]
+        removed = [t for t in curve['keys']
+                   if any(span is None or span[0] <= t <= span[1] for span in ranges)]
+        for t in removed:
+            del curve['keys'][t]
+        return len(removed)
+    
+    def keyTangent(self, node, attribute=None, time=None, query=False, **kwargs):
+        """cmds.keyTangent; stand-in curves always interpolate linearly (angles query as 0)"""
+        if node in self.nodes and self.nodes[node]['type'].startswith('animCurve'):
+            curve = self.curves[self.nodes[node]['plug']]
+        else:
+            curve = self.get_curve(node, attribute)
+        if curve is None:
+            return None if query else 0
+        times = [t for t in curve['keys'] if time is None or time[0] <= t <= time[1]]
+        if query:
+            return [0.0] * len(times) or None
+        return len(times)
+    
+    def currentTime(self, time=None, query=False, **kwargs):
+        """cmds.currentTime"""
+        if query:
+            return self.time
+        self.time = float(time)
+        return self.time
+    
+    def autoKeyframe(self, query=False, state=None, **kwargs):
+        """cmds.autoKeyframe(query=True, state=True) / cmds.autoKeyframe(state=bool)"""
+        if query:
+            return self.autokey_state
+        self.autokey_state = bool(state)
+    
+    def playbackOptions(self, query=False, minTime=False, maxTime=False, **kwargs):
+        """cmds.playbackOptions(query=True, minTime/maxTime=True)"""
+        if query:
+            return self.min_time if minTime else self.max_time
+        self.min_time = kwargs.get('min', self.min_time)
+        self.max_time = kwargs.get('max', self.max_time)
+    
+    def undoInfo(self, openChunk=False, closeChunk=False, **kwargs):
+        """cmds.undoInfo(openChunk/closeChunk); tracks the nesting depth"""
+        if openChunk:
+            self.undo_depth += 1
+        if closeChunk:
+            self.undo_depth -= 1
+    
+    def refresh(self, suspend=None, **kwargs):
+        """cmds.refresh(suspend=...)"""
+        if suspend is not None:
+            self.refresh_suspended = suspend
+    
+    def evaluationManager(self, query=False, mode=None, **kwargs):
+        """cmds.evaluationManager(mode=...)"""
+        if query:
+            return [self.evaluation_mode]
+        self.evaluation_mode = mode
+    
+    def warning(self, message):
+        """cmds.warning"""
+        sys.stderr.write(f"Warning: {message}\n")
+    
+    def file(self, path=None, query=False, sceneName=False, reference=False, open=False, force=False,
+             rename=None, save=False, new=False, exportAll=False, **kwargs):
+        """cmds.file for stand-in scenes saved as JSON"""
+        if query:
+            return list(self.references) if reference else self.scene_name
+        if new:
+            self.new_scene()
+        elif open:
+            self.load(path)
+        elif exportAll:
+            self.save(path)
+            return path
+        elif rename:
+            self.scene_name = rename
+        elif save:
+            self.save(self.scene_name)
+        return self.scene_name
+    
+    # Persistence --------------------------------------------------------------
+    
+    def save(self, path):
+        """Write the scene to a JSON file"""
+        data = {
+            'time': self.time,
+            'range': [self.min_time, self.max_time],
+            'nodes': {name: dict(node, locked=sorted(node['locked']))
+                      for name, node in self.nodes.items() if not node['type'].startswith('animCurve')},
+            'curves': {plug: {str(t): v for t, v in curve['keys'].items()}
+                       for plug, curve in self.curves.items()},
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f)
+    
+    def load(self, path):
+        """Replace the scene with one saved by save()"""
+        with open(path) as f:
+            data = json.load(f)
+        self.new_scene()
+        self.scene_name = path
+        self.time = data['time']
+        self.min_time, self.max_time = data['range']
+        for name, node in data['nodes'].items():
+            node['locked'] = set(node['locked'])
+            self.nodes[name] = node
+        for plug, keys in data['curves'].items():
+            node, attr, _ = split_plug(plug)
+            curve = self.get_curve(node, attr, create=True)
+            curve['keys'] = {float(t): v for t, v in keys.items()}
+        self.invalidate()
+
+
+def add_rig(cmds, rig_type, namespace='', presets=None, arm_bend=30.0):
+    """
+    Build a synthetic rig for a preset: for each limb, a root with a
+    three-control FK chain bending in its XY plane, an IK end control and
+    pole control under the root and a switch control carrying the switch
+    attribute (set to FK).
+    """
+    if presets is None:
+        from switch_core import RIG_PRESETS as presets
+    prefix = f"{namespace}:" if namespace else ''
+    root = cmds.add_transform(f"{prefix}rig_root")
+    
+    for i, (limb, limb_data) in enumerate(sorted(presets[rig_type].items())):
+        limb_root = cmds.add_transform(f"{prefix}{limb}_root", parent=root, translateX=20.0 * i)
+        parent = limb_root
+        for n, ctrl in enumerate(limb_data['fk']):
+            name = f"{prefix}{ctrl}"
+            if cmds.objExists(name):
+                continue
+            parent = cmds.add_transform(name, parent=parent, translateX=10.0 if n else 0.0,
+                                        rotateZ=-arm_bend if n == 1 else 0.0)
+        ik_ctrl, pole_ctrl = [f"{prefix}{ctrl}" for ctrl in limb_data['ik']]
+        if not cmds.objExists(ik_ctrl):
+            cmds.add_transform(ik_ctrl, parent=limb_root, translateX=19.0, translateY=-4.0)
+        if not cmds.objExists(pole_ctrl):
+            cmds.add_transform(pole_ctrl, parent=limb_root, translateX=10.0, translateY=10.0)
+        switch_ctrl = f"{prefix}{limb_data['switch']}"
+        if not cmds.objExists(switch_ctrl):
+            cmds.add_transform(switch_ctrl, parent=limb_root, user_attrs={limb_data['switch_attr']: 0.0})
+        elif not cmds.attributeQuery(limb_data['switch_attr'], node=switch_ctrl, exists=True):
+            cmds.nodes[switch_ctrl]['attrs'][limb_data['switch_attr']] = 0.0
+            cmds.nodes[switch_ctrl]['user_attrs'].append(limb_data['switch_attr'])
+    return root
+
+
+def install(cmds=None):
+    """Register a stand-in as maya.cmds (replacing any previous stand-in) and return it"""
+    cmds = cmds or StandInCmds()
+    maya = sys.modules.get('maya') or types.ModuleType('maya')
+    maya.cmds = cmds
+    sys.modules['maya'] = maya
+    sys.modules['maya.cmds'] = cmds
+    return cmds
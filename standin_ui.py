@@ -0,0 +1,157 @@
+"""
+Stand-in Qt and Maya UI modules for the GT Custom Rig Interface
+Permissive PySide2, shiboken2, maya.mel, maya.OpenMayaUI and
+maya.api.OpenMaya modules in which every widget, call and attribute is
+accepted and does nothing, except the combo box, which keeps its items
+and emits currentTextChanged like Qt. With them (and the stand-in
+maya.cmds) the dialog can be built outside Maya, so the scene commands it
+issues before its window appears can be counted.
+    
+    import standin_cmds, standin_ui
+    standin_cmds.install()
+    switcher = standin_ui.import_switcher()
+    dialog = switcher.GTCustomRigInterface()
+"""
+
+import importlib
+import inspect
+import sys
+import types
+
+
+UI_MODULES = ('PySide2', 'PySide2.QtCore', 'PySide2.QtWidgets', 'PySide2.QtGui', 'shiboken2',
+              'maya.mel', 'maya.OpenMayaUI', 'maya.api', 'maya.api.OpenMaya')
+POSITIONAL_KINDS = (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)
+
+
+class Anything(object):
+    """A widget, signal, enum or return value that accepts any use and does nothing"""
+    
+    def __init__(self, *args, **kwargs):
+        pass
+    
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return Anything()
+    
+    def __call__(self, *args, **kwargs):
+        return Anything()
+    
+    def __iter__(self):
+        return iter(())
+    
+    def __bool__(self):
+        return False
+    
+    def __int__(self):
+        return 0
+    
+    def __float__(self):
+        return 0.0
+    
+    def __or__(self, other):
+        return self
+    
+    __ror__ = __xor__ = __and__ = __add__ = __sub__ = __mul__ = __truediv__ = __or__
+
+
+class Signal(object):
+    """A Qt signal: connected slots are called on emit"""
+    
+    def __init__(self):
+        self.slots = []
+    
+    def connect(self, slot):
+        self.slots.append(slot)
+    
+    def emit(self, *args):
+        """Call every slot with as many of the arguments as it takes, as PySide does"""
+        for slot in list(self.slots):
+            kinds = [parameter.kind for parameter in inspect.signature(slot).parameters.values()]
+            if inspect.Parameter.VAR_POSITIONAL in kinds:
+                slot(*args)
+            else:
+                slot(*args[:sum(kind in POSITIONAL_KINDS for kind in kinds)])
+
+
+class ComboBox(Anything):
+    """QComboBox keeping its items and emitting currentTextChanged, unless signals are blocked"""
+    
+    def __init__(self, *args, **kwargs):
+        self.items = []
+        self.index = -1
+        self.blocked = False
+        self.currentTextChanged = Signal()
+    
+    def addItems(self, items):
+        self.items += list(items)
+        if self.index < 0 and self.items:
+            self.set_index(0)
+    
+    def clear(self):
+        self.items = []
+        self.set_index(-1)
+    
+    def count(self):
+        return len(self.items)
+    
+    def currentText(self):
+        return self.items[self.index] if self.index >= 0 else ''
+    
+    def setCurrentText(self, text):
+        if text in self.items:
+            self.set_index(self.items.index(text))
+    
+    def blockSignals(self, blocked):
+        previous, self.blocked = self.blocked, blocked
+        return previous
+    
+    def set_index(self, index):
+        if index != self.index:
+            self.index = index
+            if not self.blocked:
+                self.currentTextChanged.emit(self.currentText())
+
+
+def make_module(name, **attrs):
+    """Return a module answering every other attribute with Anything"""
+    module = types.ModuleType(name)
+    module.__getattr__ = lambda attr: Anything()
+    module.__dict__.update(attrs)
+    return module
+
+
+def import_switcher():
+    """
+    Import switcher.py against the stand-in UI modules (maya.cmds must
+    already be the stand-in). They are removed again afterwards, so other
+    tool modules still see no Maya API.
+    """
+    previous = {name: sys.modules.get(name) for name in UI_MODULES + ('switcher',)}
+    widgets = make_module('PySide2.QtWidgets', QDialog=Anything, QComboBox=ComboBox)
+    modules = {
+        'PySide2.QtCore': make_module('PySide2.QtCore'),
+        'PySide2.QtWidgets': widgets,
+        'PySide2.QtGui': make_module('PySide2.QtGui'),
+        'shiboken2': make_module('shiboken2'),
+        'maya.mel': make_module('maya.mel'),
+        'maya.OpenMayaUI': make_module('maya.OpenMayaUI'),
+        'maya.api.OpenMaya': make_module('maya.api.OpenMaya'),
+    }
+    modules['PySide2'] = make_module('PySide2', QtCore=modules['PySide2.QtCore'], QtWidgets=widgets,
+                                     QtGui=modules['PySide2.QtGui'])
+    modules['maya.api'] = make_module('maya.api', OpenMaya=modules['maya.api.OpenMaya'])
+    
+    sys.modules.pop('switcher', None)
+    sys.modules.update(modules)
+    try:
+        return importlib.import_module('switcher')
+    finally:
+        for name, module in previous.items():
+            if name == 'switcher':
+                continue
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
@@ -0,0 +1,792 @@
+"""
+GT Custom Rig Interface - switching core
+Everything needed to detect, match, switch and bake IK/FK limbs, with no
+Qt dependency, so it runs in the dialog, in mayapy batch jobs and against
+the stand-in maya.cmds from standin_cmds.py.
+"""
+
+import contextlib
+import time
+
+import numpy as np
+import maya.cmds as cmds
+
+import bake_fingerprint
+import ikfk_solver
+import profiler
+from chain_geometry import ChainGeometryCache
+from control_cache import ResolvedControlCache, namespaced
+from curve_reduction import DEFAULT_TOLERANCES, channel_kind
+from detection_cache import get_detection_cache
+from key_writer import KeyWriter
+from preset_registry import get_registry
+from scene_index import get_scene_index
+
+
+# Rig presets by name, loaded from the preset folders (see preset_registry.py);
+# the registry refreshes this dict in place when a preset file changes
+RIG_PRESETS = get_registry().presets
+
+
+class BakeCancelled(Exception):
+    """Raised when a progress callback cancels a bake between chunks"""
+    
+    def __init__(self, frames_written=0):
+        super(BakeCancelled, self).__init__(frames_written)
+        # Frames already keyed by earlier windows of a windowed bake
+        self.frames_written = frames_written
+
+
+@contextlib.contextmanager
+def bake_context(undo_name, suspend_refresh=True, evaluation_mode=None):
+    """
+    Run scene edits as a single undo step, optionally with the viewport
+    suspended and a different evaluation mode. Everything is restored on
+    exit, including when an exception is raised.
+    """
+    previous_mode = None
+    cmds.undoInfo(openChunk=True, chunkName=undo_name)
+    try:
+        if evaluation_mode:
+            current_mode = cmds.evaluationManager(query=True, mode=True)[0]
+            if current_mode != evaluation_mode:
+                previous_mode = current_mode
+                cmds.evaluationManager(mode=evaluation_mode)
+        if suspend_refresh:
+            cmds.refresh(suspend=True)
+        yield
+    finally:
+        if suspend_refresh:
+            cmds.refresh(suspend=False)
+        if previous_mode:
+            cmds.evaluationManager(mode=previous_mode)
+        cmds.undoInfo(closeChunk=True)
+
+
+def is_writable(plug):
+    """Return True if a channel can be set or keyed (unlocked, and free or already animated)"""
+    if cmds.getAttr(plug, lock=True):
+        return False
+    source = cmds.connectionInfo(plug, sourceFromDestination=True)
+    return not source or cmds.nodeType(source.split('.')[0]).startswith('animCurve')
+
+
+class SwitchCore(object):
+    """Detect, match, switch and bake the limbs of one rig (preset + namespace)"""
+    
+    # Bakes report progress (and can be cancelled) roughly this often
+    CHUNK_SECONDS = 0.05
+    MAX_CHUNK_FRAMES = 1000
+    
+    # Parallel sampling only pays for the worker start-up on long ranges
+    PARALLEL_MIN_FRAMES = 2000
+    
+    # Bytes a bake window holds per frame for every sampled matrix plug and every
+    # keyed channel (sampled values, solver arrays, buffered keys); see get_window_frames
+    SAMPLE_BYTES = 2048
+    KEY_BYTES = 512
+    MIN_WINDOW_FRAMES = 100
+    
+    def __init__(self, rig_type=None, namespace="", control_cache=None, chain_cache=None):
+        self.rig_type = None
+        self.namespace = namespace
+        self.limb_controls = {}
+        self.control_cache = control_cache if control_cache is not None else ResolvedControlCache()
+        self.chain_cache = chain_cache if chain_cache is not None else ChainGeometryCache()
+        self.last_bake_stats = None
+        
+        # Options, set by the dialog or the batch command line
+        self.autokey = False
+        self.use_playhead = False
+        self.dg_evaluation = False
+        self.parallel_workers = 0
+        self.reduce_keys = False
+        self.reduce_tolerances = dict(DEFAULT_TOLERANCES)
+        self.incremental = False
+        self.memory_limit_mb = 512
+        
+        # Detections are remembered per shot for the dialog; batch workers leave the user's cache alone
+        self.remember_detection = True
+        
+        if rig_type:
+            self.set_rig(rig_type)
+    
+    def set_rig(self, rig_type, namespace=None):
+        """Select the rig preset (and optionally the namespace) to work on"""
+        self.rig_type = rig_type
+        self.limb_controls = RIG_PRESETS[rig_type].copy()
+        if namespace is not None:
+            self.namespace = namespace
+    
+    def detect_rig(self):
+        """Return (rig_type, namespaces) for the first preset found in the scene, or (None, [])"""
+        with profiler.operation('detect'):
+            registry = get_registry()
+            registry.refresh()
+            rig_type, namespaces = registry.detect(get_scene_index())
+            if rig_type and self.remember_detection:
+                get_detection_cache().store(cmds.file(query=True, sceneName=True), rig_type, namespaces)
+            return rig_type, namespaces
+    
+    def cached_detection(self):
+        """
+        Return the remembered detect_rig result for the open scene (see
+        detection_cache.py) if its references are unchanged and its first
+        character is still there, else None. Costs three commands, and the
+        remembered switch attributes are tried first when limbs resolve.
+        """
+        with profiler.operation('detect'):
+            entry = get_detection_cache().get(cmds.file(query=True, sceneName=True))
+            if not entry:
+                return None
+            
+            rig_type, namespaces = entry['rig_type'], entry['namespaces']
+            if rig_type not in RIG_PRESETS:
+                return None
+            limb_data = next(iter(RIG_PRESETS[rig_type].values()))
+            if not cmds.objExists(namespaced(limb_data['switch'], namespaces[0])):
+                return None
+            self.control_cache.remember_switch_attrs(rig_type, entry['switch_attrs'])
+            return rig_type, list(namespaces)
+    
+    def remember_switch_attrs(self):
+        """Add the switch attributes resolved so far to the open scene's detection cache entry"""
+        if self.rig_type and self.remember_detection:
+            get_detection_cache().update_switch_attrs(cmds.file(query=True, sceneName=True), self.rig_type,
+                                                      self.control_cache.switch_attrs(self.rig_type))
+    
+    def find_namespaces(self, rig_type=None):
+        """Return every namespace holding a character of the given (or current) rig type"""
+        with profiler.operation('detect'):
+            rig_type = rig_type or self.rig_type
+            if rig_type not in RIG_PRESETS:
+                return []
+            return get_scene_index().find_rig_namespaces(RIG_PRESETS[rig_type])
+    
+    @contextlib.contextmanager
+    def in_namespace(self, namespace):
+        """Temporarily work on another character of the same rig type"""
+        previous = self.namespace
+        self.namespace = namespace
+        try:
+            yield
+        finally:
+            self.namespace = previous
+    
+    def get_limbs_for_nodes(self, nodes):
+        """Return the limbs that own at least one of the given nodes"""
+        registry = get_registry()
+        limbs = []
+        
+        # Reverse index lookups: one per node, however many presets and limbs exist
+        for node in nodes:
+            for rig_type, limb, namespace in registry.owners(node):
+                if rig_type == self.rig_type and namespace == self.namespace and limb not in limbs:
+                    limbs.append(limb)
+        
+        return limbs
+    
+    def get_character_limbs_for_nodes(self, nodes, namespaces):
+        """Return [(namespace, limb)] for every character limb owning one of the nodes"""
+        character_limbs = []
+        for namespace in namespaces:
+            with self.in_namespace(namespace):
+                character_limbs += [(namespace, limb) for limb in self.get_limbs_for_nodes(nodes)]
+        return character_limbs
+    
+    def plan_switches(self, limbs, target_mode=None):
+        """
+        Return ([(limb, from_mode, to_mode)], missing_limbs), toggling each
+        limb when target_mode is None and skipping limbs already there.
+        """
+        switches = []
+        missing = []
+        
+        for limb in limbs:
+            current_mode = self.detect_current_mode(limb)
+            if current_mode is None:
+                missing.append(limb)
+                continue
+            
+            to_mode = target_mode or ('fk' if current_mode == 'ik' else 'ik')
+            if current_mode != to_mode:
+                switches.append((limb, current_mode, to_mode))
+        
+        return switches, missing
+    
+    def plan_character_switches(self, character_limbs, target_mode=None):
+        """
+        plan_switches across characters: takes [(namespace, limb)] and returns
+        ([(namespace, limb, from_mode, to_mode)], [(namespace, limb)] missing).
+        """
+        with profiler.operation('plan'):
+            switches = []
+            missing = []
+            
+            for namespace, limb in character_limbs:
+                with self.in_namespace(namespace):
+                    planned, not_found = self.plan_switches([limb], target_mode)
+                switches += [(namespace,) + switch for switch in planned]
+                missing += [(namespace, limb) for limb in not_found]
+            
+            return switches, missing
+    
+    def perform_switches(self, switches, start=None, end=None, mode='bake', progress=None):
+        """
+        Perform a list of (limb, from_mode, to_mode) switches as one undo step.
+        With autokey and a valid start/end they are baked (densely, or on the
+        existing keys only when mode is 'sparse'); otherwise they are matched
+        on the current frame. Returns the bake stats, or None for a single frame.
+        """
+        return self.perform_character_switches([(self.namespace,) + tuple(switch) for switch in switches],
+                                               start, end, mode, progress)
+    
+    def perform_character_switches(self, switches, start=None, end=None, mode='bake', progress=None):
+        """
+        perform_switches for (namespace, limb, from_mode, to_mode) switches on
+        any number of characters, all sampled and written in a single sweep.
+        """
+        bake = (self.autokey and start is not None and end is not None and start <= end
+                and (mode == 'sparse' or start < end))
+        evaluation_mode = 'off' if bake and self.dg_evaluation else None
+        
+        jobs = []
+        with profiler.operation('resolve'):
+            for namespace, limb, from_mode, to_mode in switches:
+                with self.in_namespace(namespace):
+                    jobs.append(self.make_switch_job(limb, from_mode, to_mode))
+        
+        # One undo step per call, however many characters, limbs and frames it touches
+        stats = None
+        with bake_context("gtSwitchLimbs", suspend_refresh=bake, evaluation_mode=evaluation_mode):
+            if bake:
+                with profiler.operation('bake'):
+                    stats = self.bake_switches(jobs, start, end, sparse=mode == 'sparse', progress=progress)
+            else:
+                with profiler.operation('match'):
+                    self.run_switch_jobs(jobs, [cmds.currentTime(query=True)], bake=False)
+        
+        # A windowed bake cancelled after its first window has keyed part of the range
+        if stats and stats['cancelled'] and stats.get('frames_written') and cmds.undoInfo(query=True, state=True):
+            cmds.undo()
+            stats['frames_written'] = 0
+        return stats
+    
+    def get_control_name(self, control):
+        """Get the full control name with namespace"""
+        if self.namespace:
+            return f"{self.namespace}:{control}"
+        return control
+    
+    def resolve_limb(self, limb):
+        """Return the cached resolved controls for a limb, or None if it is not in the scene"""
+        with profiler.operation('resolve'):
+            return self.control_cache.get(self.rig_type, self.namespace, limb, self.limb_controls.get(limb))
+    
+    def detect_current_mode(self, limb):
+        """Detect if limb is currently in IK or FK mode"""
+        resolved = self.resolve_limb(limb)
+        if not resolved or not resolved['switch_attr']:
+            return None
+        
+        value = cmds.getAttr(f"{resolved['switch_ctrl']}.{resolved['switch_attr']}")
+        # 0 = FK, 1 = IK for most rigs
+        return 'ik' if value > 0.5 else 'fk'
+    
+    def get_switch_attr(self, limb):
+        """Return (switch_ctrl, switch_attr) for a limb, or (switch_ctrl, None)"""
+        resolved = self.resolve_limb(limb)
+        if not resolved:
+            return self.get_control_name(self.limb_controls[limb]['switch']), None
+        return resolved['switch_ctrl'], resolved['switch_attr']
+    
+    def get_value_at(self, plug, frame):
+        """Read a plug value at a frame without moving the global time"""
+        return cmds.getAttr(plug, time=frame)
+    
+    def make_switch_job(self, limb, from_mode, to_mode):
+        """Resolve everything a switch needs for one limb up front"""
+        limb_data = self.limb_controls[limb]
+        resolved = self.resolve_limb(limb) or {
+            'switch_ctrl': self.get_control_name(limb_data['switch']),
+            'switch_attr': None,
+            'fk': [self.get_control_name(ctrl) for ctrl in limb_data['fk']],
+            'ik': [self.get_control_name(ctrl) for ctrl in limb_data['ik']],
+            'match': False,
+        }
+        job = {
+            'namespace': self.namespace,
+            'limb': limb,
+            'from_mode': from_mode,
+            'to_mode': to_mode,
+            'switch_ctrl': resolved['switch_ctrl'],
+            'switch_attr': resolved['switch_attr'],
+            'target_value': 1 if to_mode == 'ik' else 0,
+            'fk': resolved['fk'],
+            'ik': resolved['ik'],
+            'match': resolved['match'],
+        }
+        if not job['match']:
+            return job
+        
+        job['rotate_orders'] = resolved['rotate_orders']
+        job['joint_orients'] = resolved['joint_orients']
+        
+        if to_mode == 'fk':
+            channels = [(ctrl, f"rotate{axis}") for ctrl in job['fk'] for axis in 'XYZ']
+        else:
+            ik_ctrl, pole_ctrl = job['ik']
+            channels = ([(ik_ctrl, f"translate{axis}") for axis in 'XYZ']
+                        + [(ik_ctrl, f"rotate{axis}") for axis in 'XYZ']
+                        + [(pole_ctrl, f"translate{axis}") for axis in 'XYZ'])
+        
+        # Checked once per resolved limb; the cache drops the entry when a lock or input connection changes
+        writable = resolved['writable']
+        for node, attr in channels:
+            if (node, attr) not in writable:
+                writable[(node, attr)] = is_writable(f"{node}.{attr}")
+        job['channels'] = {channel for channel in channels if writable[channel]}
+        return job
+    
+    def get_match_plugs(self, job):
+        """Return the matrix plugs a job needs sampled"""
+        if not job['match']:
+            return []
+        
+        plugs = [f"{ctrl}.worldMatrix[0]" for ctrl in job['fk']]
+        plugs += [f"{ctrl}.parentMatrix[0]" for ctrl in job['fk']]
+        # Matching FK reads where the IK controls are; matching IK only where they hang from
+        matrix = 'worldMatrix' if job['to_mode'] == 'fk' else 'parentMatrix'
+        plugs += [f"{ctrl}.{matrix}[0]" for ctrl in job['ik']]
+        return plugs
+    
+    def sample_plugs(self, plugs, frames, use_playhead=False, progress=None):
+        """Sample matrix plugs over all frames in one pass, returning {plug: (frames, 4, 4)}"""
+        if not plugs:
+            return {}
+        
+        rows = []
+        current_time = cmds.currentTime(query=True) if use_playhead else None
+        try:
+            for chunk in self.iter_frame_chunks(frames, progress):
+                for frame in chunk:
+                    if use_playhead:
+                        cmds.currentTime(frame)
+                        rows.append([cmds.getAttr(plug) for plug in plugs])
+                    else:
+                        rows.append([self.get_value_at(plug, frame) for plug in plugs])
+        finally:
+            if use_playhead:
+                cmds.currentTime(current_time)
+        
+        matrices = ikfk_solver.as_matrices(rows)
+        return {plug: matrices[:, i] for i, plug in enumerate(plugs)}
+    
+    def iter_frame_chunks(self, frames, progress=None):
+        """
+        Yield frames in chunks sized to take about CHUNK_SECONDS each,
+        reporting progress between chunks and stopping if it returns False.
+        """
+        if progress is None:
+            yield frames
+            return
+        
+        index = 0
+        chunk_size = 1
+        while index < len(frames):
+            chunk = frames[index:index + chunk_size]
+            timer = time.perf_counter()
+            yield chunk
+            frame_cost = (time.perf_counter() - timer) / len(chunk)
+            index += len(chunk)
+            
+            if not progress(index, len(frames)):
+                raise BakeCancelled()
+            
+            # Adapt to the measured cost so event processing stays a small overhead
+            if frame_cost > 0:
+                chunk_size = int(min(max(self.CHUNK_SECONDS / frame_cost, 1), self.MAX_CHUNK_FRAMES))
+            else:
+                chunk_size = self.MAX_CHUNK_FRAMES
+    
+    def solve_switch_job(self, job, samples):
+        """Solve the matched control values for a job, returning [(node, attr, values)]"""
+        def sampled(ctrl, attr):
+            return samples[f"{ctrl}.{attr}[0]"]
+        
+        fk_world = np.stack([sampled(ctrl, 'worldMatrix') for ctrl in job['fk']], axis=1)
+        fk_parent = np.stack([sampled(ctrl, 'parentMatrix') for ctrl in job['fk']], axis=1)
+        ik_ctrl, pole_ctrl = job['ik']
+        writes = []
+        
+        # Bone lengths and control offsets are fixed by the rig; measured once per character
+        geometry = self.chain_cache.get_or_measure(job['namespace'], self.rig_type, job['limb'],
+                                                   fk_world, fk_parent)
+        
+        if job['to_mode'] == 'fk':
+            world, local = ikfk_solver.match_fk_to_ik(fk_world, fk_parent,
+                                                      sampled(ik_ctrl, 'worldMatrix'),
+                                                      sampled(pole_ctrl, 'worldMatrix'),
+                                                      chain_offsets=geometry['chain_offsets'],
+                                                      lengths=geometry['lengths'],
+                                                      between=geometry['between'])
+            for i, ctrl in enumerate(job['fk']):
+                _, rotate = ikfk_solver.decompose(local[:, i], job['rotate_orders'][ctrl],
+                                                  job['joint_orients'].get(ctrl))
+                writes += [(ctrl, f"rotate{axis}", rotate[:, n]) for n, axis in enumerate('XYZ')]
+        else:
+            ik_world, ik_local, pole_world, pole_local = ikfk_solver.match_ik_to_fk(
+                fk_world, sampled(ik_ctrl, 'parentMatrix'), sampled(pole_ctrl, 'parentMatrix'),
+                pole_distance=geometry['lengths'].sum())
+            translate, rotate = ikfk_solver.decompose(ik_local, job['rotate_orders'][ik_ctrl])
+            writes += [(ik_ctrl, f"translate{axis}", translate[:, n]) for n, axis in enumerate('XYZ')]
+            writes += [(ik_ctrl, f"rotate{axis}", rotate[:, n]) for n, axis in enumerate('XYZ')]
+            translate = ikfk_solver.positions(pole_local)
+            writes += [(pole_ctrl, f"translate{axis}", translate[:, n]) for n, axis in enumerate('XYZ')]
+        
+        return [write for write in writes if write[:2] in job['channels']]
+    
+    def run_switch_jobs(self, jobs, frames, bake, use_playhead=False, progress=None, pool=None,
+                        run_starts=(), previous=None):
+        """
+        Sample, solve and write every job over the frames in a single sweep.
+        Nothing is written until sampling and solving are complete, so a
+        cancelled bake leaves the scene untouched. Each job gets 'keys' and
+        'seconds', with the shared sampling and writing cost split between
+        jobs by plug and key count. The rotations from each index in
+        run_starts on continue the keys just before that frame (for index 0,
+        the `previous` {(node, attr): value} when given). Baking also leaves
+        each job's last written values in 'last_values'. With a pool
+        (parallel_bake.SamplingPool) the frames are sampled by its workers.
+        """
+        plugs = []
+        job_plugs = []
+        for job in jobs:
+            job_plugs.append(self.get_match_plugs(job))
+            plugs += job_plugs[-1]
+        plugs = list(dict.fromkeys(plugs))
+        
+        timer = time.perf_counter()
+        if pool is not None:
+            samples = pool.sample_plugs(plugs, frames, use_playhead, progress)
+        else:
+            samples = self.sample_plugs(plugs, frames, use_playhead, progress)
+        sample_seconds = time.perf_counter() - timer
+        
+        key_writer = KeyWriter(self.reduce_tolerances if bake and self.reduce_keys else None)
+        for job, match_plugs in zip(jobs, job_plugs):
+            timer = time.perf_counter()
+            writes = self.solve_switch_job(job, samples) if job['match'] else []
+            if job['switch_attr']:
+                writes.append((job['switch_ctrl'], job['switch_attr'], [job['target_value']] * len(frames)))
+            if run_starts:
+                writes = self.continue_rotations(writes, frames, run_starts, previous)
+            
+            for node, attr, values in writes:
+                if bake:
+                    key_writer.add_keys(node, attr, frames, values)
+                else:
+                    cmds.setAttr(f"{node}.{attr}", float(values[0]))
+                    if self.autokey:
+                        cmds.setKeyframe(node, attribute=attr)
+            
+            job['keys'] = len(writes) * len(frames) if bake else 0
+            job['curves'] = [(node, attr) for node, attr, _ in writes] if bake else []
+            job['last_values'] = {(node, attr): float(values[-1]) for node, attr, values in writes} if bake else {}
+            job['seconds'] = time.perf_counter() - timer
+            if plugs:
+                job['seconds'] += sample_seconds * len(match_plugs) / len(plugs)
+        
+        timer = time.perf_counter()
+        with profiler.operation('key write'):
+            total_keys = key_writer.flush()
+        write_seconds = time.perf_counter() - timer
+        for job in jobs:
+            if key_writer.tolerances is not None:
+                self.add_reduction_stats(job, key_writer.reduced)
+            if total_keys:
+                job['seconds'] += write_seconds * job['keys'] / total_keys
+    
+    def continue_rotations(self, writes, frames, run_starts, previous=None):
+        """
+        Shift the rotation values from each run start (an index into frames)
+        by whole turns so they continue from the value on the frame before,
+        as a bake of the whole range would
+        """
+        previous = previous or {}
+        ends = list(run_starts[1:]) + [len(frames)]
+        
+        continued = []
+        for node, attr, values in writes:
+            if attr.startswith('rotate'):
+                values = np.array(values, dtype=np.float64)
+                for first, last in zip(run_starts, ends):
+                    if first == 0 and (node, attr) in previous:
+                        before = previous[(node, attr)]
+                    else:
+                        before = self.get_value_at(f"{node}.{attr}", frames[first] - 1)
+                    values[first:last] += 360.0 * np.round((before - values[first]) / 360.0)
+            continued.append((node, attr, values))
+        return continued
+    
+    def get_window_frames(self, jobs):
+        """Return how many frames of these jobs one bake window can hold within memory_limit_mb"""
+        plugs = {plug for job in jobs for plug in self.get_match_plugs(job)}
+        keys = sum(len(job.get('channels', ())) + bool(job['switch_attr']) for job in jobs)
+        frame_bytes = len(plugs) * self.SAMPLE_BYTES + keys * self.KEY_BYTES
+        return max(int(self.memory_limit_mb * 2 ** 20) // max(frame_bytes, 1), self.MIN_WINDOW_FRAMES)
+    
+    def run_windowed(self, jobs, frames, run_starts=(), progress=None, **kwargs):
+        """
+        run_switch_jobs over consecutive windows of get_window_frames frames,
+        each sampled, solved and written before the next is sampled, so memory
+        stays the same however long the range is. Every window after the first
+        continues the rotations of the one before it, as do the runs starting
+        at run_starts (indices into frames). Job keys and seconds are summed
+        over the windows.
+        """
+        size = self.get_window_frames(jobs)
+        totals = [{'keys': 0, 'seconds': 0.0} for _ in jobs]
+        previous = {}
+        for offset in range(0, len(frames), size):
+            window = frames[offset:offset + size]
+            starts = {start - offset for start in run_starts if offset <= start < offset + size}
+            # A window that carries on from the last one continues its final values
+            carried = previous if offset and 0 not in starts else None
+            if offset:
+                starts.add(0)
+            window_progress = None
+            if progress is not None:
+                window_progress = lambda done, total: progress(offset + done, len(frames))
+            
+            try:
+                self.run_switch_jobs(jobs, window, bake=True, progress=window_progress,
+                                     run_starts=sorted(starts), previous=carried, **kwargs)
+            except BakeCancelled:
+                raise BakeCancelled(offset)
+            
+            previous = {}
+            for job, total in zip(jobs, totals):
+                previous.update(job['last_values'])
+                total['keys'] += job['keys']
+                total['seconds'] += job['seconds']
+                if 'keys_removed' in job:
+                    total['keys_removed'] = total.get('keys_removed', 0) + job['keys_removed']
+                    deviation = total.setdefault('max_deviation', dict(job['max_deviation']))
+                    for kind, value in job['max_deviation'].items():
+                        deviation[kind] = max(deviation[kind], value)
+        
+        for job, total in zip(jobs, totals):
+            job.update(total)
+    
+    def add_reduction_stats(self, job, reduced):
+        """Record the keys the reduction removed from a job's curves and its largest deviation"""
+        job['keys_removed'] = 0
+        job['max_deviation'] = {kind: 0.0 for kind in DEFAULT_TOLERANCES}
+        for node, attr in job['curves']:
+            removed, deviation = reduced.get((node, attr), (0, 0.0))
+            job['keys_removed'] += removed
+            kind = channel_kind(attr)
+            if kind:
+                job['max_deviation'][kind] = max(job['max_deviation'][kind], deviation)
+        job['keys'] -= job['keys_removed']
+    
+    def run_incremental_bake(self, jobs, start, end, progress=None):
+        """
+        Bake only the frames whose source animation changed since each limb's
+        last bake in the same direction over the same range. Limbs without a
+        matching fingerprint get a full bake. Returns the bake path used.
+        """
+        frames = list(range(start, end + 1))
+        full = []
+        partial = []
+        changed = set()
+        for job in jobs:
+            if not job['match']:
+                full.append(job)
+                continue
+            
+            # The bake does not write the curves it reads, so their hashes are reused when storing
+            stored = bake_fingerprint.load(job['switch_ctrl']).get(job['limb'], {}).get(job['to_mode'])
+            job['curve_hashes'] = {}
+            job['fingerprint'], key_times = bake_fingerprint.fingerprint(job, job['to_mode'], start, end,
+                                                                         job['curve_hashes'])
+            dirty = bake_fingerprint.changed_frames(stored, job['fingerprint'], key_times)
+            job['rebaked_frames'] = len(dirty)
+            if len(dirty) == len(frames):
+                full.append(job)
+            else:
+                partial.append(job)
+                changed.update(dirty)
+        
+        method = self.run_bake(full, frames, progress) if full else 'incremental'
+        if changed:
+            # Each run of changed frames after the range start continues the keys before it
+            changed = sorted(changed)
+            run_starts = [i for i in np.flatnonzero(np.diff(changed, prepend=start - 2) != 1) if changed[i] > start]
+            self.run_windowed(partial, changed, run_starts, use_playhead=self.use_playhead)
+        self.key_switch_attrs(partial, start, end, changed)
+        return method
+    
+    def key_switch_attrs(self, jobs, start, end, changed=()):
+        """
+        Key each job's switch attribute to its target value on the changed
+        frames and on any frame of start..end not already keyed to it.
+        """
+        planned = []
+        for job in jobs:
+            if not job['switch_attr']:
+                continue
+            
+            # One query returns (time, value) pairs for the keys already in the range
+            plug = f"{job['switch_ctrl']}.{job['switch_attr']}"
+            keys = np.array(cmds.keyframe(plug, query=True, time=(start, end), timeChange=True,
+                                          valueChange=True) or [], dtype=np.float64).reshape(-1, 2)
+            keyed = np.round(keys[keys[:, 1] == job['target_value'], 0]).astype(int)
+            frames = np.union1d(np.array(list(changed), dtype=int),
+                                np.setdiff1d(np.arange(start, end + 1), keyed))
+            planned.append((job, frames))
+        
+        key_writer = KeyWriter()
+        size = self.get_window_frames(jobs) if jobs else end - start + 1
+        for offset in range(start, end + 1, size):
+            for job, frames in planned:
+                window = frames[np.searchsorted(frames, offset):np.searchsorted(frames, offset + size)]
+                if len(window):
+                    key_writer.add_keys(job['switch_ctrl'], job['switch_attr'], window.tolist(),
+                                        [job['target_value']] * len(window))
+            with profiler.operation('key write'):
+                key_writer.flush()
+    
+    def store_fingerprints(self, jobs, start, end):
+        """
+        Store what each matched limb's bake read on its switch control. The
+        curves just written are what a bake back the other way reads, and that
+        bake would reproduce the current source curves, so both directions
+        are stored.
+        """
+        stored = {}
+        for job in jobs:
+            if not job['match']:
+                continue
+            
+            fingerprints = stored.get(job['switch_ctrl'])
+            if fingerprints is None:
+                fingerprints = stored[job['switch_ctrl']] = bake_fingerprint.load(job['switch_ctrl'])
+            opposite = 'fk' if job['to_mode'] == 'ik' else 'ik'
+            curve_hashes = job.setdefault('curve_hashes', {})
+            current = job.get('fingerprint') or bake_fingerprint.fingerprint(job, job['to_mode'], start, end,
+                                                                             curve_hashes)[0]
+            fingerprints[job['limb']] = {
+                job['to_mode']: current,
+                opposite: bake_fingerprint.fingerprint(job, opposite, start, end, curve_hashes)[0],
+            }
+        
+        for switch_ctrl, fingerprints in stored.items():
+            bake_fingerprint.save(switch_ctrl, fingerprints)
+    
+    def match_and_switch(self, limb, from_mode, to_mode):
+        """Match positions and switch on current frame"""
+        job = self.make_switch_job(limb, from_mode, to_mode)
+        self.run_switch_jobs([job], [cmds.currentTime(query=True)], bake=False)
+    
+    def bake_switch(self, limb, from_mode, to_mode, start, end, progress=None):
+        """Bake the IK/FK switch over a frame range and return timing stats"""
+        return self.bake_switches([self.make_switch_job(limb, from_mode, to_mode)], start, end,
+                                  progress=progress)
+    
+    def get_sparse_frames(self, jobs, start, end):
+        """Return the sorted union of key times on the jobs' controls within start..end"""
+        controls = []
+        for job in jobs:
+            controls += job['fk'] + job['ik'] + [job['switch_ctrl']]
+        controls = [ctrl for ctrl in dict.fromkeys(controls) if cmds.objExists(ctrl)]
+        if not controls:
+            return []
+        
+        times = cmds.keyframe(controls, query=True, time=(start, end), timeChange=True) or []
+        return sorted(set(times))
+    
+    def get_character_stats(self, jobs, frames):
+        """Group per-job keys and seconds by namespace, with each character's throughput"""
+        characters = {}
+        for job in jobs:
+            character = characters.setdefault(job['namespace'], {'limbs': [], 'keys': 0, 'seconds': 0.0})
+            character['limbs'].append(job['limb'])
+            character['keys'] += job.get('keys', 0)
+            character['seconds'] += job.get('seconds', 0.0)
+        
+        for character in characters.values():
+            seconds = character['seconds']
+            character['fps'] = frames / seconds if frames and seconds > 0 else 0.0
+        return characters
+    
+    def bake_switches(self, jobs, start, end, sparse=False, progress=None):
+        """Bake several resolved limbs in one sweep over the frame range (or its keyed frames)"""
+        timer = time.perf_counter()
+        frames = self.get_sparse_frames(jobs, start, end) if sparse else list(range(start, end + 1))
+        stats = {
+            'limbs': [job['limb'] for job in jobs],
+            'method': None,
+            'mode': 'sparse' if sparse else 'bake',
+            'frames': len(frames),
+            'cancelled': False,
+        }
+        
+        # Incremental re-bakes need every frame keyed exactly, so not for sparse or reduced bakes
+        incremental = self.incremental and not sparse and not self.reduce_keys
+        if frames:
+            try:
+                if incremental:
+                    stats['method'] = self.run_incremental_bake(jobs, start, end, progress)
+                else:
+                    stats['method'] = self.run_bake(jobs, frames, progress)
+            except BakeCancelled as e:
+                stats['cancelled'] = True
+                stats['frames_written'] = e.frames_written
+        if incremental and stats['method']:
+            self.store_fingerprints(jobs, start, end)
+            stats['rebaked_frames'] = max([job.get('rebaked_frames', len(frames)) for job in jobs] or [0])
+        
+        elapsed = time.perf_counter() - timer
+        stats['seconds'] = elapsed
+        stats['fps'] = len(frames) / elapsed if frames and elapsed > 0 else 0.0
+        stats['characters'] = self.get_character_stats(jobs, len(frames)) if stats['method'] else {}
+        if stats['method'] and self.reduce_keys:
+            stats['keys_removed'] = sum(job['keys_removed'] for job in jobs)
+            stats['max_deviation'] = {kind: max(job['max_deviation'][kind] for job in jobs)
+                                      for kind in DEFAULT_TOLERANCES}
+        self.last_bake_stats = stats
+        return stats
+    
+    def run_bake(self, jobs, frames, progress=None):
+        """
+        Bake with the time context path, falling back to the playhead; returns
+        the path used. Long ranges are baked in windows (see run_windowed).
+        """
+        window = min(len(frames), self.get_window_frames(jobs))
+        if self.parallel_workers > 1 and window >= self.PARALLEL_MIN_FRAMES:
+            import parallel_bake
+            pool = None
+            try:
+                # One scene export and one set of workers serves every window
+                pool = parallel_bake.SamplingPool(min(self.parallel_workers, window))
+                self.run_windowed(jobs, frames, use_playhead=self.use_playhead, progress=progress, pool=pool)
+                return 'parallel'
+            except (OSError, RuntimeError) as e:
+                cmds.warning(f"Parallel bake failed ({e}), baking in this process")
+            finally:
+                if pool is not None:
+                    pool.close()
+        
+        if self.use_playhead:
+            self.run_windowed(jobs, frames, use_playhead=True, progress=progress)
+            return 'playhead'
+        
+        try:
+            self.run_windowed(jobs, frames, progress=progress)
+            return 'context'
+        except RuntimeError as e:
+            cmds.warning(f"Time context bake failed ({e}), falling back to playhead bake")
+            self.run_windowed(jobs, frames, use_playhead=True, progress=progress)
+            return 'playhead'
@@ -4,12 +4,21 @@ Version 1.3.23
 Works with MetaHuman, Unreal, mGear, and Custom Rigs
 """
 
+import os
+import time
+
 import maya.cmds as cmds
 import maya.mel as mel
+import maya.api.OpenMaya as om
 from PySide2 import QtCore, QtWidgets, QtGui
 from shiboken2 import wrapInstance
 import maya.OpenMayaUI as omui
 
+import pose_library
+import profiler
+from preset_registry import get_registry
+from switch_core import RIG_PRESETS, SwitchCore
+
 
 def maya_main_window():
     """Return Maya main window as a Qt object"""
@@ -20,105 +29,76 @@ def maya_main_window():
 class GTCustomRigInterface(QtWidgets.QDialog):
     
     # Rig presets for different rig types
-    RIG_PRESETS = {
-        'MetaHuman (mGear)': {
-            'right_arm': {
-                'fk': ['arm_R0_fk0_ctl', 'arm_R0_fk1_ctl', 'arm_R0_fk2_ctl'],
-                'ik': ['arm_R0_ik_ctl', 'arm_R0_upv_ctl'],
-                'switch': 'arm_R0_settings',
-                'switch_attr': 'blend'
-            },
-            'left_arm': {
-                'fk': ['arm_L0_fk0_ctl', 'arm_L0_fk1_ctl', 'arm_L0_fk2_ctl'],
-                'ik': ['arm_L0_ik_ctl', 'arm_L0_upv_ctl'],
-                'switch': 'arm_L0_settings',
-                'switch_attr': 'blend'
-            },
-            'right_leg': {
-                'fk': ['leg_R0_fk0_ctl', 'leg_R0_fk1_ctl', 'leg_R0_fk2_ctl'],
-                'ik': ['leg_R0_ik_ctl', 'leg_R0_upv_ctl'],
-                'switch': 'leg_R0_settings',
-                'switch_attr': 'blend'
-            },
-            'left_leg': {
-                'fk': ['leg_L0_fk0_ctl', 'leg_L0_fk1_ctl', 'leg_L0_fk2_ctl'],
-                'ik': ['leg_L0_ik_ctl', 'leg_L0_upv_ctl'],
-                'switch': 'leg_L0_settings',
-                'switch_attr': 'blend'
-            }
-        },
-        'Unreal Mannequin': {
-            'right_arm': {
-                'fk': ['upperarm_r', 'lowerarm_r', 'hand_r'],
-                'ik': ['ik_hand_r', 'pole_r'],
-                'switch': 'ik_hand_r',
-                'switch_attr': 'ikBlend'
-            },
-            'left_arm': {
-                'fk': ['upperarm_l', 'lowerarm_l', 'hand_l'],
-                'ik': ['ik_hand_l', 'pole_l'],
-                'switch': 'ik_hand_l',
-                'switch_attr': 'ikBlend'
-            },
-            'right_leg': {
-                'fk': ['thigh_r', 'calf_r', 'foot_r'],
-                'ik': ['ik_foot_r', 'pole_r_leg'],
-                'switch': 'ik_foot_r',
-                'switch_attr': 'ikBlend'
-            },
-            'left_leg': {
-                'fk': ['thigh_l', 'calf_l', 'foot_l'],
-                'ik': ['ik_foot_l', 'pole_l_leg'],
-                'switch': 'ik_foot_l',
-                'switch_attr': 'ikBlend'
-            }
-        },
-        'Custom': {
-            'right_arm': {
-                'fk': ['shoulder_r_FK_ctrl', 'elbow_r_FK_ctrl', 'wrist_r_FK_ctrl'],
-                'ik': ['arm_r_IK_ctrl', 'elbow_r_PV_ctrl'],
-                'switch': 'arm_r_switch_ctrl',
-                'switch_attr': 'ikFkBlend'
-            },
-            'left_arm': {
-                'fk': ['shoulder_l_FK_ctrl', 'elbow_l_FK_ctrl', 'wrist_l_FK_ctrl'],
-                'ik': ['arm_l_IK_ctrl', 'elbow_l_PV_ctrl'],
-                'switch': 'arm_l_switch_ctrl',
-                'switch_attr': 'ikFkBlend'
-            },
-            'right_leg': {
-                'fk': ['hip_r_FK_ctrl', 'knee_r_FK_ctrl', 'ankle_r_FK_ctrl'],
-                'ik': ['leg_r_IK_ctrl', 'knee_r_PV_ctrl'],
-                'switch': 'leg_r_switch_ctrl',
-                'switch_attr': 'ikFkBlend'
-            },
-            'left_leg': {
-                'fk': ['hip_l_FK_ctrl', 'knee_l_FK_ctrl', 'ankle_l_FK_ctrl'],
-                'ik': ['leg_l_IK_ctrl', 'knee_l_PV_ctrl'],
-                'switch': 'leg_l_switch_ctrl',
-                'switch_attr': 'ikFkBlend'
-            }
-        }
-    }
+    RIG_PRESETS = RIG_PRESETS
     
-    def __init__(self, parent=maya_main_window()):
-        super(GTCustomRigInterface, self).__init__(parent)
+    def __init__(self, parent=None):
+        super(GTCustomRigInterface, self).__init__(parent or maya_main_window())
         
         self.setWindowTitle("GT Custom Rig Interface (v1.3.23)")
         self.setMinimumWidth(550)
         self.setMinimumHeight(750)
         self.setWindowFlags(self.windowFlags() ^ QtCore.Qt.WindowContextHelpButtonHint)
         
-        self.namespace = ""
+        self.core = SwitchCore()
         self.bake_mode = 'bake'
+        self.baking = False
+        self.bake_cancel_requested = False
+        self.bake_started = 0.0
         self.limb_buttons = {}
-        self.limb_controls = {}
+        
+        # Tabs other than FK/IK are built the first time they are shown
+        self.tab_builders = {}
+        self.settings_built = False
+        self.poses_built = False
+        self.pose_library = None
+        self.pose_library_version = None
+        self.detected = False
+        
+        # Scene callbacks that keep the FK/IK buttons in sync
+        self.callback_ids = []
+        self.watched_key = None
+        self.pending_limbs = set()
+        
+        # Typing in the namespace field only touches the scene once the user pauses
+        self.namespace_timer = QtCore.QTimer(self)
+        self.namespace_timer.setSingleShot(True)
+        self.namespace_timer.setInterval(300)
+        
+        # Bursts of scene events are coalesced into a single button refresh
+        self.refresh_timer = QtCore.QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(50)
         
         self.create_ui()
         self.create_connections()
         
-        # Try auto-detection
-        self.auto_detect_rig()
+        # Reuse the remembered detection for this shot; otherwise detect once the window is up
+        if self.RIG_PRESETS:
+            self.core.set_rig(self.rig_type_combo.currentText())
+            cached = self.core.cached_detection()
+            if cached:
+                self.apply_detection(*cached)
+        else:
+            self.show_missing_presets()
+    
+    @property
+    def namespace(self):
+        """Namespace of the rig being switched (kept on the core)"""
+        return self.core.namespace
+    
+    @namespace.setter
+    def namespace(self, namespace):
+        self.core.namespace = namespace
+    
+    @property
+    def limb_controls(self):
+        """Control names per limb for the current preset (kept on the core)"""
+        return self.core.limb_controls
+    
+    @property
+    def last_bake_stats(self):
+        """Timing stats of the most recent bake"""
+        return self.core.last_bake_stats
     
     def create_ui(self):
         """Create the main UI"""
@@ -169,6 +149,21 @@ class GTCustomRigInterface(QtWidgets.QDialog):
         
         main_layout.addLayout(namespace_layout)
         
+        # Characters section: switch the same limbs on many referenced characters at once
+        self.characters_group = QtWidgets.QGroupBox("Multiple Characters")
+        self.characters_group.setCheckable(True)
+        self.characters_group.setChecked(False)
+        characters_layout = QtWidgets.QVBoxLayout()
+        
+        self.characters_list = QtWidgets.QListWidget()
+        self.characters_list.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.characters_list.setMaximumHeight(100)
+        self.characters_list.setToolTip("Switches apply to the selected characters, or to every listed character when none are selected")
+        characters_layout.addWidget(self.characters_list)
+        
+        self.characters_group.setLayout(characters_layout)
+        main_layout.addWidget(self.characters_group)
+        
         # Status label
         self.status_label = QtWidgets.QLabel("Status: Ready")
         self.status_label.setStyleSheet("color: green; font-weight: bold;")
@@ -195,22 +190,65 @@ class GTCustomRigInterface(QtWidgets.QDialog):
         self.create_fkik_tab(fkik_tab)
         self.tab_widget.addTab(fkik_tab, "FK/IK")
         
-        # Pose Tab
-        pose_tab = QtWidgets.QWidget()
-        pose_layout = QtWidgets.QVBoxLayout(pose_tab)
-        pose_layout.addWidget(QtWidgets.QLabel("Pose Controls Coming Soon..."))
-        self.tab_widget.addTab(pose_tab, "Pose")
-        
-        # Animation Tab
-        anim_tab = QtWidgets.QWidget()
-        anim_layout = QtWidgets.QVBoxLayout(anim_tab)
+        # Pose, Animation and Settings tabs, filled in on first view
+        for label, builder in (("Pose", self.create_pose_tab),
+                               ("Animation", self.create_animation_tab),
+                               ("Settings", self.create_settings_tab)):
+            index = self.tab_widget.addTab(QtWidgets.QWidget(), label)
+            self.tab_builders[index] = builder
+    
+    def build_tab(self, index):
+        """Build a lazily created tab the first time it is shown"""
+        builder = self.tab_builders.pop(index, None)
+        if builder:
+            builder(self.tab_widget.widget(index))
+    
+    def create_pose_tab(self, parent):
+        """Create the pose tab: a library of captured limb poses for the current rig type"""
+        pose_layout = QtWidgets.QVBoxLayout(parent)
+        
+        self.pose_list = QtWidgets.QListWidget()
+        self.pose_list.setToolTip("Poses saved for the current rig type. Double-click to apply.")
+        pose_layout.addWidget(self.pose_list)
+        
+        capture_layout = QtWidgets.QHBoxLayout()
+        self.pose_name_field = QtWidgets.QLineEdit()
+        self.pose_name_field.setPlaceholderText("Pose name")
+        capture_layout.addWidget(self.pose_name_field)
+        self.capture_pose_btn = QtWidgets.QPushButton("Capture")
+        self.capture_pose_btn.setToolTip("Save every limb of the current character as a pose")
+        capture_layout.addWidget(self.capture_pose_btn)
+        pose_layout.addLayout(capture_layout)
+        
+        scope_layout = QtWidgets.QHBoxLayout()
+        scope_layout.addWidget(QtWidgets.QLabel("Apply to:"))
+        self.pose_scope_combo = QtWidgets.QComboBox()
+        self.pose_scope_combo.addItems(["All limbs", "Selected limbs"])
+        scope_layout.addWidget(self.pose_scope_combo)
+        pose_layout.addLayout(scope_layout)
+        
+        apply_layout = QtWidgets.QHBoxLayout()
+        self.apply_pose_btn = QtWidgets.QPushButton("Apply")
+        apply_layout.addWidget(self.apply_pose_btn)
+        self.apply_mirrored_btn = QtWidgets.QPushButton("Apply Mirrored")
+        self.apply_mirrored_btn.setToolTip("Apply the left limbs' values to the right limbs and vice versa")
+        apply_layout.addWidget(self.apply_mirrored_btn)
+        self.delete_pose_btn = QtWidgets.QPushButton("Delete")
+        apply_layout.addWidget(self.delete_pose_btn)
+        pose_layout.addLayout(apply_layout)
+        
+        self.capture_pose_btn.clicked.connect(self.capture_pose)
+        self.apply_pose_btn.clicked.connect(lambda: self.apply_pose(mirror=False))
+        self.apply_mirrored_btn.clicked.connect(lambda: self.apply_pose(mirror=True))
+        self.delete_pose_btn.clicked.connect(self.delete_pose)
+        self.pose_list.itemDoubleClicked.connect(lambda item: self.apply_pose(mirror=False))
+        self.poses_built = True
+        self.refresh_pose_list()
+    
+    def create_animation_tab(self, parent):
+        """Create the animation tab"""
+        anim_layout = QtWidgets.QVBoxLayout(parent)
         anim_layout.addWidget(QtWidgets.QLabel("Animation Controls Coming Soon..."))
-        self.tab_widget.addTab(anim_tab, "Animation")
-        
-        # Settings Tab
-        settings_tab = QtWidgets.QWidget()
-        self.create_settings_tab(settings_tab)
-        self.tab_widget.addTab(settings_tab, "Settings")
     
     def create_separator(self):
         """Create a horizontal separator line"""
@@ -242,6 +280,37 @@ class GTCustomRigInterface(QtWidgets.QDialog):
         scroll.setWidget(scroll_widget)
         layout.addWidget(scroll)
         
+        # Multi-limb switching
+        multi_layout = QtWidgets.QHBoxLayout()
+        self.switch_all_btn = QtWidgets.QPushButton("Switch All")
+        self.switch_all_btn.setMinimumHeight(35)
+        multi_layout.addWidget(self.switch_all_btn)
+        
+        self.switch_selected_btn = QtWidgets.QPushButton("Switch Selected Limbs")
+        self.switch_selected_btn.setMinimumHeight(35)
+        multi_layout.addWidget(self.switch_selected_btn)
+        
+        layout.addLayout(multi_layout)
+        
+        # Bake progress, shown only while a bake is running
+        self.progress_widget = QtWidgets.QWidget()
+        progress_layout = QtWidgets.QHBoxLayout(self.progress_widget)
+        progress_layout.setContentsMargins(0, 0, 0, 0)
+        
+        self.progress_bar = QtWidgets.QProgressBar()
+        progress_layout.addWidget(self.progress_bar)
+        
+        self.progress_label = QtWidgets.QLabel()
+        self.progress_label.setMinimumWidth(160)
+        progress_layout.addWidget(self.progress_label)
+        
+        self.cancel_bake_btn = QtWidgets.QPushButton("Cancel")
+        self.cancel_bake_btn.setFixedWidth(80)
+        progress_layout.addWidget(self.cancel_bake_btn)
+        
+        self.progress_widget.hide()
+        layout.addWidget(self.progress_widget)
+        
         layout.addWidget(self.create_separator())
         
         # Options section
@@ -310,18 +379,152 @@ class GTCustomRigInterface(QtWidgets.QDialog):
         """Create settings tab for custom rig configuration"""
         layout = QtWidgets.QVBoxLayout(parent)
         
+        # Rig presets: JSON/YAML files, no code changes needed for a new rig
+        presets_group = QtWidgets.QGroupBox("Rig Presets")
+        presets_layout = QtWidgets.QVBoxLayout()
+        
+        folders = "<br>".join(get_registry().get_folders())
         info_label = QtWidgets.QLabel(
             "<b>Custom Rig Configuration</b><br><br>"
-            "To configure a custom rig:<br>"
-            "1. Select 'Custom' from the Rig Type dropdown<br>"
-            "2. Edit the control names in the code to match your rig<br>"
-            "3. Specify the switch attribute name<br><br>"
+            "Add a JSON or YAML preset file with your rig's control names and<br>"
+            "switch attribute to one of these folders (later folders win):<br>"
+            f"{folders}<br><br>"
             "Check the Help button for more details."
         )
         info_label.setWordWrap(True)
-        layout.addWidget(info_label)
+        info_label.setTextInteractionFlags(QtCore.Qt.TextSelectableByMouse)
+        presets_layout.addWidget(info_label)
+        
+        self.preset_errors_label = QtWidgets.QLabel()
+        self.preset_errors_label.setWordWrap(True)
+        self.preset_errors_label.setStyleSheet("color: orange;")
+        presets_layout.addWidget(self.preset_errors_label)
+        
+        self.reload_presets_btn = QtWidgets.QPushButton("Reload Presets")
+        presets_layout.addWidget(self.reload_presets_btn)
+        
+        presets_group.setLayout(presets_layout)
+        layout.addWidget(presets_group)
+        
+        # Bake options
+        bake_group = QtWidgets.QGroupBox("Bake")
+        bake_layout = QtWidgets.QVBoxLayout()
+        
+        self.playhead_bake_checkbox = QtWidgets.QCheckBox("Use playhead bake (legacy, slower)")
+        self.playhead_bake_checkbox.setToolTip(
+            "Step the global time slider on every frame instead of evaluating\n"
+            "controls at each frame's time context. Only needed for rigs that\n"
+            "do not evaluate correctly outside the current time."
+        )
+        bake_layout.addWidget(self.playhead_bake_checkbox)
+        
+        self.dg_bake_checkbox = QtWidgets.QCheckBox("Use DG evaluation while baking")
+        self.dg_bake_checkbox.setToolTip(
+            "Switch the evaluation manager to DG for the duration of a bake.\n"
+            "Often faster for time-context reads; the previous mode is restored afterwards."
+        )
+        bake_layout.addWidget(self.dg_bake_checkbox)
+        
+        parallel_layout = QtWidgets.QHBoxLayout()
+        parallel_layout.addWidget(QtWidgets.QLabel("Parallel workers:"))
+        self.parallel_workers_spin = QtWidgets.QSpinBox()
+        self.parallel_workers_spin.setRange(0, os.cpu_count() or 1)
+        self.parallel_workers_spin.setSpecialValueText("Off")
+        self.parallel_workers_spin.setToolTip(
+            f"Sample bakes of {SwitchCore.PARALLEL_MIN_FRAMES}+ frames in this many mayapy processes.\n"
+            "Keys are solved and written here, identical to a normal bake."
+        )
+        parallel_layout.addWidget(self.parallel_workers_spin)
+        parallel_layout.addStretch()
+        bake_layout.addLayout(parallel_layout)
+        
+        memory_layout = QtWidgets.QHBoxLayout()
+        memory_layout.addWidget(QtWidgets.QLabel("Bake memory limit:"))
+        self.memory_limit_spin = QtWidgets.QSpinBox()
+        self.memory_limit_spin.setRange(16, 65536)
+        self.memory_limit_spin.setSingleStep(128)
+        self.memory_limit_spin.setSuffix(" MB")
+        self.memory_limit_spin.setValue(self.core.memory_limit_mb)
+        self.memory_limit_spin.setToolTip(
+            "Longer bakes are sampled, solved and keyed in windows of frames that fit in this much memory.\n"
+            "Cancelling after the first window undoes the keys already written."
+        )
+        memory_layout.addWidget(self.memory_limit_spin)
+        memory_layout.addStretch()
+        bake_layout.addLayout(memory_layout)
+        
+        self.reduce_keys_checkbox = QtWidgets.QCheckBox("Reduce baked keys")
+        self.reduce_keys_checkbox.setToolTip(
+            "Remove baked keys that linear interpolation reproduces within the tolerances.\n"
+            "Kept keys get linear tangents; the status shows the keys removed and the largest deviation."
+        )
+        bake_layout.addWidget(self.reduce_keys_checkbox)
+        
+        tolerance_layout = QtWidgets.QHBoxLayout()
+        tolerance_layout.addWidget(QtWidgets.QLabel("Rotate tolerance:"))
+        self.rotate_tolerance_spin = QtWidgets.QDoubleSpinBox()
+        self.rotate_tolerance_spin.setDecimals(4)
+        self.rotate_tolerance_spin.setRange(0.0, 10.0)
+        self.rotate_tolerance_spin.setSingleStep(0.01)
+        self.rotate_tolerance_spin.setSuffix("°")
+        self.rotate_tolerance_spin.setValue(self.core.reduce_tolerances['rotate'])
+        tolerance_layout.addWidget(self.rotate_tolerance_spin)
+        tolerance_layout.addWidget(QtWidgets.QLabel("Translate:"))
+        self.translate_tolerance_spin = QtWidgets.QDoubleSpinBox()
+        self.translate_tolerance_spin.setDecimals(4)
+        self.translate_tolerance_spin.setRange(0.0, 10.0)
+        self.translate_tolerance_spin.setSingleStep(0.001)
+        self.translate_tolerance_spin.setValue(self.core.reduce_tolerances['translate'])
+        tolerance_layout.addWidget(self.translate_tolerance_spin)
+        bake_layout.addLayout(tolerance_layout)
+        
+        self.incremental_checkbox = QtWidgets.QCheckBox("Only re-bake changed frames")
+        self.incremental_checkbox.setToolTip(
+            "Remember the source animation of every bake on the switch control and, when the same\n"
+            "limb is baked again over the same range, re-match only the frames whose keys changed.\n"
+            "Not used for sparse or reduced bakes."
+        )
+        bake_layout.addWidget(self.incremental_checkbox)
+        
+        bake_group.setLayout(bake_layout)
+        layout.addWidget(bake_group)
+        
+        # Diagnostics: where the time goes when switching is slow on a rig
+        diagnostics_group = QtWidgets.QGroupBox("Diagnostics")
+        diagnostics_layout = QtWidgets.QVBoxLayout()
+        
+        self.profile_checkbox = QtWidgets.QCheckBox("Profile scene commands")
+        self.profile_checkbox.setToolTip("Time every Maya command the tool issues, per operation.\n"
+                                         "Adds a little overhead to each command while enabled.")
+        diagnostics_layout.addWidget(self.profile_checkbox)
+        
+        self.profile_text = QtWidgets.QPlainTextEdit()
+        self.profile_text.setReadOnly(True)
+        self.profile_text.setMinimumHeight(120)
+        diagnostics_layout.addWidget(self.profile_text)
+        
+        profile_buttons = QtWidgets.QHBoxLayout()
+        self.profile_reset_btn = QtWidgets.QPushButton("Reset")
+        profile_buttons.addWidget(self.profile_reset_btn)
+        self.profile_json_btn = QtWidgets.QPushButton("Export JSON")
+        profile_buttons.addWidget(self.profile_json_btn)
+        self.profile_trace_btn = QtWidgets.QPushButton("Export Chrome Trace")
+        profile_buttons.addWidget(self.profile_trace_btn)
+        diagnostics_layout.addLayout(profile_buttons)
+        
+        diagnostics_group.setLayout(diagnostics_layout)
+        layout.addWidget(diagnostics_group)
         
         layout.addStretch()
+        
+        self.profile_checkbox.setChecked(profiler.get_profiler().enabled)
+        self.profile_checkbox.toggled.connect(self.set_profiling)
+        self.profile_reset_btn.clicked.connect(self.reset_profile)
+        self.profile_json_btn.clicked.connect(lambda: self.export_profile('json'))
+        self.profile_trace_btn.clicked.connect(lambda: self.export_profile('trace'))
+        self.reload_presets_btn.clicked.connect(self.reload_presets)
+        self.update_preset_errors()
+        self.settings_built = True
     
     def create_limb_section(self, label, limb_name):
         """Create a limb section with FK/IK/Switch buttons"""
@@ -360,6 +563,9 @@ class GTCustomRigInterface(QtWidgets.QDialog):
         self.get_namespace_btn.clicked.connect(self.get_namespace)
         self.clear_namespace_btn.clicked.connect(self.clear_namespace)
         self.detect_rig_btn.clicked.connect(self.auto_detect_rig)
+        self.switch_all_btn.clicked.connect(self.switch_all_limbs)
+        self.switch_selected_btn.clicked.connect(self.switch_selected_limbs)
+        self.cancel_bake_btn.clicked.connect(self.cancel_bake)
         self.rig_type_combo.currentTextChanged.connect(self.on_rig_type_changed)
         
         self.bake_radio.toggled.connect(lambda: self.set_mode('bake'))
@@ -371,67 +577,216 @@ class GTCustomRigInterface(QtWidgets.QDialog):
         self.timeline_range_btn.clicked.connect(self.get_timeline_range)
         
         self.namespace_field.textChanged.connect(self.on_namespace_changed)
+        self.namespace_timer.timeout.connect(self.apply_namespace)
+        self.refresh_timer.timeout.connect(self.flush_button_refresh)
+        self.tab_widget.currentChanged.connect(self.build_tab)
     
     def on_rig_type_changed(self):
         """Called when rig type changes"""
         rig_type = self.rig_type_combo.currentText()
-        self.limb_controls = self.RIG_PRESETS[rig_type].copy()
+        if rig_type not in self.RIG_PRESETS:
+            # Every preset failed to load; nothing can be switched until they are fixed and reloaded
+            self.core.rig_type = None
+            self.core.limb_controls = {}
+            self.set_character_namespaces([])
+            self.show_missing_presets()
+            return
+        self.core.set_rig(rig_type)
+        self.set_character_namespaces(self.core.find_namespaces())
         self.update_all_button_states()
+        self.refresh_pose_list()
+    
+    def reload_presets(self):
+        """Re-read every preset file and refresh the rig type list"""
+        registry = get_registry()
+        registry.refresh(force=True)
+        
+        rig_type = self.rig_type_combo.currentText()
+        self.rig_type_combo.blockSignals(True)
+        self.rig_type_combo.clear()
+        self.rig_type_combo.addItems(list(self.RIG_PRESETS.keys()))
+        self.rig_type_combo.blockSignals(False)
+        
+        if rig_type in self.RIG_PRESETS:
+            self.rig_type_combo.setCurrentText(rig_type)
+        self.core.control_cache.clear()
+        self.core.chain_cache.invalidate()
+        self.on_rig_type_changed()
+        self.update_preset_errors()
+        if self.RIG_PRESETS:
+            self.set_status(f"Loaded {len(self.RIG_PRESETS)} rig presets", "orange" if registry.errors else "green")
+    
+    def show_missing_presets(self):
+        """Show in the status line why no rig preset could be loaded"""
+        errors = get_registry().errors
+        details = "; ".join(f"{os.path.basename(path)}: {error}" for path, error in errors.items())
+        self.set_status("No rig presets loaded" + (f" - {details}" if details else
+                                                   " - add a preset file (see Settings tab)"), "red")
+    
+    def warn_missing_limb(self, limb):
+        """Explain why a limb has no controls to switch"""
+        if not self.RIG_PRESETS:
+            self.show_missing_presets()
+        else:
+            self.set_status(f"The {self.core.rig_type} preset has no {limb.replace('_', ' ')}", "orange")
+    
+    def update_preset_errors(self):
+        """List preset files that could not be loaded"""
+        errors = get_registry().errors
+        self.preset_errors_label.setText("\n".join(f"{os.path.basename(path)}: {error}"
+                                                   for path, error in errors.items()))
+        self.preset_errors_label.setVisible(bool(errors))
+    
+    def get_pose_library(self):
+        """Return the pose library of the current rig type, reopening it when the presets change"""
+        version = get_registry().version
+        if (self.pose_library is None or self.pose_library.preset != self.core.rig_type
+                or self.pose_library_version != version):
+            # A reloaded preset may have new controls; the core and the channel layout follow it
+            if self.core.rig_type in self.RIG_PRESETS:
+                self.core.set_rig(self.core.rig_type)
+            self.pose_library = pose_library.PoseLibrary(self.core.rig_type, self.limb_controls)
+            self.pose_library_version = version
+        return self.pose_library
+    
+    def refresh_pose_list(self):
+        """List the current rig type's poses"""
+        if not self.poses_built or not self.core.rig_type:
+            return
+        self.pose_list.clear()
+        self.pose_list.addItems(self.get_pose_library().names)
+    
+    def capture_pose(self):
+        """Save the current character's limbs as a pose"""
+        name = self.pose_name_field.text().strip()
+        if not name:
+            self.set_status("Enter a pose name first", "orange")
+            return
+        
+        library = self.get_pose_library()
+        library.store(name, pose_library.capture_pose(self.core, self.namespace, library.layout))
+        self.pose_name_field.clear()
+        self.refresh_pose_list()
+        self.set_status(f"Captured pose '{name}'", "green")
+    
+    def apply_pose(self, mirror=False):
+        """Apply the selected pose to the target characters' limbs"""
+        item = self.pose_list.currentItem()
+        if not item:
+            self.set_status("Select a pose first", "orange")
+            return
+        
+        library = self.get_pose_library()
+        namespaces = self.get_target_namespaces()
+        if self.pose_scope_combo.currentText() == "Selected limbs":
+            limbs = list(dict.fromkeys(limb for _, limb in self.get_selected_limbs()))
+            if not limbs:
+                self.set_status("Select a control of the limbs to pose", "orange")
+                return
+        else:
+            limbs = list(self.limb_controls)
+        
+        self.core.autokey = self.autokey_checkbox.isChecked()
+        written = pose_library.apply_pose(self.core, library.get(item.text()), library.layout,
+                                          namespaces, limbs, mirror)
+        for limb in limbs:
+            self.update_button_state(limb)
+        message = f"Applied {'mirrored ' if mirror else ''}pose '{item.text()}' ({written} values"
+        message += f", {len(namespaces)} characters)" if len(namespaces) > 1 else ")"
+        self.set_status(message, "green")
+    
+    def delete_pose(self):
+        """Delete the selected pose"""
+        item = self.pose_list.currentItem()
+        if not item:
+            return
+        self.get_pose_library().remove(item.text())
+        self.refresh_pose_list()
+        self.set_status(f"Deleted pose '{item.text()}'", "green")
     
     def on_namespace_changed(self):
-        """Called when namespace field text changes"""
-        self.namespace = self.namespace_field.text()
+        """Called when namespace field text changes; waits for typing to pause"""
+        self.namespace_timer.start()
+    
+    def apply_namespace(self):
+        """Apply the namespace field once typing has settled"""
+        namespace = self.namespace_field.text()
+        if namespace == self.namespace:
+            return
+        
+        self.namespace = namespace
         self.update_all_button_states()
     
+    def showEvent(self, event):
+        """Detect the rig once the window is on screen, unless a cached result was used"""
+        super(GTCustomRigInterface, self).showEvent(event)
+        if not self.detected:
+            self.detected = True
+            QtCore.QTimer.singleShot(0, self.auto_detect_rig)
+    
     def auto_detect_rig(self):
         """Auto-detect rig type and namespace"""
-        detected = False
-        
-        # Try each rig preset
-        for rig_type, rig_data in self.RIG_PRESETS.items():
-            namespaces = self.find_rig_namespaces(rig_data)
+        rig_type, namespaces = self.core.detect_rig()
+        self.apply_detection(rig_type, namespaces)
+    
+    def apply_detection(self, rig_type, namespaces):
+        """Select a detected rig type and its namespaces"""
+        self.detected = True
+        if rig_type:
+            # The first namespace found drives the limb buttons; all of them are listed as characters
+            namespace = namespaces[0]
+            self.core.set_rig(rig_type, namespace)
+            self.set_rig_type_combo(rig_type)
+            self.namespace_field.setText(namespace)
+            self.set_character_namespaces(namespaces)
             
-            if namespaces:
-                self.rig_type_combo.setCurrentText(rig_type)
-                self.limb_controls = rig_data.copy()
-                
-                # Use first namespace found
-                namespace = namespaces[0]
-                self.namespace_field.setText(namespace)
-                self.namespace = namespace
-                
-                self.set_status(f"Detected: {rig_type}" + (f" ({namespace})" if namespace else ""), "green")
-                detected = True
-                break
-        
-        if not detected:
-            self.set_status("No rig detected - using Custom preset", "orange")
-            self.rig_type_combo.setCurrentText("Custom")
-            self.limb_controls = self.RIG_PRESETS['Custom'].copy()
+            status = f"Detected: {rig_type}" + (f" ({namespace})" if namespace else "")
+            if len(namespaces) > 1:
+                status += f" + {len(namespaces) - 1} more characters"
+            self.set_status(status, "green")
+        elif not self.RIG_PRESETS:
+            self.show_missing_presets()
+        else:
+            fallback = 'Custom' if 'Custom' in self.RIG_PRESETS else self.rig_type_combo.currentText()
+            self.set_status(f"No rig detected - using {fallback} preset", "orange")
+            self.core.set_rig(fallback)
+            self.set_rig_type_combo(fallback)
+            self.set_character_namespaces([])
         
         self.update_all_button_states()
+        self.core.remember_switch_attrs()
+        self.refresh_pose_list()
     
-    def find_rig_namespaces(self, rig_data):
-        """Search scene for rig controls and extract namespaces"""
-        namespaces = set()
-        
-        for limb_name, limb_info in rig_data.items():
-            switch_ctrl = limb_info['switch']
-            
-            # Search for control with any namespace
-            found = cmds.ls(f"*:{switch_ctrl}", type='transform')
-            if not found:
-                # Also try without namespace
-                found = cmds.ls(switch_ctrl, type='transform')
-            
-            for obj in found:
-                if ':' in obj:
-                    ns = obj.split(':')[0]
-                    namespaces.add(ns)
-                else:
-                    namespaces.add("")  # No namespace
-        
-        return list(namespaces)
+    def set_rig_type_combo(self, rig_type):
+        """
+        Show a rig type without on_rig_type_changed: the caller has set the
+        core and namespaces, and the signal would search the whole scene.
+        """
+        self.rig_type_combo.blockSignals(True)
+        self.rig_type_combo.setCurrentText(rig_type)
+        self.rig_type_combo.blockSignals(False)
+    
+    def set_character_namespaces(self, namespaces):
+        """Fill the character list with the detected namespaces"""
+        self.characters_list.clear()
+        for namespace in namespaces:
+            item = QtWidgets.QListWidgetItem(namespace or "(no namespace)")
+            item.setData(QtCore.Qt.UserRole, namespace)
+            self.characters_list.addItem(item)
+    
+    def get_target_namespaces(self):
+        """Return the namespaces a switch applies to: the selected (or all listed) characters, or the current one"""
+        if not self.characters_group.isChecked() or not self.characters_list.count():
+            return [self.namespace]
+        
+        items = self.characters_list.selectedItems()
+        if not items:
+            items = [self.characters_list.item(i) for i in range(self.characters_list.count())]
+        return [item.data(QtCore.Qt.UserRole) for item in items]
+    
+    def multi_character(self):
+        """Return True when switches go to more than the current namespace"""
+        return self.get_target_namespaces() != [self.namespace]
     
     def set_status(self, message, color="green"):
         """Update status label"""
@@ -446,22 +801,35 @@ class GTCustomRigInterface(QtWidgets.QDialog):
 <b>Auto Detection:</b><br>
 • Click "Auto Detect" to automatically find your rig type<br>
 • Supports MetaHuman (mGear), Unreal Mannequin, and Custom rigs<br>
-• Automatically detects namespaces<br><br>
+• Automatically detects namespaces<br>
+• Remembered per shot: reopening the tool skips detection until a referenced file changes<br><br>
 
 <b>Rig Types:</b><br>
 • <b>MetaHuman (mGear):</b> For MetaHumans rigged with mGear<br>
 • <b>Unreal Mannequin:</b> For standard Unreal Engine rigs<br>
-• <b>Custom:</b> For custom rigs (requires code modification)<br><br>
+• <b>Custom:</b> For custom rigs<br>
+• Add your own rig as a JSON/YAML preset file (see Settings tab), then "Reload Presets"<br><br>
 
 <b>Namespace:</b><br>
 • Auto-detected with "Auto Detect" button<br>
 • Or click "Get" to detect from selected object<br>
 • Or manually enter in the text field<br><br>
 
+<b>Multiple Characters:</b><br>
+• Tick "Multiple Characters" to switch every detected character at once<br>
+• Select characters in the list to limit switches to them<br>
+• All characters are baked in one pass; hover the status for per-character speed<br><br>
+
+<b>Pose Library:</b><br>
+• Name a pose and click "Capture" to save every limb of the current character<br>
+• "Apply" writes the selected pose to all (or the selected) limbs of the target characters<br>
+• "Apply Mirrored" swaps left and right limbs<br><br>
+
 <b>FK/IK Buttons:</b><br>
 • <b>Green highlight</b> = Current active mode<br>
 • Click FK or IK to switch to that mode<br>
-• Click "Switch" to toggle between modes<br><br>
+• Click "Switch" to toggle between modes<br>
+• Without the dialog: bind <i>import hotkey_switch; hotkey_switch.switch_selected()</i> to a hotkey or shelf button to toggle the limbs of the selected controls<br><br>
 
 <b>MetaHuman Notes:</b><br>
 • Works with mGear-rigged MetaHumans<br>
@@ -472,7 +840,7 @@ class GTCustomRigInterface(QtWidgets.QDialog):
 • If controls not found, check rig type selection<br>
 • Verify namespace is correct<br>
 • Check status message for details<br>
-• For custom rigs, edit control names in Settings tab
+• For custom rigs, check the preset file folders and errors in Settings tab
         """
         
         msg = QtWidgets.QMessageBox(self)
@@ -508,45 +876,12 @@ class GTCustomRigInterface(QtWidgets.QDialog):
         self.namespace = ""
         self.update_all_button_states()
     
-    def get_control_name(self, control):
-        """Get the full control name with namespace"""
-        if self.namespace:
-            return f"{self.namespace}:{control}"
-        return control
-    
-    def detect_current_mode(self, limb):
-        """Detect if limb is currently in IK or FK mode"""
-        if limb not in self.limb_controls:
-            return None
-            
-        limb_data = self.limb_controls[limb]
-        switch_ctrl = self.get_control_name(limb_data['switch'])
-        
-        if not cmds.objExists(switch_ctrl):
-            return None
-        
-        # Try the specified switch attribute
-        if 'switch_attr' in limb_data:
-            attr = limb_data['switch_attr']
-            if cmds.attributeQuery(attr, node=switch_ctrl, exists=True):
-                value = cmds.getAttr(f"{switch_ctrl}.{attr}")
-                # 0 = FK, 1 = IK for most rigs
-                return 'ik' if value > 0.5 else 'fk'
-        
-        # Fallback: common attributes
-        for attr in ['blend', 'ikFkBlend', 'ikBlend', 'ikFk', 'fkIk', 'IK_FK']:
-            if cmds.attributeQuery(attr, node=switch_ctrl, exists=True):
-                value = cmds.getAttr(f"{switch_ctrl}.{attr}")
-                return 'ik' if value > 0.5 else 'fk'
-        
-        return None
-    
     def update_button_state(self, limb_name):
         """Update button highlighting based on current mode"""
         if limb_name not in self.limb_buttons:
             return
         
-        current_mode = self.detect_current_mode(limb_name)
+        current_mode = self.core.detect_current_mode(limb_name)
         fk_btn = self.limb_buttons[limb_name]['fk']
         ik_btn = self.limb_buttons[limb_name]['ik']
         
@@ -565,15 +900,118 @@ class GTCustomRigInterface(QtWidgets.QDialog):
     
     def update_all_button_states(self):
         """Update all limb button states"""
-        for limb_name in self.limb_buttons.keys():
+        with profiler.operation('button states'):
+            self.watch_switch_nodes()
+            for limb_name in self.limb_buttons.keys():
+                self.update_button_state(limb_name)
+    
+    def schedule_button_refresh(self, limbs=None):
+        """Queue a coalesced button refresh for some (default: all) limbs"""
+        self.pending_limbs.update(limbs if limbs is not None else self.limb_buttons.keys())
+        self.refresh_timer.start()
+    
+    def flush_button_refresh(self):
+        """Refresh the limbs queued by scene callbacks"""
+        limbs, self.pending_limbs = self.pending_limbs, set()
+        for limb_name in limbs:
             self.update_button_state(limb_name)
     
+    def watch_switch_nodes(self):
+        """Attach attribute-changed callbacks to the current rig's switch controls"""
+        key = (self.core.rig_type, self.namespace)
+        if key == self.watched_key:
+            return
+        
+        self.remove_scene_callbacks()
+        self.core.remember_switch_attrs()
+        self.core.control_cache.clear()
+        self.watched_key = key
+        
+        # Animated switch attributes change with time rather than through setAttr
+        self.callback_ids.append(om.MEventMessage.addEventCallback(
+            'timeChanged', lambda *args: self.schedule_button_refresh()))
+        
+        for limb_name in self.limb_controls:
+            # Limbs resolved without the Maya API (the stand-in scene) have no node handles to watch
+            resolved = self.core.resolve_limb(limb_name)
+            handle = resolved['handles'].get(resolved['switch_ctrl']) if resolved else None
+            if handle is None:
+                continue
+            
+            switch_node = handle.object()
+            self.callback_ids.append(om.MNodeMessage.addAttributeChangedCallback(
+                switch_node, self.on_switch_attr_changed, limb_name))
+    
+    def on_switch_attr_changed(self, msg, plug, other_plug, limb_name):
+        """Scene callback: a switch control attribute was set, connected or keyed"""
+        if msg & (om.MNodeMessage.kAttributeSet | om.MNodeMessage.kConnectionMade
+                  | om.MNodeMessage.kConnectionBroken | om.MNodeMessage.kAttributeKeyable):
+            self.schedule_button_refresh([limb_name])
+    
+    def remove_scene_callbacks(self):
+        """Detach every scene callback owned by the dialog"""
+        if self.callback_ids:
+            om.MMessage.removeCallbacks(self.callback_ids)
+        self.callback_ids = []
+        self.watched_key = None
+    
+    def set_profiling(self, enabled):
+        """Turn the scene command profiler on or off"""
+        if enabled:
+            profiler.get_profiler().enable()
+        else:
+            profiler.get_profiler().disable()
+        self.update_profile_text()
+    
+    def reset_profile(self):
+        """Clear the recorded profile"""
+        profiler.get_profiler().reset()
+        self.update_profile_text()
+    
+    def update_profile_text(self):
+        """Show the per-operation profile in the Diagnostics panel"""
+        self.profile_text.setPlainText(profiler.get_profiler().format_summary())
+    
+    def export_profile(self, kind):
+        """Save the profile as a JSON summary or a Chrome trace"""
+        if kind == 'trace':
+            path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export Chrome Trace", "switch_trace.json",
+                                                            "Trace (*.json)")
+        else:
+            path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export Profile", "switch_profile.json",
+                                                            "JSON (*.json)")
+        if not path:
+            return
+        
+        if kind == 'trace':
+            profiler.get_profiler().export_chrome_trace(path)
+        else:
+            profiler.get_profiler().export_json(path)
+        self.set_status(f"Profile exported to {path}", "green")
+    
+    def closeEvent(self, event):
+        """Detach scene callbacks when the dialog closes"""
+        self.remove_scene_callbacks()
+        self.core.remember_switch_attrs()
+        self.core.control_cache.clear()
+        self.core.chain_cache.clear()
+        profiler.get_profiler().disable()
+        super(GTCustomRigInterface, self).closeEvent(event)
+    
     def switch_to_mode(self, limb, target_mode):
         """Switch limb to specified mode (FK or IK)"""
-        current_mode = self.detect_current_mode(limb)
+        if self.multi_character():
+            self.switch_limbs([limb], target_mode)
+            return
+        
+        if limb not in self.limb_controls:
+            self.warn_missing_limb(limb)
+            return
+        
+        current_mode = self.core.detect_current_mode(limb)
         
         if current_mode is None:
-            switch_ctrl = self.get_control_name(self.limb_controls[limb]['switch'])
+            switch_ctrl = self.core.get_control_name(self.limb_controls[limb]['switch'])
             QtWidgets.QMessageBox.warning(self, 'Warning', 
                                          f"Could not find switch control for {limb}.\n"
                                          f"Looking for: {switch_ctrl}\n\n"
@@ -588,10 +1026,18 @@ class GTCustomRigInterface(QtWidgets.QDialog):
     
     def smart_switch(self, limb):
         """Automatically detect current mode and switch to opposite"""
-        current_mode = self.detect_current_mode(limb)
+        if self.multi_character():
+            self.switch_limbs([limb])
+            return
+        
+        if limb not in self.limb_controls:
+            self.warn_missing_limb(limb)
+            return
+        
+        current_mode = self.core.detect_current_mode(limb)
         
         if current_mode is None:
-            switch_ctrl = self.get_control_name(self.limb_controls[limb]['switch'])
+            switch_ctrl = self.core.get_control_name(self.limb_controls[limb]['switch'])
             QtWidgets.QMessageBox.warning(self, 'Warning',
                                          f"Could not find switch control for {limb}.\n"
                                          f"Looking for: {switch_ctrl}\n\n"
@@ -601,53 +1047,152 @@ class GTCustomRigInterface(QtWidgets.QDialog):
         target_mode = 'fk' if current_mode == 'ik' else 'ik'
         self.perform_switch(limb, current_mode, target_mode)
     
+    def switch_all_limbs(self):
+        """Toggle every limb of the current rig in one pass"""
+        self.switch_limbs(list(self.limb_buttons.keys()))
+    
+    def switch_selected_limbs(self):
+        """Toggle the limbs that own a selected control in one pass"""
+        character_limbs = self.get_selected_limbs()
+        if not character_limbs:
+            QtWidgets.QMessageBox.warning(self, 'Warning', 'Select a control on at least one limb')
+            return
+        self.switch_character_limbs(character_limbs)
+    
+    def get_selected_limbs(self):
+        """Return [(namespace, limb)] for the target characters' limbs that own a selected control"""
+        return self.core.get_character_limbs_for_nodes(cmds.ls(selection=True) or [],
+                                                       self.get_target_namespaces())
+    
+    def switch_limbs(self, limbs, target_mode=None):
+        """Switch several limbs on every target character, toggling each one when target_mode is None"""
+        namespaces = self.get_target_namespaces()
+        self.switch_character_limbs([(namespace, limb) for namespace in namespaces for limb in limbs],
+                                    target_mode)
+    
+    def switch_character_limbs(self, character_limbs, target_mode=None):
+        """Switch [(namespace, limb)] pairs at once, toggling each one when target_mode is None"""
+        switches, missing = self.core.plan_character_switches(character_limbs, target_mode)
+        
+        if switches:
+            self.perform_switches(switches)
+        
+        if missing:
+            names = ", ".join(self.format_limb(namespace, limb) for namespace, limb in missing)
+            self.set_status(f"Switch control not found for: {names}", "orange")
+        elif not switches:
+            self.set_status(f"All limbs already in {target_mode.upper()}" if target_mode else "Nothing to switch", "orange")
+    
+    def format_limb(self, namespace, limb):
+        """Return a limb's display name, prefixed with its character when it is not the current one"""
+        name = limb.replace('_', ' ').title()
+        if namespace != self.namespace:
+            name = f"{namespace}: {name}"
+        return name
+    
     def perform_switch(self, limb, from_mode, to_mode):
         """Perform the actual IK/FK switch"""
-        autokey = self.autokey_checkbox.isChecked()
-        start = self.start_frame.value()
-        end = self.end_frame.value()
+        self.perform_switches([(self.namespace, limb, from_mode, to_mode)])
+    
+    def perform_switches(self, switches):
+        """Perform a list of (namespace, limb, from_mode, to_mode) switches in a single pass"""
+        if self.baking:
+            # The UI stays live during a bake; ignore clicks until it finishes
+            return
         
-        if self.bake_mode == 'bake' and autokey and start < end:
-            self.bake_switch(limb, from_mode, to_mode, start, end)
+        self.core.autokey = self.autokey_checkbox.isChecked()
+        if self.settings_built:
+            # Until the Settings tab is opened the core's defaults apply
+            self.core.use_playhead = self.playhead_bake_checkbox.isChecked()
+            self.core.dg_evaluation = self.dg_bake_checkbox.isChecked()
+            self.core.parallel_workers = self.parallel_workers_spin.value()
+            self.core.memory_limit_mb = self.memory_limit_spin.value()
+            self.core.reduce_keys = self.reduce_keys_checkbox.isChecked()
+            self.core.reduce_tolerances = {'rotate': self.rotate_tolerance_spin.value(),
+                                           'translate': self.translate_tolerance_spin.value()}
+            self.core.incremental = self.incremental_checkbox.isChecked()
+        
+        characters = list(dict.fromkeys(switch[0] for switch in switches))
+        if len(switches) == 1:
+            namespace, limb, from_mode, to_mode = switches[0]
+            message = f"{self.format_limb(namespace, limb)}: {from_mode.upper()} → {to_mode.upper()}"
+        elif len(characters) > 1:
+            message = f"Switched {len(switches)} limbs on {len(characters)} characters"
         else:
-            self.match_and_switch(limb, from_mode, to_mode)
-        
-        self.update_button_state(limb)
-        self.set_status(f"{limb.replace('_', ' ').title()}: {from_mode.upper()} → {to_mode.upper()}", "green")
-    
-    def match_and_switch(self, limb, from_mode, to_mode):
-        """Match positions and switch on current frame"""
-        limb_data = self.limb_controls[limb]
-        switch_ctrl = self.get_control_name(limb_data['switch'])
-        
-        switch_attr = None
-        if 'switch_attr' in limb_data:
-            attr = limb_data['switch_attr']
-            if cmds.attributeQuery(attr, node=switch_ctrl, exists=True):
-                switch_attr = attr
-        
-        if not switch_attr:
-            for attr in ['blend', 'ikFkBlend', 'ikBlend', 'ikFk']:
-                if cmds.attributeQuery(attr, node=switch_ctrl, exists=True):
-                    switch_attr = attr
-                    break
-        
-        if switch_attr:
-            target_value = 1 if to_mode == 'ik' else 0
-            cmds.setAttr(f"{switch_ctrl}.{switch_attr}", target_value)
-            
-            if self.autokey_checkbox.isChecked():
-                cmds.setKeyframe(switch_ctrl, attribute=switch_attr)
+            message = f"Switched {len(switches)} limbs"
+        
+        self.begin_bake_progress()
+        try:
+            stats = self.core.perform_character_switches(switches, self.start_frame.value(), self.end_frame.value(),
+                                                         mode=self.bake_mode, progress=self.report_bake_progress)
+        finally:
+            self.end_bake_progress()
+        
+        if stats:
+            if stats['cancelled']:
+                if stats.get('frames_written'):
+                    self.set_status(f"Bake cancelled - {stats['frames_written']} frames were already keyed", "orange")
+                else:
+                    self.set_status("Bake cancelled - scene unchanged", "orange")
+                return
+            elif stats['frames']:
+                message += f" ({stats['frames']} {stats['mode']} frames @ {stats['fps']:.1f} fps, {stats['method']})"
+                if 'rebaked_frames' in stats:
+                    message += f" - {stats['rebaked_frames']} frames re-baked"
+                if 'keys_removed' in stats:
+                    deviation = stats['max_deviation']
+                    message += (f" - reduced by {stats['keys_removed']} keys, max error "
+                                f"{deviation['rotate']:.4f}° / {deviation['translate']:.4f}")
+            else:
+                message += " (no keys in range)"
+        
+        for namespace, limb, from_mode, to_mode in switches:
+            if namespace == self.namespace:
+                self.update_button_state(limb)
+        if self.settings_built and self.profile_checkbox.isChecked():
+            self.update_profile_text()
+        self.set_status(message, "green")
+        self.status_label.setToolTip(self.format_character_stats(stats))
     
-    def bake_switch(self, limb, from_mode, to_mode, start, end):
-        """Bake the IK/FK switch over a frame range"""
-        current_time = cmds.currentTime(query=True)
-        
-        for frame in range(start, end + 1):
-            cmds.currentTime(frame)
-            self.match_and_switch(limb, from_mode, to_mode)
-        
-        cmds.currentTime(current_time)
+    def format_character_stats(self, stats):
+        """Return a per-character throughput breakdown of a bake, slowest first"""
+        if not stats or len(stats.get('characters', {})) < 2:
+            return ""
+        
+        characters = sorted(stats['characters'].items(), key=lambda item: item[1]['fps'])
+        lines = [f"{namespace or '(no namespace)'}: {len(character['limbs'])} limbs, "
+                 f"{character['keys']} keys, {character['seconds']:.2f}s, {character['fps']:.1f} fps"
+                 for namespace, character in characters]
+        return "\n".join(lines)
+    
+    def begin_bake_progress(self):
+        """Lock out new switches; the progress bar appears with the first chunk"""
+        self.baking = True
+        self.bake_cancel_requested = False
+        self.bake_started = time.perf_counter()
+    
+    def report_bake_progress(self, done, total):
+        """Update progress, let Qt process events and return False if the bake was cancelled"""
+        elapsed = time.perf_counter() - self.bake_started
+        fps = done / elapsed if elapsed > 0 else 0.0
+        eta = (total - done) / fps if fps > 0 else 0.0
+        
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+        self.progress_label.setText(f"{fps:.0f} fps, ETA {eta:.1f}s")
+        self.progress_widget.show()
+        QtWidgets.QApplication.processEvents()
+        return not self.bake_cancel_requested
+    
+    def end_bake_progress(self):
+        """Hide the progress bar"""
+        self.baking = False
+        self.progress_widget.hide()
+    
+    def cancel_bake(self):
+        """Ask the running bake to stop after its current chunk"""
+        self.bake_cancel_requested = True
+        self.progress_label.setText("Cancelling...")
     
     def get_start_frame(self):
         """Set start frame to current time"""